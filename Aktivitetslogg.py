@@ -1,9 +1,19 @@
-import csv
-import os
+import sys
 from datetime import datetime
 
+from aktivitetslogg_poang import berakna_guldkrav, sammanfatta
+from aktivitetslogg_lagring import MASTER_FIL, SESSION_FIL, aterstall_journal, spara_session
+
+# --- Bulkinläsning utan dialog (se aktivitetslogg_batch.py) ---
+if "--batch" in sys.argv[1:]:
+    from aktivitetslogg_batch import main
+    raise SystemExit(main(sys.argv[1:]))
+
 print("Aktivitetslogg\n")
 
+if aterstall_journal():
+    print("Återställde en avbruten sparning från förra körningen.\n")
+
 # --- Grundinfo ---
 namn = input("Ditt namn? ").strip()
 plats = input("Skjutplats? ").strip()
@@ -34,9 +44,7 @@ while True:
     print("Ogiltig inmatning. Skriv A eller C.")
 
 # Grundkrav + åldersjustering
-guldkrav = 42 if vapenklass == "A" else 45
-if alder <= 54:
-    guldkrav += 1
+guldkrav = berakna_guldkrav(vapenklass, alder)
 
 # --- Registrera serier ---
 print("\nRegistrera poäng (0 avslutar). Maxpoäng per serie: 50.")
@@ -86,16 +94,13 @@ nu = datetime.now()
 datum = nu.strftime("%Y-%m-%d")
 tid = nu.strftime("%H:%M:%S")
 
-totalpoang = sum(resultat)
-snitt = totalpoang / len(resultat)
+_, totalpoang, snitt, guld = sammanfatta(resultat, guldkrav)
 
 # --- Utskrift ---
 print("\nResultat:")
-guld = 0
 for i, poang in enumerate(resultat, start=1):
     if poang >= guldkrav:
         print(f"Serie {i}: {poang}*")
-        guld += 1
     else:
         print(f"Serie {i}: {poang}")
 
@@ -106,68 +111,9 @@ print(f"Snittpoäng: {snitt:.2f}")
 print(f"Guldserier: {guld}")
 print("Bra jobbat idag. Välkommen åter!")
 
-# --- CSV-export: per-serie masterfil ---
-master_fil = "aktivitetslogg.csv"
-fält_master = [
-    "Datum", "Tid", "Namn", "Ålder", "Plats", "Skjutledare",
-    "Vapenklass", "Guldkrav", "SerieNr", "Poäng", "GuldSerie"
-]
-
-def skriv_master(csv_fil):
-    nyskapad = not os.path.exists(csv_fil)
-    with open(csv_fil, mode="a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fält_master)
-        if nyskapad:
-            writer.writeheader()
-        for i, poang in enumerate(resultat, start=1):
-            writer.writerow({
-                "Datum": datum,
-                "Tid": tid,
-                "Namn": namn,
-                "Ålder": alder,
-                "Plats": plats,
-                "Skjutledare": skjutledare,
-                "Vapenklass": vapenklass,
-                "Guldkrav": guldkrav,
-                "SerieNr": i,
-                "Poäng": poang,
-                "GuldSerie": "Ja" if poang >= guldkrav else "Nej",
-            })
-
-skriv_master(master_fil)
-print(f"\nData (per serie) sparad i '{master_fil}'.")
-
-# --- CSV-export: session på en rad ---
-session_fil = "aktivitetslogg_sessioner.csv"
-fält_session = [
-    "Datum", "Tid", "Namn", "Ålder", "Plats", "Skjutledare",
-    "Vapenklass", "Guldkrav", "AntalSerier", "Totalpoäng",
-    "Snittpoäng", "Guldserier", "Serier"
-]
-
-def join_serier(values):
-    return "|".join(str(v) for v in values)
-
-nyskapad = not os.path.exists(session_fil)
-with open(session_fil, mode="a", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=fält_session)
-    if nyskapad:
-        writer.writeheader()
-    writer.writerow({
-        "Datum": datum,
-        "Tid": tid,
-        "Namn": namn,
-        "Ålder": alder,
-        "Plats": plats,
-        "Skjutledare": skjutledare,
-        "Vapenklass": vapenklass,
-        "Guldkrav": guldkrav,
-        "AntalSerier": len(resultat),
-        "Totalpoäng": totalpoang,
-        "Snittpoäng": f"{snitt:.2f}",
-        "Guldserier": guld,
-        "Serier": join_serier(resultat),
-    })
-print(f"Session (en rad) sparad i '{session_fil}'.")
+# --- CSV-export: per-serie masterfil + session på en rad ---
+spara_session(datum, tid, namn, alder, plats, skjutledare, vapenklass, guldkrav, resultat)
+print(f"\nData (per serie) sparad i '{MASTER_FIL}'.")
+print(f"Session (en rad) sparad i '{SESSION_FIL}'.")
 
 #Testar ändring igen
\ No newline at end of file
@@ -1,21 +1,200 @@
-import csv
-import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-MASTER_FIL = "aktivitetslogg.csv"
-SESSION_FIL = "aktivitetslogg_sessioner.csv"
+from aktivitetslogg_index import INDEX_FIL, Historikindex
+from aktivitetslogg_poang import MAXPOANG, berakna_guldkrav
+from aktivitetslogg_lagring import MASTER_FIL, SESSION_FIL, aterstall_journal, spara_session
+
+
+class Historikflik(ttk.Frame):
+    """
+    Bläddra i hela historiken. Bara de synliga raderna finns i listan; de
+    hämtas sidvis ur masterfilen via byte-indexet (aktivitetslogg_index).
+    Indexet byggs en gång och kompletteras med filens nya svans, i en
+    bakgrundstråd så att fliken öppnas direkt.
+    """
+    SIDA = 200       # sessioner per hämtning
+    SIDCACHE = 20    # antal sidor i minnet
+    KOLUMNER = ("Datum", "Tid", "Namn", "Plats", "Skjutledare", "Klass", "Serier", "Total", "Guld")
+
+    def __init__(self, master, master_fil: str = MASTER_FIL, index_fil: str = INDEX_FIL):
+        super().__init__(master)
+        self.master_fil = master_fil
+        self.index_fil = index_fil
+        self.ix = None            # öppnas i huvudtråden när indexet är klart
+        self._bygger = False
+        self._sidor = OrderedDict()
+        self.antal = 0
+        self.forsta = 0
+
+        self.f_namn = tk.StringVar()
+        self.f_plats = tk.StringVar()
+        self.f_fran = tk.StringVar()
+        self.f_till = tk.StringVar()
+        self.info = tk.StringVar(value="")
+
+        filter_frm = ttk.Frame(self); filter_frm.pack(fill="x", padx=8, pady=(8, 4))
+        for i, (etikett, var, bredd) in enumerate((("Namn", self.f_namn, 16), ("Plats", self.f_plats, 12),
+                                                   ("Från", self.f_fran, 11), ("Till", self.f_till, 11))):
+            ttk.Label(filter_frm, text=etikett).grid(row=0, column=2 * i, sticky="w", padx=(0 if i == 0 else 8, 4))
+            e = ttk.Entry(filter_frm, textvariable=var, width=bredd)
+            e.grid(row=0, column=2 * i + 1, sticky="w")
+            e.bind("<Return>", lambda _e: self.filtrera())
+        ttk.Button(filter_frm, text="Sök", command=self.filtrera).grid(row=0, column=8, padx=(8, 0))
+
+        lista = ttk.Frame(self); lista.pack(fill="both", expand=True, padx=8)
+        self.tree = ttk.Treeview(lista, columns=self.KOLUMNER, show="headings", height=14,
+                                 selectmode="browse")
+        for k, bredd in zip(self.KOLUMNER, (80, 60, 110, 80, 100, 40, 150, 40, 40)):
+            self.tree.heading(k, text=k)
+            self.tree.column(k, width=bredd, stretch=k == "Serier", anchor="w")
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scroll = ttk.Scrollbar(lista, orient="vertical", command=self._scrollkommando)
+        self.scroll.pack(side="right", fill="y")
+        for sekvens in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sekvens, self._hjul)
+        self.tree.bind("<Up>", lambda _e: self._rulla(-1) or "break")
+        self.tree.bind("<Down>", lambda _e: self._rulla(1) or "break")
+        self.tree.bind("<Prior>", lambda _e: self._rulla(-self._synliga()) or "break")
+        self.tree.bind("<Next>", lambda _e: self._rulla(self._synliga()) or "break")
+
+        ttk.Label(self, textvariable=self.info).pack(anchor="w", padx=8, pady=(4, 8))
+
+    # --------- Index ----------
+    def visa(self):
+        """Anropas när fliken väljs: kompletterar indexet i bakgrunden."""
+        if self._bygger:
+            return
+        self._bygger = True
+        if self.ix is None:
+            self.info.set("Bygger historikindex (första gången kan ta en stund)...")
+        tradresultat = {}
+
+        def komplettera():
+            try:
+                with Historikindex(self.master_fil, self.index_fil) as ix:
+                    tradresultat["nya"] = ix.komplettera()
+            except Exception as fel:  # visas i fliken i stället för att tyst dö
+                tradresultat["fel"] = fel
+
+        trad = threading.Thread(target=komplettera, daemon=True)
+        trad.start()
+        self.after(100, self._vanta_pa_index, trad, tradresultat)
+
+    def _vanta_pa_index(self, trad, tradresultat):
+        if trad.is_alive():
+            self.after(100, self._vanta_pa_index, trad, tradresultat)
+            return
+        self._bygger = False
+        if "fel" in tradresultat:
+            self.info.set(f"Kunde inte läsa historiken: {tradresultat['fel']}")
+            return
+        if self.ix is None:
+            self.ix = Historikindex(self.master_fil, self.index_fil)
+        if tradresultat.get("nya") or not self._sidor:
+            self.filtrera(behall_position=True)
+
+    def stang(self):
+        if self.ix is not None:
+            self.ix.close()
+
+    # --------- Filter och sidor ----------
+    def _filter(self) -> dict:
+        till = self.f_till.get().strip() or None
+        return {
+            "namn": self.f_namn.get().strip() or None,
+            "plats": self.f_plats.get().strip() or None,
+            "fran": self.f_fran.get().strip() or None,
+            # "2024" eller "2024-05" som till ska ta med hela perioden
+            "till": till + "\uffff" if till else None,
+        }
+
+    def filtrera(self, behall_position: bool = False):
+        if self.ix is None:
+            return
+        self._sidor.clear()
+        self.antal = self.ix.antal_sessioner(prefix=True, **self._filter())
+        if not behall_position:
+            self.forsta = 0
+        self.forsta = max(0, min(self.forsta, self.antal - self._synliga()))
+        self.info.set(f"{self.antal:,} sessioner".replace(",", " "))
+        self._rita()
+
+    def _sida(self, nr: int) -> list[dict]:
+        if nr in self._sidor:
+            self._sidor.move_to_end(nr)
+            return self._sidor[nr]
+        rader = self.ix.sida(nr * self.SIDA, self.SIDA, prefix=True, **self._filter())
+        self._sidor[nr] = rader
+        if len(self._sidor) > self.SIDCACHE:
+            self._sidor.popitem(last=False)
+        return rader
+
+    def _synliga(self) -> int:
+        return int(self.tree.cget("height"))
+
+    def _rita(self):
+        self.tree.delete(*self.tree.get_children())
+        for i in range(self.forsta, min(self.forsta + self._synliga(), self.antal)):
+            sida = self._sida(i // self.SIDA)
+            if i % self.SIDA >= len(sida):
+                break
+            s = sida[i % self.SIDA]
+            serier = s["Serier"]
+            self.tree.insert("", "end", values=(
+                s["Datum"], s["Tid"], s["Namn"], s["Plats"], s["Skjutledare"], s["Vapenklass"],
+                " ".join(map(str, serier)), sum(serier), sum(1 for p in serier if p >= s["Guldkrav"]),
+            ))
+        if self.antal:
+            self.scroll.set(self.forsta / self.antal, min(1.0, (self.forsta + self._synliga()) / self.antal))
+        else:
+            self.scroll.set(0.0, 1.0)
+
+    # --------- Rullning ----------
+    def _rulla(self, steg: int):
+        ny = max(0, min(self.forsta + steg, self.antal - self._synliga()))
+        if ny != self.forsta:
+            self.forsta = ny
+            self._rita()
+
+    def _scrollkommando(self, *args):
+        if args[0] == "moveto":
+            self._rulla(int(float(args[1]) * self.antal) - self.forsta)
+        elif args[0] == "scroll":
+            steg = int(args[1]) * (self._synliga() if args[2] == "pages" else 1)
+            self._rulla(steg)
+
+    def _hjul(self, event):
+        if event.num == 4 or event.delta > 0:
+            self._rulla(-3)
+        else:
+            self._rulla(3)
+        return "break"
+
 
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Aktivitetslogg")
-        self.geometry("680x520")
+        self.geometry("760x560")
         self.resizable(False, False)
 
         # --- State ---
         self.resultat = []
+        # Löpande summor så att lägg till/ångra är O(1): total och antal per
+        # poäng (guldserier = antal med poäng >= guldkrav, högst MAXPOANG+1 steg)
+        self._total = 0
+        self._per_poang = [0] * (MAXPOANG + 1)
+        self._guldkrav = None
+
+        # Sparningar körs i tur och ordning på en egen tråd; mainloop frågar
+        # efter resultat med after() (Tk får bara röras från huvudtråden)
+        self._sparare = ThreadPoolExecutor(max_workers=1)
+        self._sparningar = []  # (future, args)
 
         # --- Formvariabler ---
         self.namn = tk.StringVar()
@@ -24,17 +203,34 @@ class App(tk.Tk):
         self.alder = tk.StringVar()
         self.vapenklass = tk.StringVar(value="A")
         self.poang = tk.StringVar()
+        self.alder.trace_add("write", self._grunddata_andrad)
+        self.vapenklass.trace_add("write", self._grunddata_andrad)
 
         # --- UI ---
-        self._build_form()
-        self._build_series()
+        flikar = ttk.Notebook(self)
+        flikar.pack(fill="both", expand=True)
+        registrera = ttk.Frame(flikar)
+        flikar.add(registrera, text="Registrera")
+        self._build_form(registrera)
+        self._build_series(registrera)
+        self.historik = Historikflik(flikar)
+        flikar.add(self.historik, text="Historik")
+        flikar.bind("<<NotebookTabChanged>>",
+                    lambda _e: flikar.select() == str(self.historik) and self.historik.visa())
 
-        self.status = tk.StringVar(value="Välkommen! Fyll i grunddata och lägg till serier.")
-        ttk.Label(self, textvariable=self.status).pack(anchor="w", padx=12, pady=(8, 0))
+        valkommen = "Välkommen! Fyll i grunddata och lägg till serier."
+        if aterstall_journal():
+            valkommen = "Återställde en avbruten sparning. " + valkommen
+        self.status = tk.StringVar(value=valkommen)
+        rad = ttk.Frame(self); rad.pack(fill="x", padx=12, pady=(8, 0))
+        ttk.Label(rad, textvariable=self.status).pack(side="left")
+        self.kostatus = tk.StringVar()
+        ttk.Label(rad, textvariable=self.kostatus, foreground="gray").pack(side="right")
+        self.protocol("WM_DELETE_WINDOW", self.stang)
 
     # --------- UI-byggare ----------
-    def _build_form(self):
-        frm = ttk.LabelFrame(self, text="Grundinformation")
+    def _build_form(self, parent):
+        frm = ttk.LabelFrame(parent, text="Grundinformation")
         frm.pack(fill="x", padx=12, pady=12)
 
         def add_row(row, label, var, width=28):
@@ -55,8 +251,8 @@ class App(tk.Tk):
         ttk.Radiobutton(frm, text="A", variable=self.vapenklass, value="A").grid(row=1, column=3, sticky="w")
         ttk.Radiobutton(frm, text="C", variable=self.vapenklass, value="C").grid(row=1, column=4, sticky="w")
 
-    def _build_series(self):
-        frm = ttk.LabelFrame(self, text="Serier")
+    def _build_series(self, parent):
+        frm = ttk.LabelFrame(parent, text="Serier")
         frm.pack(fill="both", expand=True, padx=12, pady=(0,12))
 
         left = ttk.Frame(frm); left.pack(side="left", fill="y", padx=8, pady=8)
@@ -83,10 +279,7 @@ class App(tk.Tk):
     # --------- Logik ----------
     @staticmethod
     def berakna_guldkrav(vapenklass: str, alder: int) -> int:
-        guldkrav = 42 if vapenklass == "A" else 45
-        if alder <= 54:
-            guldkrav += 1
-        return guldkrav
+        return berakna_guldkrav(vapenklass, alder)
 
     def validera_grunddata(self) -> tuple[bool, str]:
         if not self.namn.get().strip():
@@ -103,18 +296,26 @@ class App(tk.Tk):
             return False, "Ålder måste vara ett heltal."
         return True, ""
 
+    def _grunddata_andrad(self, *_):
+        # Ålder tolkas och guldkravet räknas bara när fälten ändras
+        try:
+            self._guldkrav = self.berakna_guldkrav(self.vapenklass.get(), int(self.alder.get().strip()))
+        except ValueError:
+            self._guldkrav = None
+        if self.resultat:
+            self.uppdatera_sum()
+
     def uppdatera_sum(self):
         if not self.resultat:
             self.lbl_sum.config(text="Inga serier ännu.")
             return
-        alder = int(self.alder.get().strip())
-        gk = self.berakna_guldkrav(self.vapenklass.get(), alder)
-        total = sum(self.resultat)
-        snitt = total / len(self.resultat)
-        guld = sum(1 for p in self.resultat if p >= gk)
+        gk = self._guldkrav
+        antal, total = len(self.resultat), self._total
+        snitt = total / antal
+        guld = sum(self._per_poang[gk:]) if gk is not None else 0
         self.lbl_sum.config(
-            text=f"Serier: {len(self.resultat)}   Total: {total}   Snitt: {snitt:.2f}   "
-                 f"Guldkrav {self.vapenklass.get()}: {gk}   Guldserier: {guld}"
+            text=f"Serier: {antal}   Total: {total}   Snitt: {snitt:.2f}   "
+                 f"Guldkrav {self.vapenklass.get()}: {'–' if gk is None else gk}   Guldserier: {guld}"
         )
 
     def lagg_till_serie(self):
@@ -137,6 +338,8 @@ class App(tk.Tk):
             return
 
         self.resultat.append(p)
+        self._total += p
+        self._per_poang[p] += 1
         self.listbox.insert(tk.END, f"Serie {len(self.resultat)}: {p}")
         self.poang.set("")
         self.uppdatera_sum()
@@ -144,7 +347,9 @@ class App(tk.Tk):
 
     def angra(self):
         if self.resultat:
-            self.resultat.pop()
+            p = self.resultat.pop()
+            self._total -= p
+            self._per_poang[p] -= 1
             self.listbox.delete(tk.END)
             self.uppdatera_sum()
             self.status.set("Senaste serie borttagen.")
@@ -169,47 +374,62 @@ class App(tk.Tk):
         datum = nu.strftime("%Y-%m-%d")
         tid = nu.strftime("%H:%M:%S")
         guldkrav = self.berakna_guldkrav(vklass, alder)
-        totalpoang = sum(self.resultat)
-        snitt = totalpoang / len(self.resultat)
-        guld = sum(1 for p in self.resultat if p >= guldkrav)
-
-        # Skriv master (per serie)
-        falt_master = ["Datum","Tid","Namn","Ålder","Plats","Skjutledare",
-                       "Vapenklass","Guldkrav","SerieNr","Poäng","GuldSerie"]
-        nyskapad = not os.path.exists(MASTER_FIL)
-        with open(MASTER_FIL, "a", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=falt_master)
-            if nyskapad: w.writeheader()
-            for i, poang in enumerate(self.resultat, start=1):
-                w.writerow({
-                    "Datum": datum, "Tid": tid, "Namn": namn, "Ålder": alder,
-                    "Plats": plats, "Skjutledare": skjutledare,
-                    "Vapenklass": vklass, "Guldkrav": guldkrav,
-                    "SerieNr": i, "Poäng": poang,
-                    "GuldSerie": "Ja" if poang >= guldkrav else "Nej"
-                })
-
-        # Skriv session (en rad)
-        falt_session = ["Datum","Tid","Namn","Ålder","Plats","Skjutledare",
-                        "Vapenklass","Guldkrav","AntalSerier","Totalpoäng",
-                        "Snittpoäng","Guldserier","Serier"]
-        nyskapad = not os.path.exists(SESSION_FIL)
-        with open(SESSION_FIL, "a", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=falt_session)
-            if nyskapad: w.writeheader()
-            w.writerow({
-                "Datum": datum, "Tid": tid, "Namn": namn, "Ålder": alder,
-                "Plats": plats, "Skjutledare": skjutledare, "Vapenklass": vklass,
-                "Guldkrav": guldkrav, "AntalSerier": len(self.resultat),
-                "Totalpoäng": totalpoang, "Snittpoäng": f"{snitt:.2f}",
-                "Guldserier": guld, "Serier": "|".join(map(str, self.resultat))
-            })
-
-        messagebox.showinfo(
-            "Sparat",
-            f"Per-serie: {MASTER_FIL}\nSessioner: {SESSION_FIL}\n\nTack för idag!"
-        )
-        self.status.set("Allt sparat. Du kan fortsätta lägga serier eller stänga fönstret.")
+
+        # Skriv master (per serie) och session (en rad) i bakgrunden. Serierna
+        # töms direkt så att nästa skytt kan börja registrera.
+        args = (datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav, list(self.resultat))
+        self._koa_sparning(args)
+        self.rensa_serier()
+        self.status.set(f"{namn}: sparas i bakgrunden. Nästa skytt kan registrera.")
+
+    def rensa_serier(self):
+        self.resultat = []
+        self._total = 0
+        self._per_poang = [0] * (MAXPOANG + 1)
+        self.listbox.delete(0, tk.END)
+        self.uppdatera_sum()
+
+    # --------- Sparning i bakgrunden ----------
+    def _koa_sparning(self, args):
+        future = self._sparare.submit(spara_session, *args)
+        self._sparningar.append((future, args))
+        if len(self._sparningar) == 1:
+            self.after(100, self._kolla_sparningar)
+        self._visa_ko()
+
+    def _visa_ko(self):
+        n = len(self._sparningar)
+        self.kostatus.set(f"⏳ {n} sparning{'ar' if n != 1 else ''} i kö" if n else "")
+
+    def _kolla_sparningar(self):
+        kvar = []
+        for future, args in self._sparningar:
+            if not future.done():
+                kvar.append((future, args))
+                continue
+            fel = future.exception()
+            if fel is None:
+                self.status.set(f"{args[2]}: sparat i {MASTER_FIL} och {SESSION_FIL}.")
+            elif messagebox.askretrycancel(
+                    "Sparning misslyckades",
+                    f"Kunde inte spara {args[2]} ({len(args[8])} serier):\n{fel}"):
+                kvar.append((self._sparare.submit(spara_session, *args), args))
+            else:
+                self.status.set(f"{args[2]}: sparades INTE.")
+        self._sparningar = kvar
+        self._visa_ko()
+        if kvar:
+            self.after(100, self._kolla_sparningar)
+
+    def stang(self):
+        while self._sparningar:
+            self.status.set("Väntar på att sparningarna ska bli klara...")
+            self.update_idletasks()
+            wait([f for f, _ in self._sparningar])
+            self._kolla_sparningar()
+        self._sparare.shutdown()
+        self.historik.stang()
+        self.destroy()
 
 if __name__ == "__main__":
     App().mainloop()
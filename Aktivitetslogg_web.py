@@ -1,51 +1,22 @@
-import io
-import csv
 from datetime import datetime
-import smtplib
+import time
 from email.message import EmailMessage
 
 import streamlit as st
-import pandas as pd
+
+from aktivitetslogg_poang import berakna_guldkrav
+from aktivitetslogg_historik import Historik
+from aktivitetslogg_sammanfattning import csv_payload, sammanfattning_cachad
+from aktivitetslogg_utkorg import DOD, SKICKAD, Utkorg, Utskickare
 
 # ---------- Hjälpfunktioner ----------
-def berakna_guldkrav(vklass: str, alder: int) -> int:
-    gk = 42 if vklass == "A" else 45
-    if alder <= 54:
-        gk += 1
-    return gk
-
-def build_master_rows(datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav, serier):
-    rows = []
-    for i, p in enumerate(serier, start=1):
-        rows.append({
-            "Datum": datum, "Tid": tid, "Namn": namn, "Ålder": alder, "Plats": plats,
-            "Skjutledare": skjutledare, "Vapenklass": vklass, "Guldkrav": guldkrav,
-            "SerieNr": i, "Poäng": p, "GuldSerie": "Ja" if p >= guldkrav else "Nej"
-        })
-    return rows
-
-def build_session_row(datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav, serier):
-    total = sum(serier)
-    snitt = total / len(serier)
-    guld = sum(1 for p in serier if p >= guldkrav)
-    return {
-        "Datum": datum, "Tid": tid, "Namn": namn, "Ålder": alder, "Plats": plats,
-        "Skjutledare": skjutledare, "Vapenklass": vklass, "Guldkrav": guldkrav,
-        "AntalSerier": len(serier), "Totalpoäng": total, "Snittpoäng": f"{snitt:.2f}",
-        "Guldserier": guld, "Serier": "|".join(map(str, serier))
-    }
-
-def rows_to_csv_bytes(rows, fieldnames) -> bytes:
-    buff = io.StringIO()
-    writer = csv.DictWriter(buff, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(rows if isinstance(rows, list) else [rows])
-    return buff.getvalue().encode("utf-8")
-
-def send_mail(to_addr: str, subject: str, body: str, attachments: list[tuple[str, bytes, str]]) -> str:
+def send_mail(to_addr: str, subject: str, body: str,
+              attachments: list[tuple[str, bytes, str]]) -> tuple[int | None, str]:
     """
     attachments: list of tuples (filename, content_bytes, mime)
-    SMTP-uppgifter läses från st.secrets["smtp"].
+    SMTP-uppgifter läses från st.secrets["smtp"]. Meddelandet läggs i
+    utkorgen och skickas av bakgrundstråden; returnerar (id, "OK") direkt
+    eller (None, felmeddelande).
     """
     smtp_cfg = st.secrets.get("smtp", {})
     host = smtp_cfg.get("host")
@@ -54,8 +25,8 @@ def send_mail(to_addr: str, subject: str, body: str, attachments: list[tuple[str
     pwd  = smtp_cfg.get("password")
     from_addr = smtp_cfg.get("from", user)
 
-    if not (host and port and user and pwd and from_addr):
-        return "Saknar SMTP-uppgifter i .streamlit/secrets.toml."
+    if not (host and port and from_addr and (pwd or not user)):
+        return None, "Saknar SMTP-uppgifter i .streamlit/secrets.toml."
 
     msg = EmailMessage()
     msg["Subject"] = subject
@@ -67,20 +38,26 @@ def send_mail(to_addr: str, subject: str, body: str, attachments: list[tuple[str
         maintype, subtype = mime.split("/", 1)
         msg.add_attachment(content, maintype=maintype, subtype=subtype, filename=filename)
 
-    # SSL (465) eller STARTTLS (587)
-    if port == 465:
-        with smtplib.SMTP_SSL(host, port) as s:
-            s.login(user, pwd)
-            s.send_message(msg)
-    else:
-        with smtplib.SMTP(host, port) as s:
-            s.starttls()
-            s.login(user, pwd)
-            s.send_message(msg)
+    utskickare = hamta_utskickare()
+    with Utkorg() as utkorg:
+        mid = utkorg.koa(msg)
+    utskickare.vack()
+    return mid, "OK"
+
+@st.cache_resource
+def hamta_utskickare() -> Utskickare:
+    # En bakgrundstråd per server; den håller SMTP-förbindelsen öppen mellan utskick
+    utskickare = Utskickare(dict(st.secrets.get("smtp", {})))
+    utskickare.start()
+    return utskickare
 
-    return "OK"
+@st.cache_resource
+def hamta_historik() -> Historik:
+    # En instans delas av alla användare; uppdatera() läser bara ny svans
+    return Historik()
 
 # ---------- UI ----------
+t_start = time.perf_counter()
 st.set_page_config(page_title="Aktivitetslogg", page_icon="⛳", layout="centered")
 st.title("Aktivitetslogg")
 
@@ -125,16 +102,8 @@ gk = berakna_guldkrav(vklass, int(alder))
 st.info(f"Guldkrav (klass {vklass}): **{gk}**")
 
 if st.session_state.serier:
-    df = pd.DataFrame({
-        "SerieNr": range(1, len(st.session_state.serier) + 1),
-        "Poäng": st.session_state.serier
-    })
-    df["GuldSerie"] = df["Poäng"] >= gk
+    df, total, snitt, guld = sammanfattning_cachad(st.session_state.serier, int(alder), vklass)
     st.dataframe(df, width="stretch", hide_index=True)
-
-    total = int(df["Poäng"].sum())
-    snitt = float(df["Poäng"].mean())
-    guld = int(df["GuldSerie"].sum())
     st.success(f"Serier: {len(df)}  |  Totalpoäng: {total}  |  Snitt: {snitt:.2f}  |  Guldserier: {guld}")
 else:
     st.warning("Inga serier ännu.")
@@ -151,38 +120,43 @@ disabled = (
 
 colA, colB, _ = st.columns([1, 1, 1])
 
-master_csv = None
-session_csv = None
 datum = ""
 tid = ""
 
 if st.session_state.serier:
-    now = datetime.now()
-    datum = now.strftime("%Y-%m-%d")
-    tid = now.strftime("%H:%M:%S")
-
-    master_rows = build_master_rows(datum, tid, namn, int(alder), plats, skjutledare, vklass, gk, st.session_state.serier)
-    session_row = build_session_row(datum, tid, namn, int(alder), plats, skjutledare, vklass, gk, st.session_state.serier)
-
-    master_fields = ["Datum","Tid","Namn","Ålder","Plats","Skjutledare","Vapenklass","Guldkrav","SerieNr","Poäng","GuldSerie"]
-    session_fields = ["Datum","Tid","Namn","Ålder","Plats","Skjutledare","Vapenklass","Guldkrav",
-                      "AntalSerier","Totalpoäng","Snittpoäng","Guldserier","Serier"]
-
-    master_csv = rows_to_csv_bytes(master_rows, master_fields)
-    session_csv = rows_to_csv_bytes(session_row, session_fields)
-
-    colA.download_button(
-        label="Ladda ner per-serie CSV",
-        data=master_csv,
-        file_name="aktivitetslogg.csv",
-        mime="text/csv",
-    )
-    colB.download_button(
-        label="Ladda ner session CSV",
-        data=session_csv,
-        file_name="aktivitetslogg_sessioner.csv",
-        mime="text/csv",
-    )
+    # Tidsstämpeln sätts när tillståndet ändras, inte vid varje omkörning,
+    # så att CSV-innehållet kan cachas på (metadata, serier).
+    export_nyckel = (namn, int(alder), plats, skjutledare, vklass, tuple(st.session_state.serier))
+    if st.session_state.get("export_nyckel") != export_nyckel:
+        now = datetime.now()
+        st.session_state.export_nyckel = export_nyckel
+        st.session_state.export_tid = (now.strftime("%Y-%m-%d"), now.strftime("%H:%M:%S"))
+        st.session_state.visa_nedladdning = False
+    datum, tid = st.session_state.export_tid
+
+    def hamta_csv() -> tuple[bytes, bytes]:
+        return csv_payload(datum, tid, namn, int(alder), plats, skjutledare, vklass, gk,
+                           tuple(st.session_state.serier))
+
+    # CSV byggs först när någon vill ladda ner
+    if not st.session_state.visa_nedladdning:
+        if colA.button("Förbered nedladdning"):
+            st.session_state.visa_nedladdning = True
+            st.rerun()
+    else:
+        master_csv, session_csv = hamta_csv()
+        colA.download_button(
+            label="Ladda ner per-serie CSV",
+            data=master_csv,
+            file_name="aktivitetslogg.csv",
+            mime="text/csv",
+        )
+        colB.download_button(
+            label="Ladda ner session CSV",
+            data=session_csv,
+            file_name="aktivitetslogg_sessioner.csv",
+            mime="text/csv",
+        )
 
 st.write("")
 maila = st.button("✉️ Maila resultat", disabled=disabled)
@@ -190,16 +164,17 @@ maila = st.button("✉️ Maila resultat", disabled=disabled)
 if maila:
     if not epost or "@" not in epost:
         st.error("Fyll i en giltig e-postadress högre upp.")
-    elif master_csv is None or session_csv is None:
+    elif not st.session_state.serier:
         st.error("Inga serier att skicka ännu.")
     else:
+        master_csv, session_csv = hamta_csv()
         body = (
             f"Namn: {namn}\nPlats: {plats}\nSkjutledare: {skjutledare}\n"
             f"Ålder: {alder}\nVapenklass: {vklass}\nGuldkrav: {gk}\n"
             f"Serier: {', '.join(map(str, st.session_state.serier))}\n"
             f"Datum/Tid: {datum} {tid}\n"
         )
-        result = send_mail(
+        mid, result = send_mail(
             to_addr=epost,
             subject=f"Aktivitetslogg {datum} {tid}",
             body=body,
@@ -208,11 +183,67 @@ if maila:
                 ("aktivitetslogg_sessioner.csv", session_csv, "text/csv"),
             ],
         )
-        if result == "OK":
-            st.success(f"Skickat till {epost}.")
+        if mid is not None:
+            st.session_state.setdefault("mail", []).append((mid, epost))
+            st.success(f"Lagt i utkorgen till {epost}; skickas i bakgrunden.")
         else:
             st.error(
                 "Kunde inte skicka e-post: "
                 + result
                 + "\nKontrollera SMTP-uppgifterna i .streamlit/secrets.toml."
             )
+
+# Leveransstatus för den här sessionens mejl
+if st.session_state.get("mail"):
+    with st.expander("Utskick", expanded=True):
+        with Utkorg() as utkorg:
+            for mid, till in reversed(st.session_state.mail):
+                status = utkorg.status(mid)
+                if status is None:
+                    continue
+                if status["status"] == SKICKAD:
+                    st.write(f"✅ Till {till}: skickat {datetime.fromtimestamp(status['skickad']):%H:%M:%S}")
+                elif status["status"] == DOD:
+                    st.write(f"❌ Till {till}: misslyckades ({status['senaste_fel']})")
+                elif status["forsok"]:
+                    st.write(f"⏳ Till {till}: försök {status['forsok'] + 1} kl. "
+                             f"{datetime.fromtimestamp(status['nasta_forsok']):%H:%M:%S} "
+                             f"({status['senaste_fel']})")
+                else:
+                    st.write(f"⏳ Till {till}: {status['status']}")
+            oversikt = utkorg.oversikt()
+        st.caption("Utkorgen: " + ", ".join(f"{n} {s}" for s, n in oversikt.items()))
+        st.button("Uppdatera status")
+
+# ---------- Historik ----------
+st.divider()
+st.header("Historik")
+
+historik = hamta_historik()
+historik.uppdatera()
+if historik.felaktiga:
+    st.warning(f"{historik.felaktiga} rader i sessionsfilen kunde inte tolkas och visas inte. "
+               "Kör 'python aktivitetslogg_kontroll.py kontrollera' för detaljer.")
+
+if not historik.namn():
+    st.write("Inga sparade sessioner ännu.")
+else:
+    namnlista = historik.namn()
+    vald = st.selectbox("Skytt", namnlista,
+                        index=namnlista.index(namn) if namn in namnlista else 0)
+    stat = historik.skytt(vald)
+    if stat:
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Sessioner", stat["Sessioner"])
+        m2.metric("Snitt", f"{stat['Snittpoäng']:.2f}")
+        m3.metric("Guldandel", f"{stat['Guldandel']:.0%}")
+        m4.metric("Bästa serie", stat["BästaSerie"])
+
+        trend = historik.trend(vald)
+        st.line_chart(trend, x="Datum", y="Snittpoäng", color="Vapenklass")
+        st.line_chart(trend, x="Datum", y="Guldandel", color="Vapenklass")
+
+    st.subheader("Topplista (snittpoäng, minst 3 sessioner)")
+    st.dataframe(historik.topplista(), width="stretch", hide_index=True)
+
+st.caption(f"Omkörning: {(time.perf_counter() - t_start) * 1000:.1f} ms")
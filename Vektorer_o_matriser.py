@@ -1,11 +1,288 @@
+"""
+Vektorräkning på många vektorer samtidigt.
+
+Uppgift 10.1.3 räknade normen och avståndet för ett par vektorer med
+generatoruttryck, t.ex. math.sqrt(sum(x**2 for x in v1)). Här tar varje
+funktion i stället en hel sats vektorer som en (N, d)-array (en vektor per
+rad) och räknar alla på en gång med numpy:
+
+    X = np.array([[4, 3, 1, 5], [3, 7, 0, 11]])
+    normer(X)                          # -> [7.14, 13.38]
+    avstand(X, [2, 3, 1, 1])           # varje rad mot v2
+    parvisa_avstand(X)                 # (N, N)-matris med alla avstånd
+    narmaste(X, Y)                     # närmaste rad i Y för varje rad i X
+
+Stora satser räknas i block av rader, så att minnet för mellanresultat
+håller sig under BLOCK_BYTE oavsett N. Med dtype=np.float32 halveras
+mängden data som läses och skrivs (men precisionen blir ~7 siffror).
+
+Matriserna till kapitel 10 läses ur Excel-filen med las_matriser(), som
+hittar de namngivna matrisblocken i bladet själv:
+
+    M = las_matriser(file_path, "Blad1")   # {"A": array, "B": array, ...}
+
+Första inläsningen tolkar xlsx-filen och sparar matriserna som .npy-filer
+i en cachekatalog märkt med filens SHA-256. Senare inläsningar av samma
+fil öppnar dem minnesmappade utan att röra Excel-filen mer än för hashen.
+"""
+
 # Genomgång av matteuppgifterna i “Matematik från yrkeshögskolan”, kapitel 10
-# Redan gjort 
+# Redan gjort
 
-# Använd pandas och numpy som verktyg
-import pandas as pd
+# Använd numpy som verktyg
+import hashlib
+import json
+import os
 import numpy as np
 
-# Hämta in Excel-filen
-file_path = "D:\Downloads\Övningsuppgifter YH Matematik.xlsx"
+# Excel-filen med matriserna (sätt MATTE_ARBETSBOK för att peka på en annan plats)
+file_path = os.environ.get("MATTE_ARBETSBOK", "Övningsuppgifter YH Matematik.xlsx")
+
+BLOCK_BYTE = 64 * 2**20      # övre gräns för mellanresultat per block
+MAX_MATRIS_BYTE = 2 * 2**30  # parvisa_avstand vägrar större matriser i minnet (använd ut=)
+
+
+def som_matris(X, dtype=None) -> np.ndarray:
+    """En vektor eller en sats vektorer som en (N, d)-array av flyttal."""
+    X = np.asarray(X)
+    if dtype is None:
+        dtype = X.dtype if X.dtype in (np.float32, np.float64) else np.float64
+    X = X.astype(dtype, copy=False)
+    if X.ndim == 1:
+        X = X[np.newaxis, :]
+    if X.ndim != 2:
+        raise ValueError(f"Väntade en vektor eller en (N, d)-array, fick formen {X.shape}")
+    return X
+
+
+def _block(antal: int, byte_per_rad: int):
+    """Radintervall (slice) där varje block ryms i BLOCK_BYTE."""
+    rader = max(1, BLOCK_BYTE // max(1, byte_per_rad))
+    for i in range(0, antal, rader):
+        yield slice(i, min(i + rader, antal))
+
+
+def _par(X, Y, dtype):
+    X = som_matris(X, dtype)
+    Y = som_matris(Y, X.dtype if dtype is None else dtype)
+    if X.shape[1] != Y.shape[1]:
+        raise ValueError(f"Olika dimension: {X.shape[1]} och {Y.shape[1]}. Samma dimension krävs")
+    if len(Y) not in (1, len(X)):
+        raise ValueError(f"{len(X)} och {len(Y)} vektorer går inte att para ihop")
+    return X, Y
+
+
+# ---------- Radvis: en vektor i taget, alla samtidigt ----------
+def normer(X, dtype=None) -> np.ndarray:
+    """||x|| för varje rad."""
+    X = som_matris(X, dtype)
+    ut = np.empty(len(X), dtype=X.dtype)
+    for rader in _block(len(X), X.shape[1] * X.itemsize):
+        B = X[rader]
+        np.sqrt(np.einsum("ij,ij->i", B, B), out=ut[rader])
+    return ut
+
+
+def skalarprodukter(X, Y, dtype=None) -> np.ndarray:
+    """x · y för varje par av rader (eller varje rad i X mot en enda vektor Y)."""
+    X, Y = _par(X, Y, dtype)
+    if len(Y) == 1:
+        return X @ Y[0]
+    return np.einsum("ij,ij->i", X, Y)
+
+
+def skillnader(X, Y, dtype=None) -> np.ndarray:
+    """x - y för varje par av rader (eller varje rad i X mot en enda vektor Y)."""
+    X, Y = _par(X, Y, dtype)
+    return X - Y
+
+
+def avstand(X, Y, dtype=None) -> np.ndarray:
+    """||x - y|| för varje par av rader (eller varje rad i X mot en enda vektor Y)."""
+    X, Y = _par(X, Y, dtype)
+    ut = np.empty(len(X), dtype=X.dtype)
+    for rader in _block(len(X), X.shape[1] * X.itemsize):
+        S = X[rader] - (Y if len(Y) == 1 else Y[rader])
+        np.sqrt(np.einsum("ij,ij->i", S, S), out=ut[rader])
+    return ut
+
+
+# ---------- Parvis: alla rader i X mot alla rader i Y ----------
+def avstandsblock(X, Y=None, dtype=None):
+    """
+    Ger (start, D) där D[k, j] = ||X[start + k] - Y[j]||, ett block av rader i
+    taget, så att hela (N, M)-matrisen aldrig behöver finnas i minnet.
+    Y=None betyder X mot sig själv.
+
+    Räknas som ||x||² + ||y||² - 2 x·y, så det tunga arbetet blir en
+    matrismultiplikation per block. Termerna tar nästan ut varandra när
+    vektorerna ligger långt från origo, vilket i float32 kan ge fel i
+    storleksordningen ||x||² · 1e-7. Därför flyttas först båda mängderna
+    så att Y:s medelpunkt hamnar i origo; avstånden ändras inte av det.
+    """
+    X = som_matris(X, dtype)
+    Y = X if Y is None else som_matris(Y, X.dtype)
+    if X.shape[1] != Y.shape[1]:
+        raise ValueError(f"Olika dimension: {X.shape[1]} och {Y.shape[1]}. Samma dimension krävs")
+    centrum = Y.mean(axis=0, dtype=np.float64).astype(X.dtype) if len(Y) else 0
+    Y = Y - centrum
+    yy = np.einsum("ij,ij->i", Y, Y)
+    # Anroparen har kvar föregående block medan nästa räknas: två block ska rymmas
+    for rader in _block(len(X), 2 * len(Y) * X.itemsize):
+        B = X[rader] - centrum
+        D = B @ Y.T
+        D *= -2
+        D += np.einsum("ij,ij->i", B, B)[:, np.newaxis]
+        D += yy
+        np.maximum(D, 0, out=D)  # avrundningsfel kan ge små negativa tal
+        np.sqrt(D, out=D)
+        yield rader.start, D
+
+
+def parvisa_avstand(X, Y=None, dtype=None, ut=None) -> np.ndarray:
+    """
+    (N, M)-matrisen med avståndet mellan varje rad i X och varje rad i Y
+    (Y=None: X mot sig själv). ut kan vara en färdig array, t.ex. en
+    np.memmap, när matrisen inte ryms i minnet.
+    """
+    X = som_matris(X, dtype)
+    M = len(X) if Y is None else len(som_matris(Y))
+    if ut is None:
+        storlek = len(X) * M * X.itemsize
+        if storlek > MAX_MATRIS_BYTE:
+            raise MemoryError(f"Avståndsmatrisen blir {storlek / 2**30:.1f} GiB. "
+                              "Ge en np.memmap som ut= eller använd avstandsblock()")
+        ut = np.empty((len(X), M), dtype=X.dtype)
+    for i, D in avstandsblock(X, Y, dtype):
+        ut[i:i + len(D)] = D
+    if Y is None:
+        np.fill_diagonal(ut, 0)
+    return ut
+
+
+def narmaste(X, Y=None, dtype=None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (index, avstånd) till den närmaste raden i Y för varje rad i X.
+    Y=None: närmaste andra rad i X. Minnet är begränsat till ett block.
+    Avståndet till den valda raden räknas om direkt som ||x - y||.
+    """
+    X = som_matris(X, dtype)
+    Ym = X if Y is None else som_matris(Y, X.dtype)
+    index = np.empty(len(X), dtype=np.int64)
+    for i, D in avstandsblock(X, Y, dtype):
+        if Y is None:
+            D[np.arange(len(D)), np.arange(i, i + len(D))] = np.inf  # inte sig själv
+        index[i:i + len(D)] = np.argmin(D, axis=1)
+    minsta = np.empty(len(X), dtype=X.dtype)
+    for rader in _block(len(X), X.shape[1] * X.itemsize):
+        minsta[rader] = normer(X[rader] - Ym[index[rader]])
+    if Y is None and len(X) == 1:
+        minsta[:] = np.inf  # ingen annan rad att jämföra med
+    return index, minsta
+
+
+# ---------- Matriser från Excel ----------
+CACHEKATALOG = ".matriscache"
+
+
+def _ar_tal(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _namn(v) -> str | None:
+    if isinstance(v, str) and v.strip(" =:\t"):
+        return v.strip(" =:\t")
+    return None
+
+
+def hitta_matriser(celler: list[list]) -> dict[str, np.ndarray]:
+    """
+    Hittar matrisblocken i ett blad (lista av rader med cellvärden, None för
+    tomma celler). Ett block är ett rektangulärt område av tal, avgränsat av
+    tomma celler (eller text). Namnet tas från texten direkt ovanför blocket
+    (eller direkt till vänster om det); block utan namn heter M1, M2, ...
+    """
+    rader = len(celler)
+    kolumner = max((len(r) for r in celler), default=0)
+    tal = np.zeros((rader, kolumner + 2), dtype=bool)  # tom kant på båda sidor
+    for i, rad in enumerate(celler):
+        tal[i, 1:len(rad) + 1] = [_ar_tal(v) for v in rad]
+
+    # Sträckor av tal i varje rad; en sträcka med samma kolumner som ett
+    # block som slutade på raden ovanför förlänger blocket nedåt
+    block, oppna = [], {}
+    for i in range(rader):
+        kanter = np.flatnonzero(np.diff(tal[i].view(np.int8)))
+        nya = {}
+        for vanster, hoger in zip(kanter[::2], kanter[1::2]):
+            b = oppna.get((vanster, hoger))
+            if b is None:
+                b = [i, int(vanster), i + 1, int(hoger)]
+                block.append(b)
+            b[2] = i + 1
+            nya[vanster, hoger] = b
+        oppna = nya
+
+    def cell(i, j):
+        return celler[i][j] if 0 <= i < rader and 0 <= j < len(celler[i]) else None
+
+    matriser = {}
+    for k, (topp, vanster, botten, hoger) in enumerate(sorted(map(tuple, block)), start=1):
+        namn = next((n for j in range(vanster, hoger) if (n := _namn(cell(topp - 1, j)))), None)
+        namn = namn or _namn(cell(topp, vanster - 1)) or f"M{k}"
+        if namn in matriser:
+            namn = f"{namn}_{k}"
+        matriser[namn] = np.array([celler[i][vanster:hoger] for i in range(topp, botten)], dtype=np.float64)
+    return matriser
+
+
+def _hash(sokvag: str) -> str:
+    h = hashlib.sha256()
+    with open(sokvag, "rb") as f:
+        for bit in iter(lambda: f.read(1 << 20), b""):
+            h.update(bit)
+    return h.hexdigest()
+
+
+def _cache(sokvag: str, blad: str | None, katalog: str) -> str:
+    nyckel = hashlib.sha256(f"{_hash(sokvag)}:{blad}".encode()).hexdigest()[:24]
+    return os.path.join(katalog, nyckel)
+
+
+def las_matriser(sokvag: str = file_path, blad: str | None = None,
+                 katalog: str | None = None) -> dict[str, np.ndarray]:
+    """
+    {namn: matris} för matrisblocken i bladet (None: första bladet). Läses
+    ur cachen bredvid arbetsboken (CACHEKATALOG) när filen inte ändrats;
+    matriserna är då skrivskyddade, minnesmappade arrayer.
+    """
+    katalog = katalog or os.path.join(os.path.dirname(os.path.abspath(sokvag)), CACHEKATALOG)
+    cache = _cache(sokvag, blad, katalog)
+    index = os.path.join(cache, "index.json")
+    if os.path.exists(index):
+        with open(index, encoding="utf-8") as f:
+            namn = json.load(f)
+        return {n: np.load(os.path.join(cache, f"{i}.npy"), mmap_mode="r") for i, n in enumerate(namn)}
+
+    from openpyxl import load_workbook
+    bok = load_workbook(sokvag, read_only=True, data_only=True)
+    try:
+        ark = bok[blad] if blad is not None else bok.worksheets[0]
+        celler = [list(rad) for rad in ark.iter_rows(values_only=True)]
+    finally:
+        bok.close()
+    matriser = hitta_matriser(celler)
 
-#L 
\ No newline at end of file
+    # Skrivs till en tillfällig katalog som byter namn när allt är på plats
+    tillfallig = f"{cache}.{os.getpid()}.tmp"
+    os.makedirs(tillfallig, exist_ok=True)
+    for i, m in enumerate(matriser.values()):
+        np.save(os.path.join(tillfallig, f"{i}.npy"), m)
+    with open(os.path.join(tillfallig, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(list(matriser), f, ensure_ascii=False)
+    try:
+        os.replace(tillfallig, cache)
+    except OSError:  # en annan process hann först
+        import shutil
+        shutil.rmtree(tillfallig, ignore_errors=True)
+    return matriser
@@ -0,0 +1,140 @@
+"""
+Inläsning av agent_data.csv (inlämningsuppgiften) med rätt datatyper direkt.
+
+Notebooken läste hela filen som object-kolumner, bytte namn med rename_map
+och konverterade sedan kolumn för kolumn enligt schema. Här ges namnbytet,
+datatyperna och tidsformatet till read_csv, så att varje kolumn tolkas en
+gång till sin slutliga typ, och bara de kolumner som efterfrågas läses:
+
+    df = las_agent_data("agent_data.csv")
+    df = las_agent_data("agent_data.csv", kolumner=["Timestamp", "Agent_Name", "Response_Time"])
+
+Den färdiga tabellen sparas som Parquet (kolumnvis, med datatyperna kvar)
+i CACHEKATALOG, märkt med SHA-256 av csv-filen och schemat. Nästa
+inläsning av samma fil läser bara de efterfrågade kolumnerna ur
+Parquet-filen; saknas någon läses csv-filen om och cachen utökas. Utan
+pyarrow läses csv-filen varje gång.
+
+    python agent_data.py agent_data.csv     # läser in och visar tid och minne
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+CACHEKATALOG = ".agentcache"
+TIDSFORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Kolumnnamn i filen -> namn i tabellen (som rename_map i notebooken)
+KOLUMNNAMN = {
+    "Prompt_ ID_": "Prompt_ID",
+    "Timestamp_": "Timestamp",
+    "Customer_ Name_": "Customer_Name",
+    "Customer_ Segment_": "Customer_Segment",
+    "City_": "City",
+    "Country_": "Country",
+    "Agent_ Name_": "Agent_Name",
+    "LLM_ Model_": "LLM_Model",
+    "Compute_ Cost_ EUR_": "Compute_Cost_EUR",
+    "Customer_ Price_ EUR_": "Customer_Price_EUR",
+    "Response_ Time_": "Response_Time",
+    "Use_ Case_": "Use_Case",
+    "Prompt_ Length_": "Prompt_Length",
+    "Access_ Method_": "Access_Method",
+}
+
+# Datatyper efter namnbytet. LLM_Model är text: kombinationerna av modeller
+# blev tusentals kategorier i notebooken. Heltalen är nullbara (Int32), så
+# att en tom cell blir <NA> i stället för att stoppa inläsningen.
+SCHEMA = {
+    "Prompt_ID": "string",
+    "Timestamp": "datetime64[ns]",
+    "Customer_Name": "category",
+    "Customer_Segment": "category",
+    "City": "category",
+    "Country": "category",
+    "Agent_Name": "category",
+    "LLM_Model": "string",
+    "Compute_Cost_EUR": "float32",
+    "Customer_Price_EUR": "float32",
+    "Response_Time": "Int32",
+    "Use_Case": "category",
+    "Prompt_Length": "Int32",
+    "Access_Method": "category",
+}
+
+_FILNAMN = {namn: fil for fil, namn in KOLUMNNAMN.items()}
+
+
+def _filhash(sokvag: str) -> str:
+    with open(sokvag, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _cachefil(sokvag: str, katalog: str) -> str:
+    nyckel = json.dumps([_filhash(sokvag), SCHEMA, KOLUMNNAMN], sort_keys=True)
+    return os.path.join(katalog, hashlib.sha256(nyckel.encode()).hexdigest()[:24] + ".parquet")
+
+
+def las_csv(sokvag: str, kolumner: list[str] | None = None) -> pd.DataFrame:
+    """Läser csv-filen med namn och datatyper satta redan vid tolkningen."""
+    kolumner = list(SCHEMA) if kolumner is None else kolumner
+    okanda = [k for k in kolumner if k not in _FILNAMN]
+    if okanda:
+        raise KeyError(f"Okända kolumner: {okanda}")
+    typer = {_FILNAMN[k]: SCHEMA[k] for k in kolumner if not SCHEMA[k].startswith("datetime")}
+    datum = [_FILNAMN[k] for k in kolumner if SCHEMA[k].startswith("datetime")]
+    df = pd.read_csv(sokvag, usecols=[_FILNAMN[k] for k in kolumner], dtype=typer,
+                     parse_dates=datum, date_format=TIDSFORMAT)
+    df = df.rename(columns=KOLUMNNAMN)[kolumner]
+    for k in kolumner:
+        # Rader som inte följer TIDSFORMAT: tolka som notebooken gjorde, ogiltiga blir NaT
+        if SCHEMA[k].startswith("datetime") and not pd.api.types.is_datetime64_any_dtype(df[k]):
+            df[k] = pd.to_datetime(df[k], errors="coerce")
+    return df
+
+
+def las_agent_data(sokvag: str, kolumner: list[str] | None = None,
+                   katalog: str | None = CACHEKATALOG) -> pd.DataFrame:
+    """
+    agent_data.csv som en typad tabell, via Parquet-cachen när filen är
+    oförändrad. katalog=None stänger av cachen.
+    """
+    kolumner = list(SCHEMA) if kolumner is None else list(kolumner)
+    try:
+        import pyarrow  # noqa: F401 (Parquet-motorn)
+    except ImportError:
+        katalog = None
+    if katalog is None:
+        return las_csv(sokvag, kolumner)
+
+    cache = _cachefil(sokvag, katalog)
+    if os.path.exists(cache):
+        import pyarrow.parquet as pq
+        sparade = pq.read_schema(cache).names
+        if set(kolumner) <= set(sparade):
+            return pd.read_parquet(cache, columns=kolumner)
+        # Cachen saknar några kolumner: läs dem och de redan sparade en gång till
+        kolumner_i_cache = [k for k in SCHEMA if k in sparade or k in kolumner]
+    else:
+        kolumner_i_cache = kolumner
+    df = las_csv(sokvag, kolumner_i_cache)
+    os.makedirs(katalog, exist_ok=True)
+    tillfallig = f"{cache}.{os.getpid()}.tmp"
+    df.to_parquet(tillfallig, index=False)
+    os.replace(tillfallig, cache)
+    return df[kolumner]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    t0 = time.perf_counter()
+    df = las_agent_data(sys.argv[1])
+    print(f"{len(df):,} rader på {time.perf_counter() - t0:.2f} s, "
+          f"{df.memory_usage(deep=True).sum() / 2**20:.1f} MiB i minnet")
+    df.info()
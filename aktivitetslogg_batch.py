@@ -0,0 +1,181 @@
+"""
+Icke-interaktiv bulkinläsning till Aktivitetslogg.
+
+Läser många sessioner från en CSV-fil (samma kolumner som
+aktivitetslogg_sessioner.csv; Guldkrav och summeringar räknas om), en
+JSON-lines-fil eller stdin, validerar dem som den interaktiva vägen och
+sparar de godkända i block via spara_sessioner. Avvisade rader skrivs till
+en sidofil med radnummer och felorsak.
+
+Kör via samma ingång som dialogen:
+    python Aktivitetslogg.py --batch pappersprotokoll.csv
+    python Aktivitetslogg.py --batch export.jsonl --avvisade fel.jsonl
+    cat export.jsonl | python Aktivitetslogg.py --batch - --format jsonl
+
+Serier anges som "43|32|39" (CSV) eller som lista/sträng (JSON). Datum
+(ÅÅÅÅ-MM-DD) och Tid (HH:MM:SS) är frivilliga och blir annars tidpunkten
+för inläsningen plus radnumret i sekunder, så att sessioner utan tidpunkt
+inte får samma Datum, Tid och Namn.
+"""
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime, timedelta
+
+from aktivitetslogg_poang import MAXPOANG, berakna_guldkrav
+from aktivitetslogg_lagring import DB_FIL, MASTER_FIL, SESSION_FIL, spara_sessioner
+
+BLOCKSTORLEK = 10_000  # sessioner per skrivtransaktion
+
+
+class Valideringsfel(ValueError):
+    pass
+
+
+def validera(rad: dict, datum: str, tid: str) -> tuple:
+    """
+    Samma regler som CLI/GUI: namn, plats och skjutledare ifyllda, ålder
+    heltal 1–120, vapenklass A eller C och varje serie ett heltal 0–50.
+    Datum och Tid, om de anges, ska vara ÅÅÅÅ-MM-DD och HH:MM:SS.
+    Returnerar en sessionstuple för spara_sessioner.
+    """
+    if not isinstance(rad, dict):
+        raise Valideringsfel("Raden är inte ett objekt.")
+    datum = _tidsfalt(rad.get("Datum"), datum, "%Y-%m-%d", "Datum måste vara ÅÅÅÅ-MM-DD.")
+    tid = _tidsfalt(rad.get("Tid"), tid, "%H:%M:%S", "Tid måste vara HH:MM:SS.")
+
+    namn = str(rad.get("Namn") or "").strip()
+    plats = str(rad.get("Plats") or "").strip()
+    skjutledare = str(rad.get("Skjutledare") or "").strip()
+    if not namn:
+        raise Valideringsfel("Namn saknas.")
+    if not plats:
+        raise Valideringsfel("Plats saknas.")
+    if not skjutledare:
+        raise Valideringsfel("Skjutledare saknas.")
+
+    try:
+        alder = int(str(rad.get("Ålder", "")).strip())
+    except ValueError:
+        raise Valideringsfel("Ålder måste vara ett heltal.") from None
+    if alder <= 0 or alder > 120:
+        raise Valideringsfel("Ogiltig ålder.")
+
+    vklass = str(rad.get("Vapenklass") or "").strip().upper()
+    if vklass not in {"A", "C"}:
+        raise Valideringsfel("Vapenklass måste vara A eller C.")
+
+    varde = rad.get("Serier")
+    delar = varde if isinstance(varde, list) else str(varde or "").split("|")
+    serier = []
+    for p in delar:
+        if isinstance(p, str):
+            p = p.strip()
+            if p == "":
+                continue
+            if not (p.isascii() and p.isdigit()):
+                raise Valideringsfel(f"Poäng måste vara heltal, inte {p!r}.")
+        elif isinstance(p, bool) or not isinstance(p, int):
+            # 40.7, true och null ska inte tyst bli 40, 1 eller ett TypeError
+            raise Valideringsfel(f"Poäng måste vara heltal, inte {json.dumps(p, default=str)}.")
+        serier.append(int(p))
+    if not serier:
+        raise Valideringsfel("Inga serier.")
+    if any(p < 0 or p > MAXPOANG for p in serier):
+        raise Valideringsfel(f"Poäng ska vara 0–{MAXPOANG}.")
+
+    return (datum, tid, namn, alder, plats,
+            skjutledare, vklass, berakna_guldkrav(vklass, alder), serier)
+
+
+def _tidsfalt(varde, standard: str, format: str, fel: str) -> str:
+    """Tolkar Datum/Tid med format och skriver tillbaka det på normal form."""
+    if varde is None or varde == "":
+        return standard
+    if not isinstance(varde, str):
+        raise Valideringsfel(fel)
+    try:
+        return datetime.strptime(varde.strip(), format).strftime(format)
+    except ValueError:
+        raise Valideringsfel(fel) from None
+
+
+def las_rader(f, format: str):
+    """Generator över (radnummer, dict) från en öppen textfil."""
+    if format == "jsonl":
+        for nr, rad in enumerate(f, start=1):
+            if not rad.strip():
+                continue
+            try:
+                yield nr, json.loads(rad)
+            except json.JSONDecodeError as e:
+                yield nr, {"_fel": f"Ogiltig JSON: {e}", "_text": rad.rstrip("\n")}
+    else:
+        # Rad 1 är rubriken
+        yield from enumerate(csv.DictReader(f), start=2)
+
+
+def importera(f, format: str, avvisade, master_fil: str = MASTER_FIL,
+              session_fil: str = SESSION_FIL, db_fil: str = DB_FIL,
+              blockstorlek: int = BLOCKSTORLEK) -> tuple[int, int, int]:
+    """
+    Läser, validerar och sparar. avvisade är en öppen textfil som får en
+    JSON-rad per avvisad indatarad. Returnerar (sessioner, serier, avvisade).
+    """
+    nu = datetime.now().replace(microsecond=0)
+
+    block = []
+    antal_sessioner = antal_serier = antal_avvisade = 0
+    for nr, rad in las_rader(f, format):
+        try:
+            if isinstance(rad, dict) and "_fel" in rad:
+                raise Valideringsfel(rad["_fel"])
+            standard = nu + timedelta(seconds=nr)
+            session = validera(rad, standard.strftime("%Y-%m-%d"), standard.strftime("%H:%M:%S"))
+        except (Valideringsfel, TypeError) as e:
+            # TypeError: ett värde av oväntad typ som reglerna ovan missat; raden avvisas
+            antal_avvisade += 1
+            data = rad.get("_text", rad) if isinstance(rad, dict) else rad
+            avvisade.write(json.dumps({"rad": nr, "fel": str(e), "data": data},
+                                      ensure_ascii=False, default=str) + "\n")
+            continue
+        block.append(session)
+        antal_serier += len(session[-1])
+        if len(block) >= blockstorlek:
+            spara_sessioner(block, master_fil, session_fil, db_fil)
+            antal_sessioner += len(block)
+            block = []
+    if block:
+        spara_sessioner(block, master_fil, session_fil, db_fil)
+        antal_sessioner += len(block)
+    return antal_sessioner, antal_serier, antal_avvisade
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(prog="Aktivitetslogg.py --batch",
+                                     description="Bulkinläsning av sessioner.")
+    parser.add_argument("--batch", metavar="FIL", required=True,
+                        help="CSV- eller JSON-lines-fil, '-' för stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl"],
+                        help="indataformat (annars gissat från filändelsen)")
+    parser.add_argument("--avvisade", metavar="FIL",
+                        help="sidofil för avvisade rader (standard: <indata>.avvisade.jsonl)")
+    args = parser.parse_args(argv)
+
+    format = args.format or ("jsonl" if args.batch.endswith((".jsonl", ".json")) else "csv")
+    avvisade_fil = args.avvisade or (
+        "avvisade.jsonl" if args.batch == "-" else args.batch + ".avvisade.jsonl"
+    )
+
+    with open(avvisade_fil, "w", encoding="utf-8") as avvisade:
+        if args.batch == "-":
+            sessioner, serier, fel = importera(sys.stdin, format, avvisade)
+        else:
+            with open(args.batch, newline="", encoding="utf-8") as f:
+                sessioner, serier, fel = importera(f, format, avvisade)
+
+    print(f"Sparade {sessioner} sessioner ({serier} serier) i '{MASTER_FIL}' och '{SESSION_FIL}'.")
+    if fel:
+        print(f"{fel} rader avvisades, se '{avvisade_fil}'.")
+    return 1 if fel else 0
@@ -0,0 +1,151 @@
+"""
+Historik för webbappen: sessionsfilen i minnet, förberäknad per skytt.
+
+Historik.uppdatera() jämför filens inod, storlek och mtime med förra
+gången. Är filen oförändrad görs ingenting. Annars jämförs ett
+fingeravtryck av filens början och av bytena före den lästa positionen:
+stämmer det läses bara den nya svansen, annars (filen har krympt, ersatts
+eller skrivits om, t.ex. efter 'reparera') läses den om från början.
+Trender, guldandelar och topplistor byggs av aggregaten och cachas per
+version, så en Streamlit-omkörning kostar bara en os.stat. Rader som inte
+går att tolka hoppas över och räknas i felaktiga (de första i fel), så att
+läspositionen aldrig fastnar på en trasig rad.
+"""
+import csv
+import io
+import os
+import threading
+
+import pandas as pd
+
+from aktivitetslogg_index import fingeravtryck
+
+SESSION_FIL = "aktivitetslogg_sessioner.csv"
+MAX_FEL = 20  # sparade felmeddelanden; felaktiga räknar alla
+
+
+class Skytt:
+    __slots__ = ("sessioner", "serier", "total", "guld", "basta_serie", "trend")
+
+    def __init__(self):
+        self.sessioner = self.serier = self.total = self.guld = self.basta_serie = 0
+        self.trend = []  # (Datum, Vapenklass, Snittpoäng, Guldandel) per session
+
+    def lagg_till(self, datum, vklass, serier, guldkrav):
+        antal = len(serier)
+        total = sum(serier)
+        guld = sum(1 for p in serier if p >= guldkrav)
+        self.sessioner += 1
+        self.serier += antal
+        self.total += total
+        self.guld += guld
+        self.basta_serie = max(self.basta_serie, max(serier, default=0))
+        if antal:
+            self.trend.append((datum, vklass, total / antal, guld / antal))
+
+
+class Historik:
+    def __init__(self, session_fil: str = SESSION_FIL):
+        self.session_fil = session_fil
+        self.version = 0
+        self._lock = threading.Lock()
+        self._nollstall()
+
+    def _nollstall(self):
+        self.skyttar: dict[str, Skytt] = {}
+        self._pos = 0
+        self._signatur = None
+        self._avtryck = None
+        self._cache = {}
+        self.felaktiga = 0  # rader som inte gick att tolka och hoppades över
+        self.fel: list[str] = []
+
+    def uppdatera(self) -> bool:
+        """Läser in det som tillkommit. Returnerar True om något ändrades."""
+        with self._lock:
+            try:
+                stat = os.stat(self.session_fil)
+            except FileNotFoundError:
+                if self._signatur is None:
+                    return False
+                self._nollstall()
+                self.version += 1
+                return True
+            signatur = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if signatur == self._signatur:
+                return False
+            if stat.st_size < self._pos or (self._signatur and self._signatur[0] != stat.st_ino):
+                self._nollstall()
+            self._las_svans()
+            self._signatur = signatur
+            self._cache = {}
+            self.version += 1
+            return True
+
+    def _las_svans(self):
+        with open(self.session_fil, "rb") as f:
+            if self._pos and fingeravtryck(f, self._pos) != self._avtryck:
+                self._nollstall()  # omskriven på samma inod
+            f.seek(self._pos)
+            data = f.read()
+            # Bara hela rader; en halvskriven sista rad tas nästa gång
+            slut = data.rfind(b"\n") + 1
+            self._avtryck = fingeravtryck(f, self._pos + slut)
+        for linje in data[:slut].splitlines(keepends=True):
+            start, self._pos = self._pos, self._pos + len(linje)  # framåt även om raden är trasig
+            if start == 0 or not linje.strip():
+                continue  # rubrikraden eller en tom rad
+            rad = next(csv.reader([linje.decode("utf-8", "replace")]), [])
+            try:
+                datum, namn, vklass, guldkrav, serier = rad[0], rad[2], rad[6], int(rad[7]), rad[12]
+                poang = [int(p) for p in serier.split("|") if p]
+            except (IndexError, ValueError) as e:
+                self.felaktiga += 1
+                if len(self.fel) < MAX_FEL:
+                    self.fel.append(f"Sessionsfilen, byte {start}: kan inte tolka {rad!r} ({e})")
+                continue
+            skytt = self.skyttar.get(namn)
+            if skytt is None:
+                skytt = self.skyttar[namn] = Skytt()
+            skytt.lagg_till(datum, vklass, poang, guldkrav)
+
+    # --------- Vyer (cachade per version) ----------
+    def _cachad(self, nyckel, bygg):
+        with self._lock:
+            if nyckel not in self._cache:
+                self._cache[nyckel] = bygg()
+            return self._cache[nyckel]
+
+    def namn(self) -> list[str]:
+        return self._cachad("namn", lambda: sorted(self.skyttar))
+
+    def skytt(self, namn: str) -> dict | None:
+        s = self.skyttar.get(namn)
+        if s is None or not s.serier:
+            return None
+        return {
+            "Sessioner": s.sessioner, "Serier": s.serier, "Totalpoäng": s.total,
+            "Snittpoäng": s.total / s.serier, "Guldserier": s.guld,
+            "Guldandel": s.guld / s.serier, "BästaSerie": s.basta_serie,
+        }
+
+    def trend(self, namn: str) -> pd.DataFrame:
+        def bygg():
+            s = self.skyttar.get(namn)
+            df = pd.DataFrame(s.trend if s else [],
+                              columns=["Datum", "Vapenklass", "Snittpoäng", "Guldandel"])
+            df["Datum"] = pd.to_datetime(df["Datum"])
+            return df
+        return self._cachad(("trend", namn), bygg)
+
+    def topplista(self, antal: int = 10, min_sessioner: int = 3) -> pd.DataFrame:
+        def bygg():
+            rader = [
+                (namn, s.sessioner, s.total / s.serier, s.guld / s.serier, s.basta_serie)
+                for namn, s in self.skyttar.items()
+                if s.sessioner >= min_sessioner and s.serier
+            ]
+            df = pd.DataFrame(rader, columns=["Namn", "Sessioner", "Snittpoäng",
+                                              "Guldandel", "BästaSerie"])
+            return df.nlargest(antal, "Snittpoäng").reset_index(drop=True)
+        return self._cachad(("topplista", antal, min_sessioner), bygg)
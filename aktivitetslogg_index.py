@@ -0,0 +1,290 @@
+"""
+Indexerade historikfrågor mot aktivitetslogg.csv.
+
+Indexet ligger i en egen SQLite-fil bredvid loggen. Varje session i
+masterfilen (serierna från ett sparande ligger alltid i följd) blir en rad
+med Datum, Tid, Namn, Plats, Skjutledare, Vapenklass och sessionens
+byte-intervall i CSV-filen. En fråga slår upp intervallen i indexet och
+läser bara de raderna ur CSV-filen.
+
+Indexet byggs på inkrementellt: det kommer ihåg hur långt i filen det har
+läst och läser bara den nya svansen vid nästa komplettera(). Tillsammans
+med positionen sparas filens inod och ett fingeravtryck av början och av
+bytena närmast före positionen; stämmer de inte längre har filen skrivits
+om och indexet byggs om från början.
+
+Exempel:
+    with Historikindex() as ix:
+        ix.komplettera()
+        rader = list(ix.sok(namn="Michael", plats="Singeshult",
+                            fran="2025-08-01", till="2025-08-31"))
+"""
+import csv
+import hashlib
+import io
+import os
+import sqlite3
+import sys
+
+from aktivitetslogg_poang import FALT_MASTER
+
+MASTER_FIL = "aktivitetslogg.csv"
+INDEX_FIL = "aktivitetslogg_index.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessioner (
+    id          INTEGER PRIMARY KEY,
+    datum       TEXT    NOT NULL,
+    tid         TEXT    NOT NULL,
+    namn        TEXT    NOT NULL,
+    plats       TEXT    NOT NULL,
+    skjutledare TEXT    NOT NULL,
+    vapenklass  TEXT    NOT NULL,
+    start       INTEGER NOT NULL,
+    slut        INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_datum       ON sessioner(datum);
+CREATE INDEX IF NOT EXISTS ix_namn        ON sessioner(namn, datum);
+CREATE INDEX IF NOT EXISTS ix_plats       ON sessioner(plats, datum);
+CREATE INDEX IF NOT EXISTS ix_skjutledare ON sessioner(skjutledare, datum);
+CREATE INDEX IF NOT EXISTS ix_vapenklass  ON sessioner(vapenklass, datum);
+CREATE TABLE IF NOT EXISTS status (
+    fil           TEXT PRIMARY KEY,
+    last_till     INTEGER NOT NULL,
+    inod          INTEGER,
+    fingeravtryck TEXT
+);
+"""
+
+FINGERAVTRYCK_BYTE = 4096
+
+# Filterargument -> kolumn i indexet
+FILTER = {
+    "namn": "namn",
+    "plats": "plats",
+    "skjutledare": "skjutledare",
+    "vapenklass": "vapenklass",
+}
+
+_I_DATUM, _I_TID, _I_NAMN = 0, 1, 2
+_I_PLATS, _I_LEDARE, _I_VKLASS = 4, 5, 6
+_I_SERIENR = 8
+
+
+def fingeravtryck(f, pos: int) -> str:
+    """
+    Hash av filens första och av de sista FINGERAVTRYCK_BYTE byten före pos.
+    Ändras den har det redan lästa skrivits om, även om filen inte krympt.
+    """
+    h = hashlib.sha1()
+    f.seek(0)
+    h.update(f.read(min(pos, FINGERAVTRYCK_BYTE)))
+    f.seek(max(0, pos - FINGERAVTRYCK_BYTE))
+    h.update(f.read(pos - f.tell()))
+    return h.hexdigest()
+
+
+class Historikindex:
+    def __init__(self, master_fil: str = MASTER_FIL, index_fil: str = INDEX_FIL):
+        self.master_fil = master_fil
+        self.con = sqlite3.connect(index_fil)
+        self.con.executescript(SCHEMA)
+        kolumner = {r[1] for r in self.con.execute("PRAGMA table_info(status)")}
+        if "fingeravtryck" not in kolumner:  # index från en äldre version
+            with self.con:
+                self.con.execute("ALTER TABLE status ADD COLUMN inod INTEGER")
+                self.con.execute("ALTER TABLE status ADD COLUMN fingeravtryck TEXT")
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --------- Uppbyggnad ----------
+    def _status(self) -> tuple:
+        rad = self.con.execute(
+            "SELECT last_till, inod, fingeravtryck FROM status WHERE fil = ?",
+            (os.path.abspath(self.master_fil),),
+        ).fetchone()
+        return rad if rad else (0, None, None)
+
+    def komplettera(self) -> int:
+        """
+        Indexerar det som tillkommit i masterfilen sedan förra gången.
+        Returnerar antal nya sessioner. Har filen krympt, bytt inod eller
+        fått nytt innehåll före den lästa positionen byggs indexet om från
+        början.
+        """
+        if not os.path.exists(self.master_fil):
+            return 0
+        pos, inod, avtryck = self._status()
+
+        nya = []
+        with open(self.master_fil, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if pos and (stat.st_size < pos or stat.st_ino != inod
+                        or fingeravtryck(f, pos) != avtryck):
+                pos = 0
+            if pos == 0:
+                self.con.execute("DELETE FROM sessioner")
+            f.seek(pos)
+            if pos == 0:
+                pos += len(f.readline())  # rubrikrad
+
+            aktuell = None  # [nyckel, datum, tid, namn, plats, ledare, vklass, start, slut]
+            for rad in f:
+                if not rad.endswith(b"\n"):
+                    break  # halvskriven rad från en pågående skrivning
+                falt = next(csv.reader([rad.decode("utf-8")]))
+                nyckel = (falt[_I_DATUM], falt[_I_TID], falt[_I_NAMN])
+                # SerieNr 1 börjar en ny session, även med samma Datum, Tid och Namn
+                if aktuell is None or aktuell[0] != nyckel or falt[_I_SERIENR] == "1":
+                    if aktuell is not None:
+                        nya.append(aktuell[1:])
+                    aktuell = [nyckel, falt[_I_DATUM], falt[_I_TID], falt[_I_NAMN],
+                               falt[_I_PLATS], falt[_I_LEDARE], falt[_I_VKLASS], pos, pos]
+                pos += len(rad)
+                aktuell[8] = pos
+            if aktuell is not None:
+                nya.append(aktuell[1:])
+            avtryck = fingeravtryck(f, pos)
+
+        with self.con:
+            self.con.executemany(
+                "INSERT INTO sessioner(datum, tid, namn, plats, skjutledare, vapenklass,"
+                " start, slut) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", nya
+            )
+            self.con.execute(
+                "INSERT OR REPLACE INTO status(fil, last_till, inod, fingeravtryck)"
+                " VALUES (?, ?, ?, ?)",
+                (os.path.abspath(self.master_fil), pos, stat.st_ino, avtryck),
+            )
+        return len(nya)
+
+    def bygg_om(self) -> int:
+        with self.con:
+            self.con.execute("DELETE FROM sessioner")
+            self.con.execute("DELETE FROM status")
+        return self.komplettera()
+
+    # --------- Frågor ----------
+    @staticmethod
+    def _villkor(fran, till, prefix, filter) -> tuple[str, list]:
+        villkor, args = [], []
+        for arg, varde in filter.items():
+            if arg not in FILTER:
+                raise TypeError(f"Okänt filter: {arg}")
+            if varde is None:
+                continue
+            if prefix:
+                # Intervall i stället för LIKE så att indexet kan användas
+                villkor.append(f"{FILTER[arg]} >= ? AND {FILTER[arg]} < ?")
+                args += [varde, varde + "\U0010ffff"]
+            else:
+                villkor.append(f"{FILTER[arg]} = ?")
+                args.append(varde)
+        if fran is not None:
+            villkor.append("datum >= ?")
+            args.append(fran)
+        if till is not None:
+            villkor.append("datum <= ?")
+            args.append(till)
+        return (" WHERE " + " AND ".join(villkor) if villkor else ""), args
+
+    def _intervall(self, fran=None, till=None, **filter):
+        where, args = self._villkor(fran, till, False, filter)
+        return self.con.execute(f"SELECT start, slut FROM sessioner{where} ORDER BY start", args).fetchall()
+
+    def antal_sessioner(self, fran=None, till=None, prefix=False, **filter) -> int:
+        where, args = self._villkor(fran, till, prefix, filter)
+        return self.con.execute(f"SELECT count(*) FROM sessioner{where}", args).fetchone()[0]
+
+    def sida(self, forsta: int, antal: int, fran=None, till=None, prefix=False,
+             **filter) -> list[dict]:
+        """
+        Sessionerna forsta..forsta+antal bland träffarna, nyast först, för
+        sidvis visning. Bara de sessionernas rader läses ur masterfilen.
+        prefix=True matchar början av namn, plats osv. i stället för exakt.
+        """
+        where, args = self._villkor(fran, till, prefix, filter)
+        rader = self.con.execute(
+            "SELECT datum, tid, namn, plats, skjutledare, vapenklass, start, slut"
+            f" FROM sessioner{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+            args + [antal, forsta],
+        ).fetchall()
+        sessioner = []
+        with open(self.master_fil, "rb") as f:
+            for datum, tid, namn, plats, ledare, vklass, start, slut in rader:
+                f.seek(start)
+                data = f.read(slut - start).decode("utf-8")
+                serierader = list(csv.reader(io.StringIO(data, newline="")))
+                sessioner.append({
+                    "Datum": datum, "Tid": tid, "Namn": namn, "Plats": plats,
+                    "Skjutledare": ledare, "Vapenklass": vklass,
+                    "Guldkrav": int(serierader[0][7]) if serierader else 0,
+                    "Serier": [int(r[9]) for r in serierader],
+                })
+        return sessioner
+
+    def sok(self, fran=None, till=None, **filter):
+        """
+        Generator över masterrader (dictar som FALT_MASTER) som matchar.
+        Filter: namn, plats, skjutledare, vapenklass (exakt) samt
+        fran/till på Datum (ÅÅÅÅ-MM-DD, inklusive).
+        """
+        intervall = self._intervall(fran, till, **filter)
+        if not intervall:
+            return
+        with open(self.master_fil, "rb") as f:
+            for start, slut in _sla_ihop(intervall):
+                f.seek(start)
+                data = f.read(slut - start).decode("utf-8")
+                yield from csv.DictReader(io.StringIO(data, newline=""), fieldnames=FALT_MASTER)
+
+
+def _sla_ihop(intervall):
+    """Slår ihop angränsande byte-intervall så att de läses i ett svep."""
+    start, slut = intervall[0]
+    for s, e in intervall[1:]:
+        if s == slut:
+            slut = e
+        else:
+            yield start, slut
+            start, slut = s, e
+    yield start, slut
+
+
+def sok_fullskanning(master_fil: str = MASTER_FIL, fran=None, till=None, **filter):
+    """Samma fråga som Historikindex.sok men genom att läsa hela filen."""
+    for arg in filter:
+        if arg not in FILTER:
+            raise TypeError(f"Okänt filter: {arg}")
+    villkor = {k.capitalize(): v for k, v in filter.items() if v is not None}
+    with open(master_fil, newline="", encoding="utf-8") as f:
+        for rad in csv.DictReader(f):
+            if fran is not None and rad["Datum"] < fran:
+                continue
+            if till is not None and rad["Datum"] > till:
+                continue
+            if all(rad[k] == v for k, v in villkor.items()):
+                yield rad
+
+
+def komplettera_om_finns(master_fil: str = MASTER_FIL, index_fil: str = INDEX_FIL):
+    """Anropas från skrivvägen: håller indexet à jour om det har skapats."""
+    if os.path.exists(index_fil):
+        with Historikindex(master_fil, index_fil) as ix:
+            ix.komplettera()
+
+
+if __name__ == "__main__":
+    with Historikindex() as ix:
+        if sys.argv[1:2] == ["bygg"]:
+            print(f"Indexerade {ix.bygg_om()} sessioner i '{INDEX_FIL}'.")
+        else:
+            print(__doc__)
+            sys.exit(1)
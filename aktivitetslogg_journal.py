@@ -0,0 +1,122 @@
+"""
+Kraschsäker, låst skrivning till flera loggfiler på en gång.
+
+Flera CLI-/GUI-instanser kan skriva till samma aktivitetslogg.csv och
+aktivitetslogg_sessioner.csv (t.ex. på en delad disk vid tävling). En
+skrivning går till så här:
+
+1. Ta ett exklusivt lås på en låsfil bredvid loggen.
+2. Har en tidigare skrivning kraschat finns en journal kvar; spela upp den.
+3. Skriv alla filers nya rader, plus filstorlekarna före skrivningen, till
+   journalen och fsync:a den.
+4. Lägg till raderna i filerna (kapa först till storleken i journalen så att
+   en halvskriven rad från en krasch försvinner) och fsync:a.
+5. Töm journalen och släpp låset.
+
+En krasch före steg 3 är klar lämnar filerna orörda; en krasch efter
+spelas upp av nästa skrivare eller vid start. Uppspelning är idempotent.
+"""
+import json
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _las(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            time.sleep(0.05)
+
+def _las_upp(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _fsync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+def _applicera(fil: str, storlek: int, data: bytes):
+    with open(fil, "r+b" if os.path.exists(fil) else "w+b") as f:
+        f.truncate(storlek)
+        f.seek(storlek)
+        f.write(data)
+        _fsync(f)
+
+
+class Journal:
+    """
+    Lås + journal för en grupp loggfiler.
+
+        with Journal("aktivitetslogg.csv") as j:
+            j.skriv([(fil, rubrik, rader), ...])
+
+    rubrik skrivs bara om filen är tom. Allt inom with-blocket sker under
+    låset, så anroparen kan uppdatera index o.d. i samma ordning som filerna.
+    """
+
+    def __init__(self, bas_fil: str):
+        self.las_fil = bas_fil + ".lock"
+        self.journal_fil = bas_fil + ".journal"
+        self._f = None
+        self.aterstalld = False
+
+    def __enter__(self):
+        self._f = open(self.las_fil, "a+b")
+        _las(self._f)
+        self.aterstalld = self.aterstall()
+        return self
+
+    def __exit__(self, *exc):
+        _las_upp(self._f)
+        self._f.close()
+        self._f = None
+
+    def aterstall(self) -> bool:
+        """Spelar upp en kvarlämnad journal. Returnerar True om något gjordes."""
+        if not os.path.exists(self.journal_fil):
+            return False
+        with open(self.journal_fil, "rb") as f:
+            innehall = f.read()
+        uppspelad = False
+        if innehall.endswith(b"\n"):  # annars kraschade vi innan journalen var klar
+            for post in json.loads(innehall):
+                _applicera(post["fil"], post["storlek"], post["data"].encode("utf-8"))
+            uppspelad = True
+        self._tom_journal()
+        return uppspelad
+
+    def _tom_journal(self):
+        with open(self.journal_fil, "wb") as f:
+            _fsync(f)
+
+    def skriv(self, poster):
+        """poster: lista av (fil, rubrik, rader) där rubrik och rader är str."""
+        if self._f is None:
+            raise RuntimeError("Journal.skriv måste anropas inom 'with Journal(...)'.")
+        journal = []
+        for fil, rubrik, rader in poster:
+            storlek = os.path.getsize(fil) if os.path.exists(fil) else 0
+            data = rader if storlek else rubrik + rader
+            journal.append({"fil": fil, "storlek": storlek, "data": data})
+
+        with open(self.journal_fil, "wb") as f:
+            f.write(json.dumps(journal, ensure_ascii=False).encode("utf-8") + b"\n")
+            _fsync(f)
+        for post in journal:
+            _applicera(post["fil"], post["storlek"], post["data"].encode("utf-8"))
+        self._tom_journal()
@@ -0,0 +1,271 @@
+"""
+Parallell konsistenskontroll och kompaktering av masterfil mot sessionsfil.
+
+Båda filerna delas upp i byte-intervall (på radgränser) som tolkas i en
+processpool. Ur masterfilens serierader räknas AntalSerier, Totalpoäng,
+Snittpoäng och Guldserier om och jämförs med sessionsfilen; dessutom
+kontrolleras GuldSerie-flaggan på varje serierad. Rader som inte går att
+tolka och sessioner med samma Datum, Tid och Namn som en tidigare
+rapporteras som avvikelser i stället för att avbryta kontrollen.
+
+Kommandorad:
+    python aktivitetslogg_kontroll.py kontrollera          # rapportera
+    python aktivitetslogg_kontroll.py reparera             # skriv om båda filerna
+    python aktivitetslogg_kontroll.py session-fran-master  # återskapa sessionsfilen
+    python aktivitetslogg_kontroll.py master-fran-session  # återskapa masterfilen
+    ... [--processer N]
+
+'reparera' skriver om båda filerna från föreningen av sessionerna:
+masterfilens serierader gäller där de finns, annars sessionsfilens Serier.
+Dubbletter försvinner och summeringar räknas om. Har en fil som används
+som källa rader som inte går att tolka avbryts omskrivningen innan något
+skrivs, så att de inte försvinner.
+"""
+import argparse
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from aktivitetslogg_index import INDEX_FIL, Historikindex
+from aktivitetslogg_journal import Journal
+from aktivitetslogg_lagring import MASTER_FIL, SESSION_FIL
+from aktivitetslogg_poang import FALT_MASTER, FALT_SESSION, build_master_rows, build_session_row
+from aktivitetslogg_statistik import STATISTIK_FIL, Statistik
+
+CHUNK_BYTES = 32 * 1024 * 1024
+
+
+def byte_intervall(fil: str, chunk_bytes: int = CHUNK_BYTES) -> list[tuple[int, int]]:
+    """Delar filen (utom rubrikraden) i intervall som börjar och slutar på radgräns."""
+    if not os.path.exists(fil):
+        return []
+    storlek = os.path.getsize(fil)
+    intervall = []
+    with open(fil, "rb") as f:
+        start = len(f.readline())
+        while start < storlek:
+            f.seek(min(start + chunk_bytes, storlek))
+            f.readline()
+            slut = min(f.tell(), storlek)
+            intervall.append((start, slut))
+            start = slut
+    return intervall
+
+
+def _las_intervall(fil: str, start: int, slut: int):
+    with open(fil, "rb") as f:
+        f.seek(start)
+        data = f.read(slut - start).decode("utf-8")
+    return csv.reader(io.StringIO(data, newline=""))
+
+
+def _meta(rad) -> tuple:
+    return (rad[0], rad[1], rad[2], int(rad[3]), rad[4], rad[5], rad[6], int(rad[7]))
+
+
+def _tolka_master(args):
+    """
+    Worker: sessionerna i ett intervall av masterfilen, i filordning, som
+    [nyckel, meta, serier, börjar] där börjar säger om första raden har
+    SerieNr 1. En rad som inte går att tolka hoppas över och rapporteras.
+    """
+    fil, start, slut = args
+    sessioner, flaggfel, tolkfel = [], [], []
+    for rad in _las_intervall(fil, start, slut):
+        try:
+            nyckel = (rad[0], rad[1], rad[2])
+            meta, poang, serienr = _meta(rad), int(rad[9]), rad[8]
+            guld = rad[10]
+        except (IndexError, ValueError) as e:
+            tolkfel.append(f"Masterfilen, byte {start}–{slut}: kan inte tolka {rad!r} ({e})")
+            continue
+        if not sessioner or sessioner[-1][0] != nyckel or serienr == "1":
+            sessioner.append([nyckel, meta, [], serienr == "1"])
+        sessioner[-1][2].append(poang)
+        if (poang >= meta[7]) != (guld == "Ja"):
+            flaggfel.append(f"{nyckel} serie {serienr}: GuldSerie={guld} men Poäng={poang}, Guldkrav={meta[7]}")
+    return sessioner, flaggfel, tolkfel
+
+
+def _serier(rad) -> list[int]:
+    return [int(p) for p in rad[12].split("|") if p]
+
+
+def _tolka_session(args):
+    """
+    Worker: sessionsrader i ett intervall av sessionsfilen. Rader med fel
+    antal fält eller som inte går att tolka hoppas över och rapporteras.
+    """
+    fil, start, slut = args
+    rader, tolkfel = [], []
+    for rad in _las_intervall(fil, start, slut):
+        try:
+            if len(rad) != len(FALT_SESSION):
+                raise ValueError(f"{len(rad)} fält i stället för {len(FALT_SESSION)}")
+            _meta(rad), _serier(rad)
+        except ValueError as e:
+            tolkfel.append(f"Sessionsfilen, byte {start}–{slut}: kan inte tolka {rad!r} ({e})")
+            continue
+        rader.append(rad)
+    return rader, tolkfel
+
+
+def las_bada(master_fil: str, session_fil: str, processer: int | None = None,
+             chunk_bytes: int = CHUNK_BYTES):
+    """
+    Tolkar båda filerna parallellt. Returnerar (master, sessionsrader,
+    avvikelser, tolkfel) där master är {nyckel: (meta, serier)} i filordning
+    och sessionsrader är listor med fälten i FALT_SESSION-ordning.
+    avvikelser gäller GuldSerie-flaggor och sessioner med samma Datum, Tid
+    och Namn som en tidigare (bara den första behålls); tolkfel är
+    {"master": [...], "session": [...]} med rader som inte gick att tolka
+    och därför inte finns med i master eller sessionsrader.
+    """
+    master, avvikelser, sessionsrader = {}, [], []
+    tolkfel = {"master": [], "session": []}
+    forra, behall = None, False
+    with ProcessPoolExecutor(processer) as pool:
+        jobb_m = pool.map(_tolka_master, [(master_fil, s, e) for s, e in byte_intervall(master_fil, chunk_bytes)])
+        jobb_s = pool.map(_tolka_session, [(session_fil, s, e) for s, e in byte_intervall(session_fil, chunk_bytes)])
+        # En session kan delas av en intervallgräns; då fortsätter den i nästa block
+        for sessioner, flaggfel, olasbara in jobb_m:
+            for nyckel, meta, serier, borjar in sessioner:
+                if not borjar and nyckel == forra:
+                    if behall:
+                        master[nyckel][1].extend(serier)
+                    continue
+                forra, behall = nyckel, nyckel not in master
+                if behall:
+                    master[nyckel] = (meta, serier)
+                else:
+                    avvikelser.append(f"{nyckel}: dubblett i masterfilen")
+            avvikelser.extend(flaggfel)
+            tolkfel["master"].extend(olasbara)
+        for rader, olasbara in jobb_s:
+            sessionsrader.extend(rader)
+            tolkfel["session"].extend(olasbara)
+    return master, sessionsrader, avvikelser, tolkfel
+
+
+def jamfor(master: dict, sessionsrader: list) -> list[str]:
+    fel = []
+    sedda = set()
+    for rad in sessionsrader:
+        nyckel = (rad[0], rad[1], rad[2])
+        if nyckel in sedda:
+            fel.append(f"{nyckel}: dubblett i sessionsfilen")
+            continue
+        sedda.add(nyckel)
+        if nyckel not in master:
+            fel.append(f"{nyckel}: saknas i masterfilen")
+            continue
+        meta, serier = master[nyckel]
+        facit = build_session_row(*meta, serier)
+        lagrat = dict(zip(FALT_SESSION, rad))
+        for falt in ("Ålder", "Plats", "Skjutledare", "Vapenklass", "Guldkrav",
+                     "AntalSerier", "Totalpoäng", "Snittpoäng", "Guldserier", "Serier"):
+            if str(facit[falt]) != lagrat[falt]:
+                fel.append(f"{nyckel}: {falt} är {lagrat[falt]!r}, masterfilen ger {facit[falt]!r}")
+    for nyckel in master.keys() - sedda:
+        fel.append(f"{nyckel}: saknas i sessionsfilen")
+    return fel
+
+
+def kontrollera(master_fil: str = MASTER_FIL, session_fil: str = SESSION_FIL,
+                processer: int | None = None) -> list[str]:
+    master, sessionsrader, avvikelser, tolkfel = las_bada(master_fil, session_fil, processer)
+    return tolkfel["master"] + tolkfel["session"] + avvikelser + jamfor(master, sessionsrader)
+
+
+# ---------- Återskapa / reparera ----------
+def _sessioner_fran_sessionsfil(sessionsrader):
+    for rad in sessionsrader:
+        yield (rad[0], rad[1], rad[2]), (_meta(rad), _serier(rad))
+
+
+def _skriv_om(fil: str, falt: list[str], rader):
+    tmp = fil + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=falt)
+        w.writeheader()
+        w.writerows(rader)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, fil)
+
+
+def skriv_filer(sessioner: dict, master_fil: str | None, session_fil: str | None):
+    """Skriver om master- och/eller sessionsfilen ur {nyckel: (meta, serier)}."""
+    ordnade = sorted(sessioner.values(), key=lambda s: (s[0][0], s[0][1], s[0][2]))
+    if master_fil:
+        _skriv_om(master_fil, FALT_MASTER,
+                  (r for meta, serier in ordnade for r in build_master_rows(*meta, serier)))
+    if session_fil:
+        _skriv_om(session_fil, FALT_SESSION,
+                  (build_session_row(*meta, serier) for meta, serier in ordnade))
+
+
+def _bygg_om_harledda(master_fil: str, session_fil: str):
+    if os.path.exists(INDEX_FIL):
+        with Historikindex(master_fil, INDEX_FIL) as ix:
+            ix.bygg_om()
+    if os.path.exists(STATISTIK_FIL):
+        with Statistik(STATISTIK_FIL) as stat:
+            stat.bygg_om(session_fil)
+
+
+def regenerera(kalla: str, master_fil: str = MASTER_FIL, session_fil: str = SESSION_FIL,
+               processer: int | None = None) -> int:
+    """
+    kalla: "master" (återskapa sessionsfilen), "session" (återskapa
+    masterfilen) eller "bada" (reparera: förening av båda, master gäller).
+    Körs under skrivlåset. Returnerar antal sessioner. Rader i källan som
+    inte går att tolka skulle försvinna vid omskrivningen, så då avbryts
+    den med ValueError innan något skrivs.
+    """
+    with Journal(master_fil):
+        master, sessionsrader, _, tolkfel = las_bada(master_fil, session_fil, processer)
+        # Källorna som används får inte ha rader som skulle försvinna vid omskrivningen
+        kallor = {"master": ["master"], "session": ["session"], "bada": ["master", "session"]}
+        if kalla not in kallor:
+            raise ValueError(f"Okänd källa: {kalla}")
+        olasbara = [f for k in kallor[kalla] for f in tolkfel[k]]
+        if olasbara:
+            raise ValueError("Rader som inte går att tolka, rätta dem först:\n" + "\n".join(olasbara[:10]))
+        if kalla == "master":
+            sessioner = master
+            skriv_filer(sessioner, None, session_fil)
+        elif kalla == "session":
+            sessioner = dict(_sessioner_fran_sessionsfil(sessionsrader))
+            skriv_filer(sessioner, master_fil, None)
+        else:
+            sessioner = dict(_sessioner_fran_sessionsfil(sessionsrader))
+            sessioner.update(master)
+            skriv_filer(sessioner, master_fil, session_fil)
+        _bygg_om_harledda(master_fil, session_fil)
+    return len(sessioner)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kontroll av aktivitetsloggarna.")
+    parser.add_argument("kommando", choices=["kontrollera", "reparera",
+                                             "session-fran-master", "master-fran-session"])
+    parser.add_argument("--processer", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.kommando == "kontrollera":
+        fel = kontrollera(processer=args.processer)
+        for f in fel:
+            print(f)
+        print("OK" if not fel else f"{len(fel)} avvikelser.")
+        raise SystemExit(1 if fel else 0)
+
+    kalla = {"reparera": "bada", "session-fran-master": "master",
+             "master-fran-session": "session"}[args.kommando]
+    try:
+        n = regenerera(kalla, processer=args.processer)
+    except ValueError as e:
+        print(e)
+        raise SystemExit(1)
+    print(f"Skrev om {n} sessioner.")
@@ -0,0 +1,285 @@
+"""
+Kompakt lagring av Aktivitetslogg i SQLite.
+
+En rad per session i stället för en rad per serie: grunddata lagras en gång
+och serierna packas som en BLOB med en byte per serie (0–50 ryms i uint8).
+Ur databasen kan masterfilen (per serie) och sessionsfilen återskapas när
+som helst.
+
+CSV-filerna är fortfarande primära: index, statistik, kontroll och historik
+läser dem, och spara_sessioner skriver dem som förut. Databasen är en extra
+kopia som hålls i takt med dem och som gör det snabbt att läsa hela
+historiken (Lagring.las_allt). Den ersätter alltså inte CSV-filerna på disk.
+
+Kommandorad:
+    python aktivitetslogg_lagring.py migrera    # CSV -> databas (en gång)
+    python aktivitetslogg_lagring.py exportera  # databas -> CSV-vyer
+"""
+import csv
+import io
+import os
+import sqlite3
+import sys
+
+import numpy as np
+
+from aktivitetslogg_index import komplettera_om_finns
+from aktivitetslogg_journal import Journal
+from aktivitetslogg_statistik import uppdatera_om_finns
+from aktivitetslogg_poang import (
+    FALT_MASTER, FALT_SESSION, build_master_rows, build_session_row,
+)
+
+MASTER_FIL = "aktivitetslogg.csv"
+SESSION_FIL = "aktivitetslogg_sessioner.csv"
+DB_FIL = "aktivitetslogg.db"
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS namn (
+    id   INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS sessioner (
+    id          INTEGER PRIMARY KEY,
+    datum       TEXT    NOT NULL,
+    tid         TEXT    NOT NULL,
+    namn_id     INTEGER NOT NULL REFERENCES namn(id),
+    alder       INTEGER NOT NULL,
+    plats_id    INTEGER NOT NULL REFERENCES namn(id),
+    ledare_id   INTEGER NOT NULL REFERENCES namn(id),
+    vapenklass  TEXT    NOT NULL,
+    guldkrav    INTEGER NOT NULL,
+    serier      BLOB    NOT NULL
+);
+"""
+
+# Namn, plats och skjutledare återkommer i nästan varje session, så de
+# lagras en gång i en gemensam strängtabell och refereras med id.
+_SELECT = """
+SELECT s.id, s.datum, s.tid, n.text, s.alder, p.text, l.text,
+       s.vapenklass, s.guldkrav, s.serier
+FROM sessioner s
+JOIN namn n ON n.id = s.namn_id
+JOIN namn p ON p.id = s.plats_id
+JOIN namn l ON l.id = s.ledare_id
+"""
+
+
+def packa_serier(serier) -> bytes:
+    return np.asarray(serier, dtype=np.uint8).tobytes()
+
+def packa_upp_serier(blob) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.uint8)
+
+
+class Lagring:
+    def __init__(self, sokvag: str = DB_FIL):
+        self.sokvag = sokvag
+        self.con = sqlite3.connect(sokvag)
+        self.con.executescript(SCHEMA)
+        self._namn_cache: dict[str, int] = {}
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --------- Skrivning ----------
+    def _namn_id(self, text: str) -> int:
+        i = self._namn_cache.get(text)
+        if i is None:
+            self.con.execute("INSERT OR IGNORE INTO namn(text) VALUES (?)", (text,))
+            i = self.con.execute("SELECT id FROM namn WHERE text = ?", (text,)).fetchone()[0]
+            self._namn_cache[text] = i
+        return i
+
+    def _insert(self, datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav, serier) -> int:
+        cur = self.con.execute(
+            "INSERT INTO sessioner(datum, tid, namn_id, alder, plats_id, ledare_id,"
+            " vapenklass, guldkrav, serier) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (datum, tid, self._namn_id(namn), int(alder), self._namn_id(plats),
+             self._namn_id(skjutledare), vklass, int(guldkrav), packa_serier(serier)),
+        )
+        return cur.lastrowid
+
+    def lagg_till(self, datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav, serier) -> int:
+        """Lägger till en session och returnerar dess id."""
+        with self.con:
+            return self._insert(datum, tid, namn, alder, plats, skjutledare,
+                                vklass, guldkrav, serier)
+
+    def lagg_till_manga(self, sessioner) -> int:
+        """sessioner: iterable av (datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav, serier)."""
+        n = 0
+        with self.con:
+            for s in sessioner:
+                self._insert(*s)
+                n += 1
+        return n
+
+    # --------- Läsning ----------
+    def sessioner(self):
+        """Generator över (id, meta-tuple, serier som uint8-array)."""
+        for rad in self.con.execute(_SELECT + " ORDER BY s.id"):
+            yield rad[0], rad[1:9], packa_upp_serier(rad[9])
+
+    def session_rader(self):
+        for _, meta, serier in self.sessioner():
+            yield build_session_row(*meta, serier.tolist())
+
+    def master_rader(self):
+        for _, meta, serier in self.sessioner():
+            yield from build_master_rows(*meta, serier.tolist())
+
+    def las_allt(self) -> dict:
+        """
+        Hela historiken som NumPy-arrayer, redo för poangsatt().
+        Per session: "AntalSerier", "Ålder", "Vapenklass"; per serie: "Poäng".
+        """
+        rader = self.con.execute(
+            "SELECT alder, vapenklass, serier FROM sessioner ORDER BY id"
+        ).fetchall()
+        blobs = [r[2] for r in rader]
+        return {
+            "Poäng": packa_upp_serier(b"".join(blobs)),
+            "AntalSerier": np.fromiter((len(b) for b in blobs), dtype=np.intp, count=len(blobs)),
+            "Ålder": np.fromiter((r[0] for r in rader), dtype=np.int16, count=len(rader)),
+            "Vapenklass": np.array([r[1] for r in rader], dtype="U1"),
+        }
+
+    def antal_sessioner(self) -> int:
+        return self.con.execute("SELECT COUNT(*) FROM sessioner").fetchone()[0]
+
+    # --------- CSV-vyer ----------
+    def exportera_csv(self, master_fil: str = MASTER_FIL, session_fil: str = SESSION_FIL):
+        with open(master_fil, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=FALT_MASTER)
+            w.writeheader()
+            w.writerows(self.master_rader())
+        with open(session_fil, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=FALT_SESSION)
+            w.writeheader()
+            w.writerows(self.session_rader())
+
+
+# ---------- Migrering ----------
+def _meta(rad) -> tuple:
+    return (rad["Datum"], rad["Tid"], rad["Namn"], int(rad["Ålder"]), rad["Plats"],
+            rad["Skjutledare"], rad["Vapenklass"], int(rad["Guldkrav"]))
+
+def las_csv_sessioner(master_fil: str = MASTER_FIL, session_fil: str = SESSION_FIL):
+    """
+    Läser befintliga CSV-filer till (meta..., serier)-tuples. Sessionsfilen
+    används i första hand; sessioner som bara finns i masterfilen byggs upp
+    från dess rader (grupperade på Datum, Tid och Namn).
+    """
+    sessioner = {}
+    if os.path.exists(master_fil):
+        with open(master_fil, newline="", encoding="utf-8") as f:
+            for rad in csv.DictReader(f):
+                nyckel = (rad["Datum"], rad["Tid"], rad["Namn"])
+                if nyckel not in sessioner:
+                    sessioner[nyckel] = (_meta(rad), [])
+                sessioner[nyckel][1].append(int(rad["Poäng"]))
+
+    if os.path.exists(session_fil):
+        with open(session_fil, newline="", encoding="utf-8") as f:
+            for rad in csv.DictReader(f):
+                serier = [int(p) for p in rad["Serier"].split("|") if p]
+                sessioner[(rad["Datum"], rad["Tid"], rad["Namn"])] = (_meta(rad), serier)
+
+    for meta, serier in sessioner.values():
+        yield (*meta, serier)
+
+def migrera(master_fil: str = MASTER_FIL, session_fil: str = SESSION_FIL,
+            db_fil: str = DB_FIL) -> int:
+    """
+    Bygger databasen i en temporär fil som byter namn till db_fil först när
+    allt är skrivet. Avbryts migreringen finns ingen halvfärdig databas kvar
+    och den kan köras om.
+    """
+    if os.path.exists(db_fil):
+        raise FileExistsError(f"'{db_fil}' finns redan, migrering görs bara en gång.")
+    tmp = f"{db_fil}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)  # rester från en avbruten migrering
+    try:
+        with Lagring(tmp) as lagring:
+            n = lagring.lagg_till_manga(las_csv_sessioner(master_fil, session_fil))
+        os.replace(tmp, db_fil)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return n
+
+
+# ---------- Gemensam skrivväg ----------
+def csv_text(fieldnames, rows, rubrik: bool = False) -> str:
+    buff = io.StringIO()
+    w = csv.DictWriter(buff, fieldnames=fieldnames)
+    if rubrik:
+        w.writeheader()
+    w.writerows(rows)
+    return buff.getvalue()
+
+def spara_session(datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav, serier,
+                  master_fil: str = MASTER_FIL, session_fil: str = SESSION_FIL,
+                  db_fil: str = DB_FIL):
+    """Sparar en session, se spara_sessioner."""
+    spara_sessioner([(datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav, serier)],
+                    master_fil, session_fil, db_fil)
+
+def spara_sessioner(sessioner, master_fil: str = MASTER_FIL, session_fil: str = SESSION_FIL,
+                    db_fil: str = DB_FIL):
+    """
+    Sparar en eller flera sessioner (datum, tid, namn, alder, plats,
+    skjutledare, vklass, guldkrav, serier). Båda CSV-filerna skrivs i en
+    journalförd transaktion under ett fillås (se aktivitetslogg_journal), så
+    att flera samtidiga skrivare inte blandar rader och en krasch inte lämnar
+    serierader utan sessionsrad. Finns databasen (skapas med 'migrera'), ett
+    historikindex eller en statistikdatabas uppdateras de under samma lås;
+    databasen är en kopia vid sidan av CSV-filerna, inte en ersättning.
+    """
+    sessioner = list(sessioner)  # gås igenom två gånger; en generator räcker bara till en
+    master_rows, session_rows = [], []
+    for *meta, serier in sessioner:
+        master_rows.extend(build_master_rows(*meta, serier))
+        session_rows.append(build_session_row(*meta, serier))
+
+    with Journal(master_fil) as journal:
+        journal.skriv([
+            (master_fil, csv_text(FALT_MASTER, [], rubrik=True),
+             csv_text(FALT_MASTER, master_rows)),
+            (session_fil, csv_text(FALT_SESSION, [], rubrik=True),
+             csv_text(FALT_SESSION, session_rows)),
+        ])
+        if os.path.exists(db_fil):
+            with Lagring(db_fil) as lagring:
+                lagring.lagg_till_manga(sessioner)
+        komplettera_om_finns(master_fil)
+        uppdatera_om_finns(sessioner)
+
+def aterstall_journal(master_fil: str = MASTER_FIL) -> bool:
+    """Körs vid start: spelar upp en journal som lämnats kvar av en krasch."""
+    with Journal(master_fil) as journal:
+        return journal.aterstalld
+
+
+if __name__ == "__main__":
+    kommando = sys.argv[1] if len(sys.argv) > 1 else ""
+    if kommando == "migrera":
+        n = migrera()
+        print(f"Migrerade {n} sessioner till '{DB_FIL}'.")
+    elif kommando == "exportera":
+        with Lagring() as lagring:
+            lagring.exportera_csv()
+        print(f"Exporterade till '{MASTER_FIL}' och '{SESSION_FIL}'.")
+    else:
+        print(__doc__)
+        sys.exit(1)
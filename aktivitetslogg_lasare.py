@@ -0,0 +1,156 @@
+"""
+Strömmande läsning av aktivitetsloggarna med konstant minnesåtgång.
+
+    from aktivitetslogg_lasare import sessioner, serier, chunkar
+
+    for s in sessioner(namn="Michael", fran="2025-08-01", kolumner=["Datum", "Serier"]):
+        print(s["Datum"], s["Serier"].array)
+
+    for block in chunkar(storlek=100_000):
+        poangsatt(block["Poäng"], ...)
+
+Filter på Datum (fran/till, inklusive) och Namn prövas på den råa raden
+innan den CSV-tolkas, så rader som filtreras bort kostar nästan inget.
+Serier-fältet ("43|32|39|48") tolkas först när det används.
+"""
+import csv
+
+import numpy as np
+
+from aktivitetslogg_poang import FALT_MASTER, FALT_SESSION
+
+MASTER_FIL = "aktivitetslogg.csv"
+SESSION_FIL = "aktivitetslogg_sessioner.csv"
+
+CHUNKSTORLEK = 100_000
+
+# Kolumntyper när chunkar byggs som NumPy-arrayer; övriga blir str.
+DTYPER = {
+    "Ålder": np.int16, "Guldkrav": np.int16, "SerieNr": np.int16, "Poäng": np.int16,
+    "AntalSerier": np.int32, "Totalpoäng": np.int32, "Guldserier": np.int32,
+    "Snittpoäng": np.float32,
+}
+
+_I_NAMN = 2  # Datum är alltid första fältet
+
+
+class Serier:
+    """Serier-fältet från sessionsfilen, tolkas till heltal först vid behov."""
+    __slots__ = ("text", "_array")
+
+    def __init__(self, text: str):
+        self.text = text
+        self._array = None
+
+    @property
+    def array(self) -> np.ndarray:
+        if self._array is None:
+            self._array = np.array(self.text.split("|") if self.text else [], dtype=np.int16)
+        return self._array
+
+    def __array__(self, dtype=None, copy=None):
+        return self.array if dtype is None else self.array.astype(dtype)
+
+    def __len__(self):
+        return self.text.count("|") + 1 if self.text else 0
+
+    def __iter__(self):
+        return iter(self.array.tolist())
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"Serier({self.text!r})"
+
+
+def _matchar_ra(rad: str, fran, till, namn) -> bool:
+    """Snabbtest på den råa raden. False = kan hoppas över utan CSV-tolkning."""
+    if fran is not None or till is not None:
+        datum = rad[:10]
+        if (fran is not None and datum < fran) or (till is not None and datum > till):
+            return False
+    if namn is not None:
+        if '"' in rad:
+            return True  # citerade fält: låt den riktiga tolkningen avgöra
+        delar = rad.split(",", _I_NAMN + 1)
+        if len(delar) > _I_NAMN and delar[_I_NAMN] != namn:
+            return False
+    return True
+
+
+def _rader(fil: str, falt: list[str], kolumner, fran, till, namn):
+    kolumner = list(kolumner) if kolumner else falt
+    for k in kolumner:
+        if k not in falt:
+            raise KeyError(f"Okänd kolumn: {k}")
+    index = [falt.index(k) for k in kolumner]
+
+    with open(fil, newline="", encoding="utf-8") as f:
+        f.readline()  # rubrikrad
+        for rad in f:
+            if not _matchar_ra(rad, fran, till, namn):
+                continue
+            varden = next(csv.reader([rad]))
+            if namn is not None and varden[_I_NAMN] != namn:
+                continue
+            yield kolumner, [varden[i] for i in index]
+
+
+def sessioner(fil: str = SESSION_FIL, kolumner=None, fran=None, till=None, namn=None):
+    """Generator över sessionsrader som dictar; "Serier" blir ett Serier-objekt."""
+    for kol, varden in _rader(fil, FALT_SESSION, kolumner, fran, till, namn):
+        rad = dict(zip(kol, varden))
+        if "Serier" in rad:
+            rad["Serier"] = Serier(rad["Serier"])
+        yield rad
+
+
+def serier(fil: str = MASTER_FIL, kolumner=None, fran=None, till=None, namn=None):
+    """Generator över masterrader (en per serie) som dictar."""
+    for kol, varden in _rader(fil, FALT_MASTER, kolumner, fran, till, namn):
+        yield dict(zip(kol, varden))
+
+
+def _bygg_chunk(kolumner, buffert, poang, antal):
+    chunk = {}
+    for i, k in enumerate(kolumner):
+        if k == "Serier":
+            continue
+        chunk[k] = np.array([r[i] for r in buffert], dtype=DTYPER.get(k, str))
+    if poang is not None:
+        text = "|".join(poang)
+        chunk["Poäng"] = np.array(text.split("|") if text else [], dtype=np.int16)
+        chunk["AntalSerier"] = np.array(antal, dtype=np.int32)
+    return chunk
+
+
+def chunkar(fil: str = SESSION_FIL, storlek: int = CHUNKSTORLEK, kolumner=None,
+            fran=None, till=None, namn=None):
+    """
+    Generator över block om högst `storlek` rader som dict av NumPy-arrayer.
+
+    Läser sessionsfilen som standard. Då packas Serier upp: "Poäng" innehåller
+    alla serier i blocket efter varandra och "AntalSerier" antal per session,
+    vilket passar direkt in i aktivitetslogg_poang.poangsatt. Är fil
+    masterfilen (avgörs av rubrikraden) blir varje rad en serie.
+    """
+    with open(fil, encoding="utf-8") as f:
+        rubrik = next(csv.reader([f.readline()]))
+    falt = FALT_SESSION if rubrik == FALT_SESSION else FALT_MASTER
+    kolumner = list(kolumner) if kolumner else falt
+    i_serier = kolumner.index("Serier") if "Serier" in kolumner else None
+
+    buffert, poang, antal = [], [], []
+    for _, varden in _rader(fil, falt, kolumner, fran, till, namn):
+        buffert.append(varden)
+        if i_serier is not None:
+            text = varden[i_serier]
+            if text:
+                poang.append(text)
+            antal.append(text.count("|") + 1 if text else 0)
+        if len(buffert) >= storlek:
+            yield _bygg_chunk(kolumner, buffert, poang if i_serier is not None else None, antal)
+            buffert, poang, antal = [], [], []
+    if buffert:
+        yield _bygg_chunk(kolumner, buffert, poang if i_serier is not None else None, antal)
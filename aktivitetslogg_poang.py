@@ -0,0 +1,128 @@
+"""
+Gemensam poängberäkning för Aktivitetslogg.
+
+Används av CLI (Aktivitetslogg.py), GUI (Aktivitetslogg_gui.py) och
+webbappen (Aktivitetslogg_web.py). Innehåller både enkla funktioner för en
+session och ett vektoriserat batch-API (NumPy) för hela klubbhistoriken.
+"""
+import numpy as np
+
+FALT_MASTER = ["Datum", "Tid", "Namn", "Ålder", "Plats", "Skjutledare",
+               "Vapenklass", "Guldkrav", "SerieNr", "Poäng", "GuldSerie"]
+FALT_SESSION = ["Datum", "Tid", "Namn", "Ålder", "Plats", "Skjutledare",
+                "Vapenklass", "Guldkrav", "AntalSerier", "Totalpoäng",
+                "Snittpoäng", "Guldserier", "Serier"]
+
+MAXPOANG = 50
+
+# Grundkrav per vapenklass. Okända klasser får samma krav som C.
+GRUNDKRAV = {"A": 42, "C": 45}
+STANDARDKRAV = 45
+
+# Åldersklasser som (övre åldersgräns, tillägg), stigande ordning.
+# Första klassen där alder <= gräns gäller; äldre än sista gränsen får 0.
+# Ny åldersklass = ny rad här, t.ex. ((20, 2), (54, 1)).
+ALDERSKLASSER = ((54, 1),)
+
+
+# ---------- En session ----------
+def berakna_guldkrav(vklass: str, alder: int,
+                     grundkrav=GRUNDKRAV, aldersklasser=ALDERSKLASSER) -> int:
+    gk = grundkrav.get(vklass, STANDARDKRAV)
+    for grans, tillagg in aldersklasser:
+        if alder <= grans:
+            return gk + tillagg
+    return gk
+
+def join_serier(values) -> str:
+    return "|".join(str(v) for v in values)
+
+def sammanfatta(serier, guldkrav: int) -> tuple[int, int, float, int]:
+    """Returnerar (antal, total, snitt, guldserier) för en sessions serier."""
+    antal = len(serier)
+    total = sum(serier)
+    snitt = total / antal if antal else 0.0
+    guld = sum(1 for p in serier if p >= guldkrav)
+    return antal, total, snitt, guld
+
+def build_master_rows(datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav, serier):
+    rows = []
+    for i, p in enumerate(serier, start=1):
+        rows.append({
+            "Datum": datum, "Tid": tid, "Namn": namn, "Ålder": alder, "Plats": plats,
+            "Skjutledare": skjutledare, "Vapenklass": vklass, "Guldkrav": guldkrav,
+            "SerieNr": i, "Poäng": p, "GuldSerie": "Ja" if p >= guldkrav else "Nej"
+        })
+    return rows
+
+def build_session_row(datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav, serier):
+    antal, total, snitt, guld = sammanfatta(serier, guldkrav)
+    return {
+        "Datum": datum, "Tid": tid, "Namn": namn, "Ålder": alder, "Plats": plats,
+        "Skjutledare": skjutledare, "Vapenklass": vklass, "Guldkrav": guldkrav,
+        "AntalSerier": antal, "Totalpoäng": total, "Snittpoäng": f"{snitt:.2f}",
+        "Guldserier": guld, "Serier": join_serier(serier)
+    }
+
+
+# ---------- Batch (NumPy) ----------
+def berakna_guldkrav_batch(vapenklass, alder,
+                           grundkrav=GRUNDKRAV, aldersklasser=ALDERSKLASSER) -> np.ndarray:
+    """Guldkrav för många rader på en gång. vapenklass och alder har samma längd."""
+    vapenklass = np.asarray(vapenklass)
+    alder = np.asarray(alder)
+
+    gk = np.full(alder.shape, STANDARDKRAV, dtype=np.int16)
+    for klass, krav in grundkrav.items():
+        gk[vapenklass == klass] = krav
+
+    if aldersklasser:
+        granser = np.array([g for g, _ in aldersklasser])
+        tillagg = np.array([t for _, t in aldersklasser] + [0], dtype=np.int16)
+        # searchsorted(side="left") ger första klassen där alder <= gräns
+        gk += tillagg[np.searchsorted(granser, alder, side="left")]
+    return gk
+
+def poangsatt(poang, alder, vapenklass, session_id=None, antal_sessioner=None,
+              grundkrav=GRUNDKRAV, aldersklasser=ALDERSKLASSER) -> dict:
+    """
+    Vektoriserad poängsättning av många serier i ett svep.
+
+    poang, alder och vapenklass är per serie (längd N). session_id (heltal
+    0..S-1 per serie) anger vilken session serien hör till; utan session_id
+    räknas alla serier som en session.
+
+    Returnerar en dict med kolumnnamn som i CSV-filerna:
+      per serie:   "Guldkrav", "GuldSerie" (bool)
+      per session: "AntalSerier", "Totalpoäng", "Snittpoäng", "Guldserier"
+    """
+    poang = np.asarray(poang)
+    if session_id is None:
+        session_id = np.zeros(poang.shape, dtype=np.intp)
+    else:
+        session_id = np.asarray(session_id, dtype=np.intp)
+    if antal_sessioner is None:
+        antal_sessioner = int(session_id.max()) + 1 if session_id.size else 0
+
+    gk = berakna_guldkrav_batch(vapenklass, alder, grundkrav, aldersklasser)
+    guldserie = poang >= gk
+
+    antal = np.bincount(session_id, minlength=antal_sessioner)
+    total = np.bincount(session_id, weights=poang, minlength=antal_sessioner).astype(np.int64)
+    guld = np.bincount(session_id, weights=guldserie, minlength=antal_sessioner).astype(np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        snitt = np.where(antal > 0, total / np.maximum(antal, 1), 0.0)
+
+    return {
+        "Guldkrav": gk,
+        "GuldSerie": guldserie,
+        "AntalSerier": antal,
+        "Totalpoäng": total,
+        "Snittpoäng": snitt,
+        "Guldserier": guld,
+    }
+
+def session_id_fran_antal(antal_serier) -> np.ndarray:
+    """Bygger session_id per serie från antal serier per session, t.ex. [4, 7]."""
+    antal_serier = np.asarray(antal_serier, dtype=np.intp)
+    return np.repeat(np.arange(antal_serier.size, dtype=np.intp), antal_serier)
@@ -0,0 +1,252 @@
+"""
+Dagligt sammandrag per skjutledare.
+
+I stället för ett mejl per skytt samlas dagens sessioner per skjutledare:
+ett meddelande var, med en komprimerad bilaga (zip eller tar.gz) som för
+varje plats innehåller per-serie-CSV och sessions-CSV i samma format som
+loggarna.
+
+Sessionsfilen läses strömmande (aktivitetslogg_lasare, filtrerat på
+datum) och varje rad skrivs direkt till temporära filer per
+(skjutledare, plats), så minnet beror inte på hur många sessioner dagen
+har. Serieraderna byggs ur sessionsradens Serier, masterfilen behöver inte
+läsas. Meddelandena läggs i utkorgen (aktivitetslogg_utkorg) och skickas
+över en förbindelse. Vilka sammandrag som köats sparas i utkorgens databas,
+så en dag skickas bara en gång per skjutledare.
+
+Mottagare läses från [sammandrag] i .streamlit/secrets.toml:
+
+    [sammandrag]
+    standard = "klubben@example.com"       # skjutledare utan egen adress
+    format = "zip"                         # eller "gz"
+    [sammandrag.mottagare]
+    "Anna 00042" = "anna@example.com"
+
+Kommandorad:
+    python aktivitetslogg_sammandrag.py skicka [--dag ÅÅÅÅ-MM-DD] [--format zip|gz]
+    python aktivitetslogg_sammandrag.py schema [--klockan 21:00]   # varje dag
+    (eller ett cron-jobb: 0 21 * * *  python aktivitetslogg_sammandrag.py skicka)
+"""
+import argparse
+import csv
+import io
+import os
+import re
+import tarfile
+import tempfile
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from email.message import EmailMessage
+
+from aktivitetslogg_lasare import SESSION_FIL, sessioner
+from aktivitetslogg_poang import FALT_MASTER, FALT_SESSION, build_master_rows
+from aktivitetslogg_utkorg import (
+    SECRETS_FIL, UTKORG_FIL, SmtpForbindelse, Utkorg, Utskickare,
+)
+
+FORMAT = ("zip", "gz")
+FILNAMN = ("aktivitetslogg.csv", "aktivitetslogg_sessioner.csv")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sammandrag (
+    dag           TEXT    NOT NULL,
+    skjutledare   TEXT    NOT NULL,
+    meddelande    INTEGER NOT NULL,
+    PRIMARY KEY (dag, skjutledare)
+);
+"""
+
+
+class _Grupp:
+    """Temporära CSV-filer för en (skjutledare, plats)."""
+
+    def __init__(self):
+        self.master = tempfile.TemporaryFile()
+        self.session = tempfile.TemporaryFile()
+        self._tm = io.TextIOWrapper(self.master, encoding="utf-8", newline="")
+        self._ts = io.TextIOWrapper(self.session, encoding="utf-8", newline="")
+        self.wm = csv.DictWriter(self._tm, fieldnames=FALT_MASTER)
+        self.ws = csv.DictWriter(self._ts, fieldnames=FALT_SESSION)
+        self.wm.writeheader()
+        self.ws.writeheader()
+        self.sessioner = 0
+        self.serier = 0
+
+    def skriv(self, rad: dict):
+        serier = [int(p) for p in rad["Serier"]]
+        meta = (rad["Datum"], rad["Tid"], rad["Namn"], int(rad["Ålder"]), rad["Plats"],
+                rad["Skjutledare"], rad["Vapenklass"], int(rad["Guldkrav"]))
+        self.wm.writerows(build_master_rows(*meta, serier))
+        self.ws.writerow({**rad, "Serier": str(rad["Serier"])})
+        self.sessioner += 1
+        self.serier += len(serier)
+
+    def avsluta(self):
+        """Tömmer skrivbuffertarna och spolar tillbaka; returnerar (master, session)."""
+        for t in (self._tm, self._ts):
+            t.flush()
+            t.detach().seek(0)
+        return self.master, self.session
+
+    def stang(self):
+        self.master.close()
+        self.session.close()
+
+
+def gruppera_dag(dag: str, session_fil: str = SESSION_FIL) -> dict[str, dict[str, _Grupp]]:
+    """{skjutledare: {plats: _Grupp}} för dagens sessioner, i ett strömmande svep."""
+    grupper = {}
+    for rad in sessioner(session_fil, fran=dag, till=dag):
+        platser = grupper.setdefault(rad["Skjutledare"], {})
+        grupp = platser.get(rad["Plats"])
+        if grupp is None:
+            grupp = platser[rad["Plats"]] = _Grupp()
+        grupp.skriv(rad)
+    return grupper
+
+
+def _sokvagsdel(text: str, ersattning: str) -> str:
+    """
+    Fritext (t.ex. Plats) som ett säkert namn i arkivet: snedstreck och
+    styrtecken blir _, punkter och blanksteg i kanterna tas bort, så att
+    '..', '/etc' och liknande inte kan peka ut ur mappen. Tomt blir ersattning.
+    """
+    text = re.sub(r"[/\\\x00-\x1f]", "_", text).strip(" .")
+    return text or ersattning
+
+
+def _poster(platser: dict[str, "_Grupp"]):
+    """(sökväg i arkivet, öppen fil) per plats och fil; olika platser får olika mappar."""
+    mappar = set()
+    for plats, grupp in sorted(platser.items()):
+        mapp = bas = _sokvagsdel(plats, "okänd plats")
+        n = 1
+        while mapp.casefold() in mappar:
+            n += 1
+            mapp = f"{bas} ({n})"
+        mappar.add(mapp.casefold())
+        for f, namn in zip(grupp.avsluta(), FILNAMN):
+            yield f"{mapp}/{_sokvagsdel(namn, 'fil.csv')}", f
+
+
+def packa(dag: str, platser: dict[str, _Grupp], format: str = "zip") -> tuple[str, bytes, str]:
+    """Bilagan som (filnamn, innehåll, mime). Filerna komprimeras direkt från disk."""
+    ut = io.BytesIO()
+    if format == "zip":
+        with zipfile.ZipFile(ut, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as z:
+            for sokvag, f in _poster(platser):
+                with z.open(sokvag, "w") as post:
+                    while block := f.read(1 << 20):
+                        post.write(block)
+        return f"aktivitetslogg_{dag}.zip", ut.getvalue(), "application/zip"
+    if format == "gz":
+        with tarfile.open(fileobj=ut, mode="w:gz", compresslevel=6) as tar:
+            for sokvag, f in _poster(platser):
+                info = tarfile.TarInfo(sokvag)
+                info.size = f.seek(0, os.SEEK_END)
+                info.mtime = int(time.time())
+                f.seek(0)
+                tar.addfile(info, f)
+        return f"aktivitetslogg_{dag}.tar.gz", ut.getvalue(), "application/gzip"
+    raise ValueError(f"Okänt format: {format}")
+
+
+def bygg_meddelande(dag: str, skjutledare: str, platser: dict[str, _Grupp], fran: str,
+                    till: str, format: str = "zip") -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = f"Aktivitetslogg {dag} – {skjutledare}"
+    msg["From"] = fran
+    msg["To"] = till
+    rader = [f"Sammandrag för {dag}, skjutledare {skjutledare}.", ""]
+    for plats, grupp in sorted(platser.items()):
+        rader.append(f"{plats}: {grupp.sessioner} sessioner, {grupp.serier} serier")
+    msg.set_content("\n".join(rader) + "\n")
+    filnamn, data, mime = packa(dag, platser, format)
+    maintype, subtype = mime.split("/", 1)
+    msg.add_attachment(data, maintype=maintype, subtype=subtype, filename=filnamn)
+    return msg
+
+
+def koa_dag(dag: str, smtp_cfg: dict, cfg: dict, session_fil: str = SESSION_FIL,
+            utkorg_fil: str = UTKORG_FIL, format: str | None = None) -> list[int]:
+    """
+    Lägger dagens sammandrag i utkorgen, ett per skjutledare som inte redan
+    fått sitt. Returnerar meddelandenas id.
+    """
+    format = format or cfg.get("format", "zip")
+    fran = smtp_cfg.get("from", smtp_cfg.get("user"))
+    mottagare = cfg.get("mottagare", {})
+    grupper = gruppera_dag(dag, session_fil)
+    ids = []
+    try:
+        with Utkorg(utkorg_fil) as utkorg:
+            utkorg.con.executescript(SCHEMA)
+            redan = {r[0] for r in utkorg.con.execute(
+                "SELECT skjutledare FROM sammandrag WHERE dag = ?", (dag,))}
+            for skjutledare, platser in sorted(grupper.items()):
+                till = mottagare.get(skjutledare) or cfg.get("standard")
+                if skjutledare in redan or not till:
+                    continue
+                msg = bygg_meddelande(dag, skjutledare, platser, fran, till, format)
+                mid = utkorg.koa(msg)
+                with utkorg.con:
+                    utkorg.con.execute("INSERT INTO sammandrag VALUES (?, ?, ?)",
+                                       (dag, skjutledare, mid))
+                ids.append(mid)
+    finally:
+        for platser in grupper.values():
+            for grupp in platser.values():
+                grupp.stang()
+    return ids
+
+
+def skicka_dag(dag: str, smtp_cfg: dict, cfg: dict, session_fil: str = SESSION_FIL,
+               utkorg_fil: str = UTKORG_FIL, format: str | None = None) -> list[int]:
+    """Köar dagens sammandrag och skickar det som kan skickas direkt över en förbindelse."""
+    ids = koa_dag(dag, smtp_cfg, cfg, session_fil, utkorg_fil, format)
+    forbindelse = SmtpForbindelse(smtp_cfg)
+    try:
+        with Utkorg(utkorg_fil) as utkorg:
+            # Det som hamnar i backoff tas av utskickaren (webbappen eller 'kor')
+            while Utskickare.varv(utkorg, forbindelse):
+                pass
+    finally:
+        forbindelse.stang()
+    return ids
+
+
+def _las_cfg(sokvag: str) -> tuple[dict, dict]:
+    import tomllib
+    with open(sokvag, "rb") as f:
+        secrets = tomllib.load(f)
+    return secrets.get("smtp", {}), secrets.get("sammandrag", {})
+
+
+def _nasta_korning(klockan: str, nu: datetime) -> datetime:
+    h, m = map(int, klockan.split(":"))
+    nasta = nu.replace(hour=h, minute=m, second=0, microsecond=0)
+    return nasta if nasta > nu else nasta + timedelta(days=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dagligt sammandrag per skjutledare.")
+    parser.add_argument("kommando", choices=["skicka", "schema"])
+    parser.add_argument("--dag", default=None, help="ÅÅÅÅ-MM-DD, standard idag")
+    parser.add_argument("--format", choices=FORMAT, default=None)
+    parser.add_argument("--klockan", default="21:00")
+    parser.add_argument("--secrets", default=SECRETS_FIL)
+    args = parser.parse_args()
+
+    smtp_cfg, cfg = _las_cfg(args.secrets)
+    if args.kommando == "skicka":
+        ids = skicka_dag(args.dag or date.today().isoformat(), smtp_cfg, cfg, format=args.format)
+        print(f"{len(ids)} sammandrag köade.")
+    else:
+        while True:
+            nasta = _nasta_korning(args.klockan, datetime.now())
+            print(f"Nästa sammandrag {nasta:%Y-%m-%d %H:%M}.")
+            time.sleep(max((nasta - datetime.now()).total_seconds(), 0))
+            smtp_cfg, cfg = _las_cfg(args.secrets)
+            ids = skicka_dag(nasta.date().isoformat(), smtp_cfg, cfg, format=args.format)
+            print(f"{len(ids)} sammandrag köade för {nasta:%Y-%m-%d}.")
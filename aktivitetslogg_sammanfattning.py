@@ -0,0 +1,62 @@
+"""
+Sammanfattning och CSV-export av en pågående session i webbappen.
+
+Ligger utanför Streamlit-skriptet (Aktivitetslogg_web.py) så att samma kod
+kan återanvändas och mätas utan att starta appen.
+"""
+import io
+import csv
+from functools import lru_cache
+
+import pandas as pd
+
+from aktivitetslogg_poang import (
+    FALT_MASTER, FALT_SESSION, build_master_rows, build_session_row, poangsatt,
+)
+
+
+def rows_to_csv_bytes(rows, fieldnames) -> bytes:
+    buff = io.StringIO()
+    writer = csv.DictWriter(buff, fieldnames=fieldnames)
+    writer.writeheader()
+    writer.writerows(rows if isinstance(rows, list) else [rows])
+    return buff.getvalue().encode("utf-8")
+
+def sammanfattning_df(serier, alder: int, vklass: str) -> tuple[pd.DataFrame, int, float, int]:
+    """Tabell (SerieNr, Poäng, GuldSerie) samt (total, snitt, guldserier)."""
+    df = pd.DataFrame({
+        "SerieNr": range(1, len(serier) + 1),
+        "Poäng": serier
+    })
+    sammanf = poangsatt(
+        df["Poäng"].to_numpy(),
+        alder=[int(alder)] * len(df),
+        vapenklass=[vklass] * len(df),
+    )
+    df["GuldSerie"] = sammanf["GuldSerie"]
+
+    total = int(sammanf["Totalpoäng"][0])
+    snitt = float(sammanf["Snittpoäng"][0])
+    guld = int(sammanf["Guldserier"][0])
+    return df, total, snitt, guld
+
+
+# ---------- Cachade varianter för Streamlit-omkörningar ----------
+# Nyckeln är hela tillståndet (metadata + serier som tuple). Samma objekt
+# delas mellan omkörningar och användare och får därför inte ändras.
+CACHESTORLEK = 256
+
+@lru_cache(maxsize=CACHESTORLEK)
+def _sammanfattning(serier: tuple, alder: int, vklass: str):
+    return sammanfattning_df(list(serier), alder, vklass)
+
+def sammanfattning_cachad(serier, alder: int, vklass: str) -> tuple[pd.DataFrame, int, float, int]:
+    return _sammanfattning(tuple(serier), int(alder), vklass)
+
+@lru_cache(maxsize=CACHESTORLEK)
+def csv_payload(datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav,
+                serier: tuple) -> tuple[bytes, bytes]:
+    """(per-serie CSV, session CSV) som bytes för nedladdning och e-post."""
+    meta = (datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav)
+    return (rows_to_csv_bytes(build_master_rows(*meta, serier), FALT_MASTER),
+            rows_to_csv_bytes(build_session_row(*meta, serier), FALT_SESSION))
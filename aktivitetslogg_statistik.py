@@ -0,0 +1,219 @@
+"""
+Materialiserad statistik per skytt och vapenklass.
+
+Varje sparad session uppdaterar två rader i en SQLite-tabell: karriären
+(period "") och sessionens månad (period "ÅÅÅÅ-MM"). Raderna håller löpande
+summor, så uppdateringen är O(1) per session och statistik kan läsas utan
+att loggen läses om. Säsongsstatistik fås genom att summera månaderna.
+
+Kommandorad:
+    python aktivitetslogg_statistik.py bygg         # bygg om från sessionsfilen
+    python aktivitetslogg_statistik.py kontrollera  # jämför mot sessionsfilen
+"""
+import csv
+import math
+import os
+import sqlite3
+import sys
+
+SESSION_FIL = "aktivitetslogg_sessioner.csv"
+STATISTIK_FIL = "aktivitetslogg_statistik.db"
+
+KARRIAR = ""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS aggregat (
+    namn            TEXT    NOT NULL,
+    vapenklass      TEXT    NOT NULL,
+    period          TEXT    NOT NULL,
+    sessioner       INTEGER NOT NULL,
+    serier          INTEGER NOT NULL,
+    total           INTEGER NOT NULL,
+    kvadratsumma    INTEGER NOT NULL,
+    guld            INTEGER NOT NULL,
+    basta_serie     INTEGER NOT NULL,
+    basta_session   INTEGER NOT NULL,
+    PRIMARY KEY (namn, vapenklass, period)
+);
+"""
+
+KOLUMNER = ["sessioner", "serier", "total", "kvadratsumma", "guld",
+            "basta_serie", "basta_session"]
+
+_UPSERT = f"""
+INSERT INTO aggregat(namn, vapenklass, period, {", ".join(KOLUMNER)})
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(namn, vapenklass, period) DO UPDATE SET
+    sessioner     = sessioner     + excluded.sessioner,
+    serier        = serier        + excluded.serier,
+    total         = total         + excluded.total,
+    kvadratsumma  = kvadratsumma  + excluded.kvadratsumma,
+    guld          = guld          + excluded.guld,
+    basta_serie   = max(basta_serie,   excluded.basta_serie),
+    basta_session = max(basta_session, excluded.basta_session)
+"""
+
+
+def summera_session(serier, guldkrav: int) -> tuple:
+    """En sessions bidrag i KOLUMNER-ordning."""
+    total = sum(serier)
+    return (1, len(serier), total, sum(p * p for p in serier),
+            sum(1 for p in serier if p >= guldkrav), max(serier, default=0), total)
+
+def _addera(a, b) -> tuple:
+    return (a[0] + b[0], a[1] + b[1], a[2] + b[2], a[3] + b[3], a[4] + b[4],
+            max(a[5], b[5]), max(a[6], b[6]))
+
+def harled(rad) -> dict:
+    """Räknar fram snitt, varians, standardavvikelse och guldandel ur en aggregatrad."""
+    sessioner, serier, total, kvadratsumma, guld, basta_serie, basta_session = rad
+    snitt = total / serier if serier else 0.0
+    varians = kvadratsumma / serier - snitt * snitt if serier else 0.0
+    varians = max(varians, 0.0)
+    return {
+        "Sessioner": sessioner, "Serier": serier, "Totalpoäng": total,
+        "Snittpoäng": snitt, "Varians": varians, "Standardavvikelse": math.sqrt(varians),
+        "Guldserier": guld, "Guldandel": guld / serier if serier else 0.0,
+        "BästaSerie": basta_serie, "BästaSession": basta_session,
+    }
+
+
+class Statistik:
+    def __init__(self, sokvag: str = STATISTIK_FIL):
+        self.con = sqlite3.connect(sokvag)
+        self.con.executescript(SCHEMA)
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --------- Uppdatering ----------
+    def _lagg_till(self, datum, namn, vklass, guldkrav, serier):
+        bidrag = summera_session(serier, int(guldkrav))
+        self.con.execute(_UPSERT, (namn, vklass, KARRIAR, *bidrag))
+        self.con.execute(_UPSERT, (namn, vklass, datum[:7], *bidrag))
+
+    def lagg_till(self, datum, tid, namn, alder, plats, skjutledare, vklass, guldkrav, serier):
+        """Samma argument som spara_session. O(1): två upserts."""
+        with self.con:
+            self._lagg_till(datum, namn, vklass, guldkrav, serier)
+
+    def lagg_till_manga(self, sessioner):
+        with self.con:
+            for datum, _, namn, _, _, _, vklass, guldkrav, serier in sessioner:
+                self._lagg_till(datum, namn, vklass, guldkrav, serier)
+
+    def bygg_om(self, session_fil: str = SESSION_FIL) -> int:
+        """Tömmer tabellen och bygger om den från sessionsfilen."""
+        aggregat = berakna_fran_logg(session_fil)
+        with self.con:
+            self.con.execute("DELETE FROM aggregat")
+            self.con.executemany(
+                f"INSERT INTO aggregat(namn, vapenklass, period, {', '.join(KOLUMNER)})"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((*nyckel, *rad) for nyckel, rad in aggregat.items()),
+            )
+        return len(aggregat)
+
+    # --------- Läsning ----------
+    def rader(self) -> dict:
+        return {
+            (r[0], r[1], r[2]): tuple(r[3:])
+            for r in self.con.execute(
+                f"SELECT namn, vapenklass, period, {', '.join(KOLUMNER)} FROM aggregat"
+            )
+        }
+
+    def period(self, namn: str, vklass: str | None = None,
+               fran: str | None = None, till: str | None = None) -> dict | None:
+        """
+        Statistik för en skytt. Utan fran/till: karriären. Med fran/till
+        (ÅÅÅÅ-MM, inklusive) summeras månadsraderna, t.ex. en säsong.
+        Utan vklass slås vapenklasserna ihop.
+        """
+        sql = f"SELECT {', '.join(KOLUMNER)} FROM aggregat WHERE namn = ?"
+        args = [namn]
+        if vklass is not None:
+            sql += " AND vapenklass = ?"
+            args.append(vklass)
+        if fran is None and till is None:
+            sql += " AND period = ''"
+        else:
+            sql += " AND period >= ? AND period <= ?"
+            args += [fran or "0000-00", till or "9999-99"]
+        rad = None
+        for r in self.con.execute(sql, args):
+            rad = r if rad is None else _addera(rad, r)
+        return harled(rad) if rad else None
+
+    def manader(self, namn: str, vklass: str) -> list[tuple[str, dict]]:
+        return [
+            (r[0], harled(r[1:]))
+            for r in self.con.execute(
+                f"SELECT period, {', '.join(KOLUMNER)} FROM aggregat"
+                " WHERE namn = ? AND vapenklass = ? AND period != '' ORDER BY period",
+                (namn, vklass),
+            )
+        ]
+
+    # --------- Kontroll ----------
+    def kontrollera(self, session_fil: str = SESSION_FIL) -> list[str]:
+        """Jämför tabellen med en omräkning från loggen. Returnerar avvikelser."""
+        facit = berakna_fran_logg(session_fil)
+        lagrat = self.rader()
+        fel = []
+        for nyckel in sorted(facit.keys() | lagrat.keys()):
+            if facit.get(nyckel) != lagrat.get(nyckel):
+                fel.append(f"{nyckel}: lagrat {lagrat.get(nyckel)}, loggen ger {facit.get(nyckel)}")
+        return fel
+
+
+def berakna_fran_logg(session_fil: str = SESSION_FIL) -> dict:
+    """Räknar alla aggregat från sessionsfilen i minnet."""
+    aggregat = {}
+    if not os.path.exists(session_fil):
+        return aggregat
+    with open(session_fil, newline="", encoding="utf-8") as f:
+        for rad in csv.DictReader(f):
+            serier = [int(p) for p in rad["Serier"].split("|") if p]
+            bidrag = summera_session(serier, int(rad["Guldkrav"]))
+            for period in (KARRIAR, rad["Datum"][:7]):
+                nyckel = (rad["Namn"], rad["Vapenklass"], period)
+                tidigare = aggregat.get(nyckel)
+                aggregat[nyckel] = bidrag if tidigare is None else _addera(tidigare, bidrag)
+    return aggregat
+
+
+def uppdatera_om_finns(sessioner, statistik_fil: str = STATISTIK_FIL):
+    """
+    Anropas från skrivvägen med en lista av (datum, tid, namn, alder, plats,
+    skjutledare, vklass, guldkrav, serier): uppdaterar statistiken om den
+    har skapats.
+    """
+    if os.path.exists(statistik_fil):
+        with Statistik(statistik_fil) as stat:
+            stat.lagg_till_manga(sessioner)
+
+
+if __name__ == "__main__":
+    kommando = sys.argv[1] if len(sys.argv) > 1 else ""
+    if kommando not in ("bygg", "kontrollera"):
+        print(__doc__)
+        sys.exit(1)
+    if kommando == "kontrollera" and not os.path.exists(STATISTIK_FIL):
+        print(f"'{STATISTIK_FIL}' finns inte, skapa den med 'bygg'.")
+        sys.exit(1)
+    with Statistik() as stat:
+        if kommando == "bygg":
+            print(f"Byggde {stat.bygg_om()} aggregatrader i '{STATISTIK_FIL}'.")
+        else:
+            fel = stat.kontrollera()
+            for f in fel:
+                print(f)
+            print("OK" if not fel else f"{len(fel)} avvikelser.")
+            sys.exit(1 if fel else 0)
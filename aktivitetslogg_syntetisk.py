@@ -0,0 +1,81 @@
+"""
+Syntetisk testdata för Aktivitetslogg.
+
+Genererar en reproducerbar (seedad) klubbhistorik med skyttar, skjutplatser,
+skjutledare, åldrar och poängfördelningar och kan skriva den som
+aktivitetslogg.csv/aktivitetslogg_sessioner.csv i samma format som appen.
+"""
+import csv
+from datetime import date, timedelta
+
+import numpy as np
+
+from aktivitetslogg_poang import (
+    FALT_MASTER, FALT_SESSION, berakna_guldkrav, build_master_rows, build_session_row,
+)
+
+PLATSER = ["Singeshult", "Jönköping", "Huskvarna", "Tenhult", "Gränna", "Värnamo",
+           "Nässjö", "Vetlanda", "Eksjö", "Tranås"]
+FORNAMN = ["Michael", "Johan", "Anna", "Eva", "Lars", "Karin", "Per", "Maria",
+           "Nils", "Sara", "Erik", "Lena", "Olof", "Ingrid", "Jonas", "Sofia"]
+
+
+def generera_sessioner(antal_serier: int, seed: int = 0, antal_skyttar: int = 500,
+                       startdatum: date = date(2015, 1, 1), antal_dagar: int = 3650):
+    """
+    Generator över sessioner som (datum, tid, namn, alder, plats, skjutledare,
+    vklass, guldkrav, serier) tills antal_serier serier har genererats.
+    Datum stiger över perioden så att filen blir kronologisk som i verkligheten.
+    """
+    rng = np.random.default_rng(seed)
+
+    namn = [f"{FORNAMN[i % len(FORNAMN)]} {i:05d}" for i in range(antal_skyttar)]
+    alder = rng.integers(15, 85, antal_skyttar)
+    vklass = np.where(rng.random(antal_skyttar) < 0.6, "A", "C")
+    niva = np.clip(rng.normal(40, 4, antal_skyttar), 25, 48)
+    hemmaplats = rng.integers(0, len(PLATSER), antal_skyttar)
+    ledare = [namn[i] for i in rng.choice(antal_skyttar, size=len(PLATSER) * 3, replace=False)]
+
+    # Slumpa i block för att slippa ett rng-anrop per serie
+    block = 4096
+    genererat = 0
+    while genererat < antal_serier:
+        skytt = rng.integers(0, antal_skyttar, block)
+        antal = rng.integers(3, 13, block)
+        flytta = rng.random(block) < 0.1
+        annan_plats = rng.integers(0, len(PLATSER), block)
+        ledar_val = rng.integers(0, 3, block)
+        sekunder = rng.integers(8 * 3600, 20 * 3600, block)
+        poang = np.clip(np.rint(rng.normal(0, 5, (block, 12))), -50, 50)
+
+        for k in range(block):
+            if genererat >= antal_serier:
+                return
+            s = int(skytt[k])
+            n = min(int(antal[k]), antal_serier - genererat)
+            p = int(annan_plats[k]) if flytta[k] else int(hemmaplats[s])
+            dag = startdatum + timedelta(days=genererat * antal_dagar // antal_serier)
+            sek = int(sekunder[k])
+            a = int(alder[s])
+            vk = str(vklass[s])
+            serier = np.clip(poang[k, :n] + niva[s], 1, 50).astype(int).tolist()
+            yield (dag.isoformat(), f"{sek // 3600:02d}:{sek // 60 % 60:02d}:{sek % 60:02d}",
+                   namn[s], a, PLATSER[p], ledare[p * 3 + int(ledar_val[k])], vk,
+                   berakna_guldkrav(vk, a), serier)
+            genererat += n
+
+
+def skriv_csv_filer(antal_serier: int, master_fil: str, session_fil: str, seed: int = 0) -> int:
+    """Skriver en syntetisk historik till CSV-filerna. Returnerar antal sessioner."""
+    n = 0
+    with open(master_fil, "w", newline="", encoding="utf-8") as fm, \
+         open(session_fil, "w", newline="", encoding="utf-8") as fs:
+        wm = csv.DictWriter(fm, fieldnames=FALT_MASTER)
+        ws = csv.DictWriter(fs, fieldnames=FALT_SESSION)
+        wm.writeheader()
+        ws.writeheader()
+        for *meta, serier in generera_sessioner(antal_serier, seed):
+            wm.writerows(build_master_rows(*meta, serier))
+            ws.writerow(build_session_row(*meta, serier))
+            n += 1
+    return n
@@ -0,0 +1,325 @@
+"""
+Beständig utkorg för resultatmejl.
+
+Webbappen lägger bara meddelandet i en SQLite-kö (koa) och får tillbaka ett
+id direkt. En bakgrundstråd (Utskickare) tömmer kön över en återanvänd,
+inloggad SMTP-förbindelse: upp till BATCH meddelanden per varv, nytt försök
+med exponentiell backoff vid tillfälliga fel (4xx, nedkopplad server,
+nätverksfel) och status "död" vid permanenta fel (5xx) eller när
+MAX_FORSOK är förbrukade.
+
+Status per meddelande: köad -> skickas -> skickad | köad (nytt försök) | död.
+Ett meddelande som fastnat i "skickas" (t.ex. om processen dog mitt i)
+blir ledigt igen när dess lån gått ut.
+
+SMTP-inställningar är samma dict som [smtp] i .streamlit/secrets.toml:
+host, port, user, password, from. Port 465 ger SSL, annars STARTTLS om inte
+starttls = false (t.ex. mot en lokal testserver utan TLS). Utan user görs
+ingen inloggning.
+
+Kommandorad:
+    python aktivitetslogg_utkorg.py kor           # kör utskickaren i förgrunden
+    python aktivitetslogg_utkorg.py status        # antal per status och döda meddelanden
+    python aktivitetslogg_utkorg.py forsok-igen   # lägg döda meddelanden i kön igen
+"""
+import argparse
+import logging
+import os
+import smtplib
+import socket
+import sqlite3
+import threading
+import time
+from email.message import EmailMessage
+
+UTKORG_FIL = "aktivitetslogg_utkorg.db"
+SECRETS_FIL = os.path.join(".streamlit", "secrets.toml")
+
+BATCH = 20             # meddelanden per varv över samma förbindelse
+MAX_FORSOK = 12        # med backoffen nedan ungefär fem timmar innan "död"
+BACKOFF_BAS = 30.0     # sekunder; 30, 60, 120, 240 ... upp till BACKOFF_MAX
+BACKOFF_MAX = 3600.0
+LAN_S = 300.0          # hur länge ett meddelande får vara "skickas"
+TOMGANG_S = 60.0       # stäng förbindelsen efter så här lång tystnad
+VANTA_S = 5.0          # hur ofta kön kontrolleras utan väckning
+
+KOAD, SKICKAS, SKICKAD, DOD = "köad", "skickas", "skickad", "död"
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meddelanden (
+    id            INTEGER PRIMARY KEY,
+    skapad        REAL    NOT NULL,
+    fran          TEXT    NOT NULL,
+    till          TEXT    NOT NULL,
+    amne          TEXT    NOT NULL,
+    data          BLOB    NOT NULL,
+    status        TEXT    NOT NULL,
+    forsok        INTEGER NOT NULL DEFAULT 0,
+    nasta_forsok  REAL    NOT NULL,
+    senaste_fel   TEXT,
+    skickad       REAL
+);
+CREATE INDEX IF NOT EXISTS meddelanden_status ON meddelanden(status, nasta_forsok);
+"""
+
+
+class Utkorg:
+    def __init__(self, sokvag: str = UTKORG_FIL):
+        # Webbappen och utskickaren har var sin förbindelse; WAL låter dem
+        # läsa och skriva samtidigt
+        self.con = sqlite3.connect(sokvag, timeout=30)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.executescript(SCHEMA)
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def koa(self, msg: EmailMessage) -> int:
+        """Lägger meddelandet i kön och returnerar dess id."""
+        with self.con:
+            cur = self.con.execute(
+                "INSERT INTO meddelanden(skapad, fran, till, amne, data, status, nasta_forsok)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), msg["From"], msg["To"], msg["Subject"] or "",
+                 msg.as_bytes(), KOAD, 0.0),
+            )
+        return cur.lastrowid
+
+    def hamta(self, antal: int = BATCH, nu: float | None = None) -> list[tuple]:
+        """
+        Reserverar upp till `antal` meddelanden som är redo att skickas.
+        Returnerar [(id, fran, till, data, forsok)].
+        """
+        nu = time.time() if nu is None else nu
+        with self.con:
+            self.con.execute("BEGIN IMMEDIATE")
+            rader = self.con.execute(
+                "SELECT id, fran, till, data, forsok FROM meddelanden"
+                " WHERE status IN (?, ?) AND nasta_forsok <= ? ORDER BY id LIMIT ?",
+                (KOAD, SKICKAS, nu, antal),
+            ).fetchall()
+            self.con.executemany(
+                "UPDATE meddelanden SET status = ?, nasta_forsok = ? WHERE id = ?",
+                ((SKICKAS, nu + LAN_S, r[0]) for r in rader),
+            )
+        return rader
+
+    def skickad(self, mid: int):
+        with self.con:
+            self.con.execute(
+                "UPDATE meddelanden SET status = ?, skickad = ?, senaste_fel = NULL WHERE id = ?",
+                (SKICKAD, time.time(), mid),
+            )
+
+    def misslyckad(self, mid: int, forsok: int, fel: str, permanent: bool = False):
+        """Nytt försök med backoff, eller död om permanent/för många försök."""
+        forsok += 1
+        if permanent or forsok >= MAX_FORSOK:
+            status, nasta = DOD, 0.0
+        else:
+            status, nasta = KOAD, time.time() + min(BACKOFF_BAS * 2 ** (forsok - 1), BACKOFF_MAX)
+        with self.con:
+            self.con.execute(
+                "UPDATE meddelanden SET status = ?, forsok = ?, nasta_forsok = ?, senaste_fel = ?"
+                " WHERE id = ?",
+                (status, forsok, nasta, fel[:500], mid),
+            )
+
+    def forsok_igen(self) -> int:
+        """Lägger alla döda meddelanden i kön igen."""
+        with self.con:
+            cur = self.con.execute(
+                "UPDATE meddelanden SET status = ?, forsok = 0, nasta_forsok = 0 WHERE status = ?",
+                (KOAD, DOD),
+            )
+        return cur.rowcount
+
+    # --------- Status ----------
+    def status(self, mid: int) -> dict | None:
+        r = self.con.execute(
+            "SELECT status, forsok, senaste_fel, nasta_forsok, skickad FROM meddelanden WHERE id = ?",
+            (mid,),
+        ).fetchone()
+        if r is None:
+            return None
+        return {"status": r[0], "forsok": r[1], "senaste_fel": r[2],
+                "nasta_forsok": r[3], "skickad": r[4]}
+
+    def oversikt(self) -> dict[str, int]:
+        antal = {KOAD: 0, SKICKAS: 0, SKICKAD: 0, DOD: 0}
+        antal.update(self.con.execute("SELECT status, count(*) FROM meddelanden GROUP BY status"))
+        return antal
+
+    def senaste(self, antal: int = 20, status: str | None = None) -> list[dict]:
+        sql = "SELECT id, skapad, till, amne, status, forsok, senaste_fel FROM meddelanden"
+        args = []
+        if status is not None:
+            sql += " WHERE status = ?"
+            args.append(status)
+        sql += " ORDER BY id DESC LIMIT ?"
+        args.append(antal)
+        kolumner = ["id", "skapad", "till", "amne", "status", "forsok", "senaste_fel"]
+        return [dict(zip(kolumner, r)) for r in self.con.execute(sql, args)]
+
+
+# ---------- SMTP ----------
+def _permanent(fel: Exception) -> bool:
+    """5xx-svar är permanenta; allt annat (4xx, nedkoppling, nätverk) provas igen."""
+    if isinstance(fel, smtplib.SMTPRecipientsRefused):
+        return all(kod >= 500 for kod, _ in fel.recipients.values())
+    if isinstance(fel, smtplib.SMTPResponseException):
+        return fel.smtp_code >= 500 and not isinstance(fel, smtplib.SMTPAuthenticationError)
+    return False
+
+
+class SmtpForbindelse:
+    """En återanvänd, inloggad förbindelse. Kopplar upp igen vid behov."""
+
+    def __init__(self, cfg: dict, timeout: float = 30.0):
+        self.cfg = cfg
+        self.timeout = timeout
+        self.smtp = None
+        self.senast = 0.0
+
+    def _anslut(self):
+        host = self.cfg["host"]
+        port = int(self.cfg.get("port", 465))
+        if port == 465:
+            s = smtplib.SMTP_SSL(host, port, timeout=self.timeout)
+        else:
+            s = smtplib.SMTP(host, port, timeout=self.timeout)
+            if self.cfg.get("starttls", True):
+                s.starttls()
+        if self.cfg.get("user"):
+            s.login(self.cfg["user"], self.cfg["password"])
+        self.smtp = s
+
+    def skicka(self, fran: str, till: str, data: bytes):
+        if self.smtp is not None and time.monotonic() - self.senast > TOMGANG_S:
+            self.stang()  # servern har troligen redan kopplat ner
+        if self.smtp is None:
+            self._anslut()
+        try:
+            self.smtp.sendmail(fran, [a.strip() for a in till.split(",")], data)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self.stang()
+            raise
+        except smtplib.SMTPResponseException as fel:
+            if fel.smtp_code == 421:  # servern stänger förbindelsen
+                self.stang()
+            raise
+        self.senast = time.monotonic()
+
+    def stang(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self.smtp.close()
+            self.smtp = None
+
+
+class Utskickare(threading.Thread):
+    """Bakgrundstråd som tömmer utkorgen. vack() efter koa() ger direkt utskick."""
+
+    def __init__(self, cfg: dict, utkorg_fil: str = UTKORG_FIL):
+        super().__init__(name="utskickare", daemon=True)
+        self.cfg = cfg
+        self.utkorg_fil = utkorg_fil
+        self._vaken = threading.Event()
+        self._stopp = threading.Event()
+
+    def vack(self):
+        self._vaken.set()
+
+    def stoppa(self):
+        self._stopp.set()
+        self._vaken.set()
+
+    def run(self):
+        forbindelse = SmtpForbindelse(self.cfg)
+        fel_i_rad = 0
+        with Utkorg(self.utkorg_fil) as utkorg:
+            while not self._stopp.is_set():
+                try:
+                    skickade = self.varv(utkorg, forbindelse)
+                except Exception:
+                    # Tråden får inte dö: logga, koppla ner och vänta allt längre
+                    log.exception("Utskickaren misslyckades, försöker igen")
+                    forbindelse.stang()
+                    self._stopp.wait(min(VANTA_S * 2 ** fel_i_rad, BACKOFF_MAX))
+                    fel_i_rad += 1
+                    continue
+                fel_i_rad = 0
+                if skickade:
+                    continue
+                if forbindelse.smtp is not None and time.monotonic() - forbindelse.senast > TOMGANG_S:
+                    forbindelse.stang()
+                self._vaken.wait(VANTA_S)
+                self._vaken.clear()
+        forbindelse.stang()
+
+    @staticmethod
+    def varv(utkorg: Utkorg, forbindelse: SmtpForbindelse) -> int:
+        """Skickar en batch. Returnerar antal hämtade meddelanden."""
+        batch = utkorg.hamta()
+        for i, (mid, fran, till, data, forsok) in enumerate(batch):
+            try:
+                forbindelse.skicka(fran, till, data)
+            except (smtplib.SMTPException, OSError, socket.timeout) as fel:
+                utkorg.misslyckad(mid, forsok, f"{type(fel).__name__}: {fel}", _permanent(fel))
+                if forbindelse.smtp is None:
+                    # Ingen förbindelse: resten av batchen får vänta på backoff
+                    for mid2, _, _, _, forsok2 in batch[i + 1:]:
+                        utkorg.misslyckad(mid2, forsok2, "Ingen förbindelse till SMTP-servern")
+                    return len(batch)
+            except Exception as fel:
+                # Oväntat fel för just detta meddelande: räkna försöket så att det till slut blir dött.
+                # Förbindelsen stängs för säkerhets skull; nästa meddelande kopplar upp igen.
+                log.exception("Meddelande %s kunde inte skickas", mid)
+                forbindelse.stang()
+                utkorg.misslyckad(mid, forsok, f"{type(fel).__name__}: {fel}")
+            else:
+                utkorg.skickad(mid)
+        return len(batch)
+
+
+def las_smtp_cfg(sokvag: str = SECRETS_FIL) -> dict:
+    """[smtp] ur secrets.toml, för utskickaren utanför Streamlit."""
+    import tomllib
+    with open(sokvag, "rb") as f:
+        return tomllib.load(f).get("smtp", {})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Utkorgen för resultatmejl.")
+    parser.add_argument("kommando", choices=["kor", "status", "forsok-igen"])
+    parser.add_argument("--secrets", default=SECRETS_FIL)
+    args = parser.parse_args()
+
+    if args.kommando == "kor":
+        utskickare = Utskickare(las_smtp_cfg(args.secrets))
+        utskickare.start()
+        try:
+            while utskickare.is_alive():
+                utskickare.join(1.0)
+        except KeyboardInterrupt:
+            utskickare.stoppa()
+            utskickare.join()
+    elif args.kommando == "status":
+        with Utkorg() as utkorg:
+            for status, n in utkorg.oversikt().items():
+                print(f"{status:>8}: {n}")
+            for m in utkorg.senaste(status=DOD):
+                print(f"död #{m['id']} till {m['till']}: {m['senaste_fel']}")
+    else:
+        with Utkorg() as utkorg:
+            print(f"{utkorg.forsok_igen()} meddelanden lagda i kön igen.")
@@ -0,0 +1,133 @@
+"""
+Benchmark: inläsning av agent_data.csv som i notebooken mot agent_data.
+
+Skriver en syntetisk agent_data.csv med samma kolumner och ungefär samma
+antal rader som originalet och läser den på sex sätt, vart och ett i en
+egen process så att toppminnet (max RSS) går att jämföra:
+
+    notebook   read_csv, rename, loop med astype/to_datetime
+    csv        las_csv: namn och datatyper vid tolkningen
+    kall       las_agent_data utan cache (csv + skriver Parquet)
+    varm       las_agent_data med cache (läser bara Parquet)
+    3 kolumner las_agent_data med cache, bara tre kolumner
+    3 kol. csv las_csv med bara tre kolumner (usecols)
+
+Kör:
+    python bench_agent_data.py              # 563 458 rader
+    python bench_agent_data.py 2000000
+"""
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from agent_data import KOLUMNNAMN, SCHEMA, las_agent_data, las_csv
+
+RADER = 563_458
+TRE_KOLUMNER = ["Timestamp", "Agent_Name", "Response_Time"]
+
+
+def skriv_syntetisk(sokvag: str, n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+
+    def val(alternativ, saknas: float = 0.0):
+        v = np.asarray(alternativ, dtype=object)[rng.integers(0, len(alternativ), n)]
+        v[rng.random(n) < saknas] = None
+        return v
+
+    modeller = ["alva-1.i", "kiwi-2.i", "orion-k3", "orion-k4", "maya-1.i", "sagitta-4.i", "bonus-5.i"]
+    kombinationer = [", ".join(rng.choice(modeller, rng.integers(1, 5))) for _ in range(7000)]
+    tid = np.datetime64("2024-01-01T08:00:00") + np.cumsum(rng.integers(0, 5, n)).astype("timedelta64[s]")
+    df = pd.DataFrame({
+        "Prompt_ ID_": [f"{rng.integers(0, 2**32):08x}-8d9e-11f0-b4d9-0a623090504c" for _ in range(n)],
+        "Timestamp_": pd.Series(tid).dt.strftime("%Y-%m-%d %H:%M:%S"),
+        "Customer_ Name_": val([f"Kund {i} AB" for i in range(23)]),
+        "Customer_ Segment_": val(["Consultancy", "Enterprise", "Public Sector", "Startup"]),
+        "City_": val(["Stockholm", "Oslo", "Copenhagen", "Helsinki", "Berlin", "London", "Östersund"]),
+        "Country_": val(["Sweden", "Norway", "Denmark", "Finland", "Germany", "UK"]),
+        "Agent_ Name_": val(["agent-analytics", "agent-auditor", "agent-scheduler", "agent-support",
+                             "agent-writer"]),
+        "LLM_ Model_": val(kombinationer),
+        "Compute_ Cost_ EUR_": np.round(rng.gamma(2, 0.005, n), 4),
+        "Customer_ Price_ EUR_": np.round(rng.gamma(2, 0.009, n), 4),
+        "Response_ Time_": rng.integers(100, 5000, n),
+        "Use_ Case_": val(["Reporting", "Data Analysis", "Customer Support", "Writing"], 0.08),
+        "Prompt_ Length_": rng.integers(10, 500, n),
+        "Access_ Method_": val(["Web", "App", "Plugin", "API"], 0.02),
+    })
+    df.to_csv(sokvag, index=False)
+
+
+def som_notebooken(sokvag: str) -> pd.DataFrame:
+    df = pd.read_csv(sokvag)
+    df = df.rename(columns=KOLUMNNAMN)
+    for col, dtype in SCHEMA.items():
+        if col not in df.columns:
+            continue
+        if "datetime" in dtype:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        else:
+            df[col] = df[col].astype(dtype, errors="ignore")
+    return df
+
+
+SATT = {
+    "notebook": lambda sokvag, katalog: som_notebooken(sokvag),
+    "csv": lambda sokvag, katalog: las_csv(sokvag),
+    "kall": lambda sokvag, katalog: las_agent_data(sokvag, katalog=katalog),
+    "varm": lambda sokvag, katalog: las_agent_data(sokvag, katalog=katalog),
+    "3 kolumner": lambda sokvag, katalog: las_agent_data(sokvag, TRE_KOLUMNER, katalog=katalog),
+    "3 kol. csv": lambda sokvag, katalog: las_csv(sokvag, TRE_KOLUMNER),
+}
+
+
+def toppminne_kib() -> int:
+    """Processens högsta RSS. VmHWM nollställs vid exec, till skillnad från ru_maxrss."""
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(rad.split()[1]) for rad in f if rad.startswith("VmHWM:"))
+    except OSError:  # inte Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def kor_ett(satt: str, sokvag: str, katalog: str):
+    """Körs i en egen process: skriver tid, toppminne utöver importerna och tabellens storlek."""
+    fore = toppminne_kib()
+    t0 = time.perf_counter()
+    df = SATT[satt](sokvag, katalog)
+    tid = time.perf_counter() - t0
+    topp = toppminne_kib() - fore
+    print(tid, topp / 1024, df.memory_usage(deep=True).sum() / 2**20)
+
+
+def main(n: int):
+    with tempfile.TemporaryDirectory() as katalog:
+        sokvag = os.path.join(katalog, "agent_data.csv")
+        skriv_syntetisk(sokvag, n)
+        cache = os.path.join(katalog, "cache")
+        print(f"{n:,} rader, {os.path.getsize(sokvag) / 2**20:.0f} MiB csv")
+        print(f"{'':<12}{'tid s':>8}{'toppminne MiB':>15}{'tabell MiB':>12}")
+        for satt in SATT:
+            if satt == "kall":
+                shutil.rmtree(cache, ignore_errors=True)
+            ut = subprocess.run([sys.executable, __file__, "--kor", satt, sokvag, cache],
+                                capture_output=True, text=True, check=True).stdout.split()
+            tid, topp, tabell = map(float, ut)
+            print(f"{satt:<12}{tid:>8.2f}{topp:>15.0f}{tabell:>12.1f}")
+
+        facit = som_notebooken(sokvag)
+        laddad = las_agent_data(sokvag, katalog=cache)
+        pd.testing.assert_frame_equal(laddad, facit[list(SCHEMA)], check_categorical=False)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--kor"]:
+        kor_ett(*sys.argv[2:5])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else RADER)
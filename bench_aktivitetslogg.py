@@ -0,0 +1,187 @@
+"""
+Benchmarksvit för Aktivitetsloggens heta vägar.
+
+Varje steg körs i en egen process på en seedad syntetisk historik
+(aktivitetslogg_syntetisk) så att toppminnet (peak RSS) gäller just det
+steget. Resultatet skrivs som JSON så att två körningar kan jämföras.
+
+Kör:
+    python bench_aktivitetslogg.py                          # 10^3, 10^4, 10^5 serier
+    python bench_aktivitetslogg.py --storlekar 1000 10000000
+    python bench_aktivitetslogg.py --ut ny.json --jamfor gammal.json
+
+Steg:
+    spara_session      CLI-/GUI-sparningen (App.spara_och_avsluta anropar
+                       samma spara_session) mot en logg med N serier
+    build_master_rows  per session
+    build_session_row  per session
+    rows_to_csv_bytes  webbappens två nedladdningar per session
+    sammanfattning_df  webbappens DataFrame-summering per session
+    poangsatt          hela historiken i ett vektoriserat svep
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from aktivitetslogg_lagring import spara_session
+from aktivitetslogg_poang import (
+    FALT_MASTER, FALT_SESSION, build_master_rows, build_session_row, poangsatt,
+    session_id_fran_antal,
+)
+from aktivitetslogg_sammanfattning import rows_to_csv_bytes, sammanfattning_df
+from aktivitetslogg_syntetisk import generera_sessioner, skriv_csv_filer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STORLEKAR = [10**3, 10**4, 10**5]
+MAX_SPARNINGAR = 1000      # spara_session går mot disk, mät ett urval
+MAX_PER_SESSION = 20_000   # per-session-steg: tak på antal mätta sessioner
+REGRESSIONSGRANS = 1.2     # 20 % långsammare räknas som regression
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB på Linux, byte på macOS
+    return rss / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def _percentiler(latenser) -> dict:
+    a = np.asarray(latenser) * 1e6
+    return {f"p{p}_us": float(np.percentile(a, p)) for p in (50, 90, 99)} | {"max_us": float(a.max())}
+
+
+def _per_session(sessioner, f):
+    latenser = []
+    for s in sessioner:
+        t0 = time.perf_counter()
+        f(s)
+        latenser.append(time.perf_counter() - t0)
+    return latenser
+
+
+def _steg(namn: str, antal_serier: int) -> dict:
+    """Körs i en egen process."""
+    # Per-session-stegen mäter ett urval; bara poangsatt behöver hela historiken
+    sessioner = list(islice(generera_sessioner(antal_serier),
+                            MAX_SPARNINGAR if namn == "spara_session" else MAX_PER_SESSION))
+    enheter = "sessioner"
+
+    if namn == "spara_session":
+        with tempfile.TemporaryDirectory() as katalog:
+            master = os.path.join(katalog, "aktivitetslogg.csv")
+            session = os.path.join(katalog, "aktivitetslogg_sessioner.csv")
+            skriv_csv_filer(antal_serier, master, session)
+            db = os.path.join(katalog, "saknas.db")
+            latenser = _per_session(
+                sessioner,
+                lambda s: spara_session(*s, master_fil=master, session_fil=session, db_fil=db),
+            )
+    elif namn == "build_master_rows":
+        latenser = _per_session(sessioner, lambda s: build_master_rows(*s))
+    elif namn == "build_session_row":
+        latenser = _per_session(sessioner, lambda s: build_session_row(*s))
+    elif namn == "rows_to_csv_bytes":
+        latenser = _per_session(sessioner, lambda s: (
+            rows_to_csv_bytes(build_master_rows(*s), FALT_MASTER),
+            rows_to_csv_bytes(build_session_row(*s), FALT_SESSION),
+        ))
+    elif namn == "sammanfattning_df":
+        latenser = _per_session(sessioner, lambda s: sammanfattning_df(s[8], s[3], s[6]))
+    elif namn == "poangsatt":
+        antal, poang, alder, vklass = [], [], [], []
+        for s in generera_sessioner(antal_serier):
+            antal.append(len(s[8]))
+            poang.extend(s[8])
+            alder.append(s[3])
+            vklass.append(s[6])
+        sid = session_id_fran_antal(antal)
+        poang = np.array(poang, dtype=np.int16)
+        alder = np.array(alder, dtype=np.int16)[sid]
+        vklass = np.array(vklass)[sid]
+        t0 = time.perf_counter()
+        poangsatt(poang, alder, vklass, sid)
+        latenser = [time.perf_counter() - t0]
+        enheter = "serier"
+    else:
+        raise ValueError(namn)
+
+    total = float(sum(latenser))
+    antal_enheter = len(latenser) if enheter == "sessioner" else antal_serier
+    return {
+        "steg": namn,
+        "serier": antal_serier,
+        "matta": antal_enheter,
+        "enhet": enheter,
+        "tid_s": total,
+        "per_sekund": antal_enheter / total if total else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        **_percentiler(latenser),
+    }
+
+
+STEG = ["spara_session", "build_master_rows", "build_session_row",
+        "rows_to_csv_bytes", "sammanfattning_df", "poangsatt"]
+
+
+def jamfor(nu: list[dict], tidigare: list[dict]) -> list[str]:
+    gamla = {(r["steg"], r["serier"]): r for r in tidigare}
+    regressioner = []
+    for r in nu:
+        g = gamla.get((r["steg"], r["serier"]))
+        if not g or not g.get("p50_us") or not r.get("p50_us"):
+            continue
+        kvot = r["p50_us"] / g["p50_us"]
+        if kvot > REGRESSIONSGRANS:
+            regressioner.append(f"{r['steg']} @ {r['serier']}: p50 {g['p50_us']:.1f} -> {r['p50_us']:.1f} µs ({kvot:.2f}x)")
+    return regressioner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark av Aktivitetslogg.")
+    parser.add_argument("--storlekar", type=int, nargs="+", default=STORLEKAR)
+    parser.add_argument("--steg", nargs="+", choices=STEG, default=STEG)
+    parser.add_argument("--ut", default="bench_resultat.json")
+    parser.add_argument("--jamfor", metavar="JSON", help="tidigare resultatfil att jämföra med")
+    args = parser.parse_args()
+
+    resultat = []
+    for n in args.storlekar:
+        for namn in args.steg:
+            # max_workers=1 och en ny pool per steg: ett rent toppminne per steg
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                r = pool.submit(_steg, namn, n).result()
+            resultat.append(r)
+            print(f"{namn:>18} {n:>9} serier: {r['per_sekund']:>12,.0f} {r['enhet']}/s  "
+                  f"p50 {r['p50_us']:>9.1f} µs  p99 {r['p99_us']:>9.1f} µs  "
+                  f"RSS {r['peak_rss_mb'] or 0:>6.0f} MB")
+
+    with open(args.ut, "w", encoding="utf-8") as f:
+        json.dump({"python": sys.version, "plattform": platform.platform(),
+                   "tidpunkt": time.strftime("%Y-%m-%dT%H:%M:%S"), "resultat": resultat},
+                  f, indent=2, ensure_ascii=False)
+    print(f"Resultat sparat i '{args.ut}'.")
+
+    if args.jamfor:
+        with open(args.jamfor, encoding="utf-8") as f:
+            regressioner = jamfor(resultat, json.load(f)["resultat"])
+        for r in regressioner:
+            print("REGRESSION:", r)
+        if regressioner:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Benchmark: bulkinläsning med Aktivitetslogg.py --batch.
+
+Kör:
+    python bench_batch.py            # 10^6 serier
+    python bench_batch.py 5000000
+"""
+import os
+import sys
+import tempfile
+import time
+
+from aktivitetslogg_batch import importera
+from aktivitetslogg_syntetisk import skriv_csv_filer
+
+ANTAL_SERIER = 10**6
+
+
+def main(antal_serier: int):
+    with tempfile.TemporaryDirectory() as katalog:
+        indata = os.path.join(katalog, "indata.csv")
+        skriv_csv_filer(antal_serier, os.path.join(katalog, "indata_master.csv"), indata)
+
+        master = os.path.join(katalog, "aktivitetslogg.csv")
+        session = os.path.join(katalog, "aktivitetslogg_sessioner.csv")
+        with open(indata, newline="", encoding="utf-8") as f, \
+             open(os.path.join(katalog, "avvisade.jsonl"), "w", encoding="utf-8") as avvisade:
+            t0 = time.perf_counter()
+            sessioner, serier, fel = importera(f, "csv", avvisade, master, session,
+                                               os.path.join(katalog, "saknas.db"))
+            dt = time.perf_counter() - t0
+
+    print(f"{sessioner} sessioner, {serier} serier, {fel} avvisade på {dt:.2f} s")
+    print(f"{serier / dt * 60:,.0f} serier/minut")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else ANTAL_SERIER)
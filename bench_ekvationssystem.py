@@ -0,0 +1,69 @@
+"""
+Benchmark: många små ekvationssystem i en stapel (ekvationssystem) mot en
+Python-loop med ett numpy-anrop per system.
+
+    kvadratiska      10^4 system 3x3, los(stapel) mot np.linalg.solve i loop
+    överbestämda     10^4 system 4x3 (som uppgift 10.2.4), mot np.linalg.lstsq i loop
+    samma A          ett 4x3-system med 10^4 högerled: faktorisera en gång och
+                     lös ett i taget eller alla på en gång, mot lstsq per högerled
+
+Kör:
+    python bench_ekvationssystem.py          # 10 000 system
+    python bench_ekvationssystem.py 100000
+"""
+import sys
+import time
+
+import numpy as np
+
+from ekvationssystem import Faktorisering, los
+
+ANTAL = 10_000
+
+
+def tid(f, upprepa: int = 3):
+    bast = float("inf")
+    for _ in range(upprepa):
+        t0 = time.perf_counter()
+        resultat = f()
+        bast = min(bast, time.perf_counter() - t0)
+    return bast, resultat
+
+
+def rad(namn, t_loop, t_stapel):
+    print(f"{namn:<40}{t_loop * 1000:>10.1f}{t_stapel * 1000:>10.1f}{t_loop / t_stapel:>8.0f}x")
+
+
+def main(k: int):
+    rng = np.random.default_rng(0)
+    print(f"{k:,} system")
+    print(f"{'':<40}{'loop ms':>10}{'stapel ms':>10}{'faktor':>9}")
+
+    A = rng.normal(size=(k, 3, 3))
+    b = rng.normal(size=(k, 3))
+    t_loop, facit = tid(lambda: [np.linalg.solve(a, bb) for a, bb in zip(A, b)])
+    t_stapel, svar = tid(lambda: los(A, b))
+    assert np.allclose(svar.x, facit, atol=1e-6)
+    rad("kvadratiska 3x3", t_loop, t_stapel)
+
+    A = rng.normal(size=(k, 4, 3))
+    b = rng.normal(size=(k, 4))
+    t_loop, facit = tid(lambda: [np.linalg.lstsq(a, bb, rcond=None) for a, bb in zip(A, b)])
+    t_stapel, svar = tid(lambda: los(A, b))
+    assert np.allclose(svar.x, [f[0] for f in facit])
+    assert np.allclose(svar.residual ** 2, [f[1][0] for f in facit])
+    rad("överbestämda 4x3", t_loop, t_stapel)
+
+    A = np.array([[3, 2, 4], [2, 3, 8], [4, 1, 3], [7, 1, 5]], dtype=float)
+    B = rng.normal(size=(4, k))
+    t_loop, facit = tid(lambda: [np.linalg.lstsq(A, B[:, j], rcond=None)[0] for j in range(k)])
+    F = Faktorisering(A)
+    t_en_i_taget, _ = tid(lambda: [F.los(B[:, j]) for j in range(k)])
+    t_alla, svar = tid(lambda: Faktorisering(A).los(B))
+    assert np.allclose(svar.x.T, facit)
+    rad("samma A, en faktorisering, ett i taget", t_loop, t_en_i_taget)
+    rad("samma A, en faktorisering, alla på en gång", t_loop, t_alla)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else ANTAL)
@@ -0,0 +1,66 @@
+"""
+Benchmark: indexerad historikfråga mot full skanning av aktivitetslogg.csv.
+
+Kör:
+    python bench_historik.py                # 10^5, 10^6 och 10^7 serier
+    python bench_historik.py 100000 1000000 # valfria storlekar
+"""
+import os
+import sys
+import tempfile
+import time
+
+from aktivitetslogg_index import Historikindex, sok_fullskanning
+from aktivitetslogg_syntetisk import generera_sessioner, skriv_csv_filer
+
+STORLEKAR = [10**5, 10**6, 10**7]
+ANTAL_FRAGOR = 3
+
+
+def fragor(antal_serier: int, antal: int):
+    """Plockar frågor (namn, plats, månad) ur den genererade datan."""
+    valda = []
+    steg = max(1, antal_serier // 8 // antal)
+    for i, (datum, _, namn, _, plats, *_rest) in enumerate(generera_sessioner(antal_serier)):
+        if i % steg == 0:
+            valda.append({"namn": namn, "plats": plats,
+                          "fran": datum[:8] + "01", "till": datum[:8] + "31"})
+            if len(valda) == antal:
+                break
+    return valda
+
+
+def tid(f):
+    t0 = time.perf_counter()
+    resultat = f()
+    return time.perf_counter() - t0, resultat
+
+
+def main(storlekar):
+    print(f"{'serier':>10} {'bygg index':>11} {'indexerad':>11} {'fullskan':>11} {'faktor':>8} {'träffar':>8}")
+    for n in storlekar:
+        with tempfile.TemporaryDirectory() as katalog:
+            master = os.path.join(katalog, "aktivitetslogg.csv")
+            session = os.path.join(katalog, "aktivitetslogg_sessioner.csv")
+            skriv_csv_filer(n, master, session)
+
+            with Historikindex(master, os.path.join(katalog, "index.db")) as ix:
+                t_bygg, _ = tid(ix.komplettera)
+                t_ix = t_full = 0.0
+                traffar = 0
+                for q in fragor(n, ANTAL_FRAGOR):
+                    dt, rader = tid(lambda: list(ix.sok(**q)))
+                    t_ix += dt
+                    dt, rader_full = tid(lambda: list(sok_fullskanning(master, **q)))
+                    t_full += dt
+                    assert rader == rader_full
+                    traffar += len(rader)
+
+        t_ix /= ANTAL_FRAGOR
+        t_full /= ANTAL_FRAGOR
+        print(f"{n:>10} {t_bygg:>10.2f}s {t_ix * 1000:>9.2f}ms {t_full * 1000:>9.0f}ms "
+              f"{t_full / t_ix:>7.0f}x {traffar:>8}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or STORLEKAR)
@@ -0,0 +1,83 @@
+"""
+Benchmark: kall mot varm inläsning av matriser ur Excel (las_matriser).
+
+Bygger arbetsböcker med samma upplägg som övningsfilen (namn ovanför,
+matriser bredvid varandra med en tom kolumn emellan) och mäter:
+
+    read_excel   pd.read_excel av hela området, som i notebooken
+    kall         las_matriser utan cache (tolkar xlsx och skriver .npy)
+    varm         las_matriser med cache (hash + minnesmappade .npy)
+
+Kör:
+    python bench_matriser.py
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from Vektorer_o_matriser import CACHEKATALOG, las_matriser
+
+# (antal matriser, rader, kolumner)
+FALL = [(6, 2, 3), (20, 50, 50), (10, 500, 40)]
+UPPREPA = 5
+
+
+def skriv_arbetsbok(sokvag: str, antal: int, rader: int, kolumner: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    bok = Workbook(write_only=True)
+    ark = bok.create_sheet("Blad1")
+    matriser = [rng.integers(-9, 10, (rader, kolumner)) for _ in range(antal)]
+    ark.append([])
+    ark.append([])
+    rubrik = []
+    for k in range(antal):
+        rubrik += [f"M{k + 1} ="] + [None] * kolumner
+    ark.append(rubrik)
+    for i in range(rader):
+        rad = []
+        for m in matriser:
+            rad += m[i].tolist() + [None]
+        ark.append(rad)
+    bok.save(sokvag)
+    return matriser
+
+
+def tid(f, upprepa: int = UPPREPA):
+    bast = float("inf")
+    for _ in range(upprepa):
+        t0 = time.perf_counter()
+        f()
+        bast = min(bast, time.perf_counter() - t0)
+    return bast
+
+
+def main():
+    print(f"{'matriser':>9} {'storlek':>9} {'fil kB':>8} {'read_excel':>11} {'kall':>9} {'varm':>9} {'faktor':>8}")
+    for antal, rader, kolumner in FALL:
+        with tempfile.TemporaryDirectory() as katalog:
+            sokvag = os.path.join(katalog, "arbetsbok.xlsx")
+            facit = skriv_arbetsbok(sokvag, antal, rader, kolumner)
+            cache = os.path.join(katalog, CACHEKATALOG)
+
+            t_pandas = tid(lambda: pd.read_excel(sokvag, sheet_name="Blad1", skiprows=3, header=None).values, 1)
+
+            def kall():
+                shutil.rmtree(cache, ignore_errors=True)
+                return las_matriser(sokvag, "Blad1")
+            t_kall = tid(kall, 2)
+            t_varm = tid(lambda: las_matriser(sokvag, "Blad1"))
+
+            laddade = las_matriser(sokvag, "Blad1")
+            assert all(np.array_equal(laddade[f"M{k + 1}"], m) for k, m in enumerate(facit))
+            print(f"{antal:>9} {f'{rader}x{kolumner}':>9} {os.path.getsize(sokvag) / 1024:>8.0f} "
+                  f"{t_pandas * 1000:>9.1f}ms {t_kall * 1000:>7.1f}ms {t_varm * 1000:>7.2f}ms "
+                  f"{t_kall / t_varm:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
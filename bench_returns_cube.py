@@ -0,0 +1,122 @@
+"""
+Benchmark: analytics cube (lindhe_returns_cube) vs a full pandas groupby.
+
+Loads N synthetic returns into a fresh database (the store keeps the cube
+up to date while inserting), then compares for a few dashboard views:
+
+    cube      summary() over the cube cells
+    pandas    read every return from the database and groupby (what a
+              dashboard without the cube would do on every rerun)
+    groupby   groupby only, on a frame already in memory
+
+and measures single registrations (store.add, cube cell included) and a
+full rebuild of the cube.
+
+Run:
+    python bench_returns_cube.py            # 1 000 000 returns
+    python bench_returns_cube.py 200000
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from lindhe_returns_cube import (
+    DIMENSIONS, SOURCE_COLUMNS, brute_force, cells, check, cuboid_for, groupby, rebuild, summary,
+)
+from lindhe_returns_options import ENUM_FIELDS
+from lindhe_returns_store import COLUMNS, ReturnsStore
+
+RETURNS = 1_000_000
+PRODUCTS = 50
+CHUNK = 100_000
+SINGLE_ADDS = 500
+
+VIEWS = [
+    ["Product"],
+    ["Issue", "Month"],
+    ["Investigation result"],
+    ["Product", "Investigation result"],
+    ["Product", "Issue", "Customer", "Gen 3", "Month"],
+]
+
+
+def synthetic_rows(n: int, seed: int = 0):
+    """Tuples in COLUMNS order, about 60 % with both Issue Date and Closure Date."""
+    rng = np.random.default_rng(seed)
+    cols = {c: np.full(n, None, dtype=object) for c in COLUMNS}
+    cols["return_id"] = np.char.mod("%08x", np.arange(n)).astype(object)
+    day = np.datetime64("2023-01-01") + rng.integers(0, 730, n)
+    cols["date"] = day.astype(str).astype(object)
+    cols["serial_number"] = np.char.mod("LH%08d", rng.integers(0, 10**7, n)).astype(object)
+    cols["product"] = np.char.mod("Product %d", rng.integers(0, PRODUCTS, n)).astype(object)
+    for name, column in (("Issue", "issue"), ("Customer", "customer"), ("Gen 3", "gen"),
+                         ("Investigation result", "investigation"), ("Status", "status")):
+        allowed = np.asarray(ENUM_FIELDS[name], dtype=object)
+        cols[column] = allowed[rng.integers(0, len(allowed), n)]
+    dated = rng.random(n) < 0.6
+    issued = day - rng.integers(0, 30, n)
+    closed = day + rng.integers(1, 120, n)
+    cols["issue_date"][dated] = issued[dated].astype(str)
+    cols["closure_date"][dated] = closed[dated].astype(str)
+    cols["frequent_claim"] = np.zeros(n, dtype=int).astype(object)
+    return list(zip(*(cols[c].tolist() for c in COLUMNS)))
+
+
+def timed(f, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = f()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main(n: int):
+    rows = synthetic_rows(n)
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReturnsStore(os.path.join(directory, "returns.db"))
+        con = store.connection()
+
+        t0 = time.perf_counter()
+        for i in range(0, n, CHUNK):
+            store.add_rows(rows[i:i + CHUNK])
+        load = time.perf_counter() - t0
+        print(f"Loaded {n:,} returns in {load:.1f} s (cube kept up to date), {cells(con):,} detail cells")
+
+        t_rebuild, _ = timed(lambda: rebuild(con), repeat=1)
+        print(f"Full rebuild of the cube: {t_rebuild:.2f} s")
+
+        frame = pd.read_sql_query(f"SELECT {', '.join(SOURCE_COLUMNS)} FROM returns", con)
+        print(f"\n{'view':<48}{'cuboid':<38}{'groups':>8}{'cube':>10}{'pandas':>10}{'groupby':>10}")
+        for by in VIEWS:
+            t_cube, result = timed(lambda: summary(con, by))
+            t_pandas, _ = timed(lambda: brute_force(con, by), repeat=1)
+            t_groupby, _ = timed(lambda: groupby(frame, by))
+            cuboid = cuboid_for(DIMENSIONS[d] for d in by)
+            print(f"{' x '.join(by):<48}{cuboid:<38}{len(result):>8,}{t_cube * 1000:>8.1f}ms"
+                  f"{t_pandas * 1000:>8.0f}ms{t_groupby * 1000:>8.0f}ms")
+
+        record = dict(zip(
+            ["ID", "Date", "Serial Number", "Product", "Issue", "Customer", "Issue Date", "Closure Date"],
+            ["", "2024-06-01", "LH00000001", "Product 1", "Normal wear", "Customer A", "2024-05-20", "2024-06-10"],
+        ))
+        latencies = []
+        for i in range(SINGLE_ADDS):
+            record["ID"] = f"b{i:07x}"
+            t0 = time.perf_counter()
+            store.add(record)
+            latencies.append(time.perf_counter() - t0)
+        print(f"\nstore.add with cube update: median {np.median(latencies) * 1000:.2f} ms, "
+              f"p99 {np.percentile(latencies, 99) * 1000:.2f} ms ({SINGLE_ADDS} registrations)")
+
+        differences = check(con)
+        print("Cube matches a full recount." if not differences else f"{len(differences)} differences!")
+        store.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else RETURNS)
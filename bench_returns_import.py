@@ -0,0 +1,71 @@
+"""
+Benchmark: bulk import of returns (lindhe_returns_import).
+
+Generates a batch of N returns against a synthetic serial catalogue, with
+a few percent of invalid enum values, missing required fields, unknown
+serials and duplicated rows, and imports it into a fresh database.
+
+Run:
+    python bench_returns_import.py            # 100 000 rows
+    python bench_returns_import.py 500000
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench_serials import synthetic
+from lindhe_returns_import import import_batch
+from lindhe_returns_options import ENUM_FIELDS
+from lindhe_returns_store import ReturnsStore
+
+ROWS = 100_000
+
+
+def synthetic_batch(n: int, catalog, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    serials = catalog.serials[rng.integers(0, len(catalog), n)].astype(str)
+    df = pd.DataFrame({
+        "Date": (np.datetime64("2024-01-01") + rng.integers(0, 600, n)).astype(str),
+        "Serial Number": serials,
+    })
+    for name, allowed in ENUM_FIELDS.items():
+        df[name] = np.asarray(allowed, dtype=object)[rng.integers(0, len(allowed), n)]
+    df["Time on patient (months)"] = rng.integers(0, 60, n).astype(str)
+    df["User weight"] = np.round(rng.normal(80, 15, n), 1).astype(str)
+
+    # Errors and duplicates
+    bad = rng.random(n)
+    df.loc[bad < 0.01, "Issue"] = "Exploded"
+    df.loc[(bad >= 0.01) & (bad < 0.02), "Customer"] = ""
+    df.loc[(bad >= 0.02) & (bad < 0.03), "Serial Number"] = "XX000"
+    dup = rng.integers(0, n, n // 50)
+    return pd.concat([df, df.iloc[dup]], ignore_index=True)
+
+
+def main(n: int):
+    catalog = synthetic(10**6)
+    batch = synthetic_batch(n, catalog)
+    with tempfile.TemporaryDirectory() as directory:
+        store = ReturnsStore(os.path.join(directory, "returns.db"))
+        t0 = time.perf_counter()
+        result = import_batch(batch, store, catalog)
+        dt = time.perf_counter() - t0
+        print(f"{len(batch):,} rows in {dt:.2f} s ({len(batch) / dt:,.0f} rows/s): "
+              f"{result.imported:,} imported, {len(result.rejects):,} rejected, "
+              f"{result.repeats:,} repeat serials")
+        print(result.rejects["Reasons"].value_counts().to_string())
+
+        t0 = time.perf_counter()
+        again = import_batch(batch, store, catalog)
+        dt = time.perf_counter() - t0
+        print(f"Re-import of the same batch: {again.imported} imported, "
+              f"{len(again.rejects):,} rejected in {dt:.2f} s")
+        store.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else ROWS)
@@ -0,0 +1,95 @@
+"""
+Benchmark: dagligt sammandrag per skjutledare mot ett mejl per session.
+
+En syntetisk tävlingsdag med N sessioner (samma dag, några platser och
+skjutledare) skickas till en lokal SMTP-server (prov_utkorg.ProvServer)
+på två sätt:
+
+    per session   som webbappen tidigare: ny förbindelse per mejl och två
+                  okomprimerade CSV-bilagor från rows_to_csv_bytes
+    sammandrag    aktivitetslogg_sammandrag.skicka_dag: ett mejl per
+                  skjutledare med zip- eller tar.gz-bilaga, en förbindelse
+
+Kör:
+    python bench_sammandrag.py             # 300 sessioner
+    python bench_sammandrag.py 2000
+"""
+import csv
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.message import EmailMessage
+
+from aktivitetslogg_poang import FALT_MASTER, FALT_SESSION, build_master_rows, build_session_row
+from aktivitetslogg_sammandrag import skicka_dag
+from aktivitetslogg_sammanfattning import rows_to_csv_bytes
+from aktivitetslogg_syntetisk import generera_sessioner
+from aktivitetslogg_utkorg import SmtpForbindelse
+from prov_utkorg import ProvServer
+
+ANTAL_SESSIONER = 300
+DAG = "2025-06-14"
+
+
+def tavlingsdag(antal: int) -> list[tuple]:
+    # Alla sessioner samma dag; plats och skjutledare som i generatorn
+    return [(DAG, *s[1:]) for s, _ in zip(generera_sessioner(10**9, antal_dagar=1), range(antal))]
+
+
+def per_session(sessioner, cfg) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    storlek = 0
+    for i, s in enumerate(sessioner):
+        msg = EmailMessage()
+        msg["Subject"] = f"Aktivitetslogg {s[0]} {s[1]}"
+        msg["From"] = "klubben@example.com"
+        msg["To"] = f"skytt{i}@example.com"
+        msg.set_content(f"Namn: {s[2]}\n")
+        msg.add_attachment(rows_to_csv_bytes(build_master_rows(*s), FALT_MASTER),
+                           maintype="text", subtype="csv", filename="aktivitetslogg.csv")
+        msg.add_attachment(rows_to_csv_bytes(build_session_row(*s), FALT_SESSION),
+                           maintype="text", subtype="csv", filename="aktivitetslogg_sessioner.csv")
+        data = msg.as_bytes()
+        storlek += len(data)
+        forbindelse = SmtpForbindelse(cfg)
+        forbindelse.skicka(msg["From"], msg["To"], data)
+        forbindelse.stang()
+    return time.perf_counter() - t0, storlek
+
+
+def main(antal: int):
+    server = ProvServer(0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cfg = {"host": "127.0.0.1", "port": server.server_address[1], "starttls": False,
+           "from": "klubben@example.com"}
+    sessioner = tavlingsdag(antal)
+    ledare = len({s[5] for s in sessioner})
+
+    dt, storlek = per_session(sessioner, cfg)
+    print(f"{'per session':>16}: {antal:>5} mejl, {storlek / 1024:>9.1f} kB, "
+          f"{dt:>6.2f} s, {server.forbindelser} förbindelser")
+
+    with tempfile.TemporaryDirectory() as katalog:
+        session_fil = os.path.join(katalog, "aktivitetslogg_sessioner.csv")
+        with open(session_fil, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=FALT_SESSION)
+            w.writeheader()
+            w.writerows(build_session_row(*s) for s in sessioner)
+
+        for format in ("zip", "gz"):
+            server.mottagna.clear()
+            server.forbindelser = 0
+            t0 = time.perf_counter()
+            ids = skicka_dag(DAG, cfg, {"standard": "ledare@example.com"}, session_fil,
+                             os.path.join(katalog, f"utkorg_{format}.db"), format)
+            dt = time.perf_counter() - t0
+            storlek = sum(len(data) for _, data in server.mottagna)
+            print(f"{'sammandrag ' + format:>16}: {len(ids):>5} mejl, {storlek / 1024:>9.1f} kB, "
+                  f"{dt:>6.2f} s, {server.forbindelser} förbindelser ({ledare} skjutledare)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else ANTAL_SESSIONER)
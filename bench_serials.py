@@ -0,0 +1,80 @@
+"""
+Benchmark: serial lookup and prefix autocomplete in lindhe_serials.
+
+Builds a synthetic catalogue ("LH" + 8 digits, random distinct serials,
+200 products), saves it, reloads it memory-mapped and times exact lookups
+and top-10 completions for random prefixes of 3-9 characters.
+
+Run:
+    python bench_serials.py                    # 10^6 and 10^7 serials
+    python bench_serials.py 1000000
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from lindhe_serials import SerialCatalog
+
+SIZES = [10**6, 10**7]
+QUERIES = 20_000
+
+
+def synthetic(n: int, seed: int = 0) -> SerialCatalog:
+    rng = np.random.default_rng(seed)
+    numbers = np.unique(rng.integers(0, 10**8, int(n * 1.1)))[:n]
+    rng.shuffle(numbers)
+    numbers = np.sort(numbers[:n])
+    # Digits as ASCII bytes, then view each row as one fixed-width string
+    digits = (numbers[:, None] // 10 ** np.arange(7, -1, -1)) % 10 + ord("0")
+    raw = np.empty((len(numbers), 10), dtype=np.uint8)
+    raw[:, 0], raw[:, 1] = ord("L"), ord("H")
+    raw[:, 2:] = digits
+    serials = raw.view("S10").ravel()
+    codes = rng.integers(0, 200, len(serials)).astype(np.uint32)
+    return SerialCatalog(serials, codes, [f"Product {i}" for i in range(200)])
+
+
+def percentiles(latencies) -> str:
+    a = np.asarray(latencies) * 1e6
+    return "  ".join(f"p{p} {np.percentile(a, p):6.1f} µs" for p in (50, 90, 99))
+
+
+def main(sizes):
+    rng = np.random.default_rng(1)
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            base = os.path.join(directory, "serials")
+            synthetic(n).save(base)
+
+            t0 = time.perf_counter()
+            catalog = SerialCatalog.load(base)
+            t_load = time.perf_counter() - t0
+
+            picks = rng.integers(0, n, QUERIES)
+            known = [catalog.serials[i].decode() for i in picks]
+            lookups = []
+            for s in known:
+                t0 = time.perf_counter()
+                catalog.product(s)
+                lookups.append(time.perf_counter() - t0)
+
+            lengths = rng.integers(3, 10, QUERIES)
+            prefixes = [s[:length] for s, length in zip(known, lengths)]
+            completions = []
+            for p in prefixes:
+                t0 = time.perf_counter()
+                catalog.complete(p, 10)
+                completions.append(time.perf_counter() - t0)
+
+            size_mb = os.path.getsize(base + ".npy") / 1e6 + os.path.getsize(base + "_products.npy") / 1e6
+            print(f"{n:>10,} serials  ({size_mb:.0f} MB on disk, load {t_load * 1000:.2f} ms)")
+            print(f"{'lookup':>12}: {percentiles(lookups)}")
+            print(f"{'complete k=10':>12}: {percentiles(completions)}")
+            del catalog
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or SIZES)
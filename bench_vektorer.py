@@ -0,0 +1,118 @@
+"""
+Benchmark: Vektorer_o_matriser mot de rena Python-versionerna från
+uppgift 10.1.3 (math.sqrt(sum(x**2 for x in v)) och listbyggd skillnad).
+
+Mäter för N vektorer med d = 4 komponenter:
+    normer       ||v|| för varje vektor
+    avstånd      ||v1 - v2|| för N par
+    parvis       alla N x N avstånd (ren Python bara för små N)
+    närmaste     närmaste granne för varje vektor, blockvis, med toppminne
+
+och sist noggrannheten i float32 för vektorer nära origo och förskjutna
+1000 enheter, mot avstånd räknade direkt i float64.
+
+Kör:
+    python bench_vektorer.py                 # N = 10^3 ... 10^6
+    python bench_vektorer.py 1000 100000     # valfria storlekar
+"""
+import math
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from Vektorer_o_matriser import avstand, narmaste, normer, parvisa_avstand
+
+STORLEKAR = [10**3, 10**4, 10**5, 10**6]
+DIMENSION = 4
+MAX_PARVIS_PYTHON = 2_000   # ren Python parvis är O(N²) i tolken
+MAX_PARVIS_NUMPY = 10_000   # hela N x N-matrisen i minnet
+MAX_NARMASTE = 100_000
+NOGGRANNHET_N = 2_000
+FORSKJUTNINGAR = [0, 1000]
+
+
+# ---------- Som i notebooken ----------
+def norm_python(v):
+    return math.sqrt(sum(x**2 for x in v))
+
+
+def avstand_python(v1, v2):
+    v3 = [v1[i] - v2[i] for i in range(len(v1))]
+    return math.sqrt(sum(x**2 for x in v3))
+
+
+def tid(f, upprepa: int = 3):
+    bast = float("inf")
+    for _ in range(upprepa):
+        t0 = time.perf_counter()
+        f()
+        bast = min(bast, time.perf_counter() - t0)
+    return bast
+
+
+def toppminne(f) -> int:
+    tracemalloc.start()
+    try:
+        f()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def rad(namn, n, t_python, t64, t32):
+    python = f"{t_python * 1000:10.1f}" if t_python is not None else f"{'–':>10}"
+    faktor = f"{t_python / t64:8.0f}x" if t_python is not None else f"{'':>9}"
+    print(f"{namn:<10}{n:>10,}{python}{t64 * 1000:10.2f}{t32 * 1000:10.2f}{faktor}")
+
+
+def noggrannhet():
+    """Största felet i parvisa_avstand och andelen rätt närmaste granne i float32."""
+    rng = np.random.default_rng(1)
+    print(f"\n{'float32':<10}{'förskjutn.':>10}{'max fel':>12}{'rätt närmaste':>15}")
+    for forskjutning in FORSKJUTNINGAR:
+        X32 = (rng.random((NOGGRANNHET_N, DIMENSION)) + forskjutning).astype(np.float32)
+        X = X32.astype(np.float64)
+        facit = np.sqrt(((X[:, np.newaxis, :] - X[np.newaxis, :, :]) ** 2).sum(axis=-1))
+        fel = np.abs(parvisa_avstand(X32) - facit).max()
+        ratt = (narmaste(X32)[0] == narmaste(X)[0]).mean()
+        print(f"{'':<10}{forskjutning:>10}{fel:>12.2e}{ratt:>15.1%}")
+        assert fel < 1e-4 and ratt > 0.99, "float32-avstånden har tappat noggrannhet"
+
+
+def main(storlekar):
+    rng = np.random.default_rng(0)
+    print(f"{'':<10}{'N':>10}{'python ms':>10}{'f64 ms':>10}{'f32 ms':>10}{'f64 mot':>9}")
+    for n in storlekar:
+        X = rng.random((n, DIMENSION))
+        Y = rng.random((n, DIMENSION))
+        X32, Y32 = X.astype(np.float32), Y.astype(np.float32)
+        listor_x, listor_y = X.tolist(), Y.tolist()
+        upprepa = 1 if n >= 10**6 else 3
+
+        t_python = tid(lambda: [norm_python(v) for v in listor_x], upprepa)
+        rad("normer", n, t_python, tid(lambda: normer(X)), tid(lambda: normer(X32)))
+        assert np.allclose(normer(X[:1000]), [norm_python(v) for v in listor_x[:1000]])
+
+        t_python = tid(lambda: [avstand_python(a, b) for a, b in zip(listor_x, listor_y)], upprepa)
+        rad("avstånd", n, t_python, tid(lambda: avstand(X, Y)), tid(lambda: avstand(X32, Y32)))
+
+        if n <= MAX_PARVIS_NUMPY:
+            t_python = None
+            if n <= MAX_PARVIS_PYTHON:
+                t_python = tid(lambda: [[avstand_python(a, b) for b in listor_x] for a in listor_x], 1)
+            rad("parvis", n, t_python, tid(lambda: parvisa_avstand(X), 1),
+                tid(lambda: parvisa_avstand(X32), 1))
+
+        if n <= MAX_NARMASTE:
+            rad("närmaste", n, None, tid(lambda: narmaste(X), 1), tid(lambda: narmaste(X32), 1))
+            topp = toppminne(lambda: narmaste(X[:min(n, 10_000)]))
+            # Blocken är lika stora för alla N >= 10^4, så de första 10^4 raderna räcker
+            print(f"{'':<20}toppminne {topp / 2**20:.0f} MiB (hela matrisen skulle vara "
+                  f"{n * n * 8 / 2**20:,.0f} MiB)")
+    noggrannhet()
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or STORLEKAR)
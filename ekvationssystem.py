@@ -0,0 +1,107 @@
+"""
+Linjära ekvationssystem Ax = b, ett eller många på en gång.
+
+Uppgift 10.2.4 skrev bara upp det överbestämda systemet (4 ekvationer, 3
+obekanta) på formen Ax = b. Här löses det, och andra system, så här:
+
+    A = [[3, 2, 4], [2, 3, 8], [4, 1, 3], [7, 1, 5]]
+    b = [7, 4, 11, 9]
+    svar = los(A, b)
+    svar.x, svar.residual, svar.rang, svar.kondition
+
+Kvadratiska system med full rang får den exakta lösningen. Överbestämda
+(eller singulära) system får minsta-kvadratlösningen med minst norm, och
+residualen ||Ax - b|| visar hur väl den passar.
+
+Allt bygger på en faktorisering (SVD) som görs en gång och sedan återanvänds:
+
+    F = Faktorisering(A)         # faktorisera en gång ...
+    F.los(b1); F.los(b2)         # ... lös för många högerled
+    F.los(B)                     # eller alla högerled som kolumner i B
+
+A kan också vara en stapel system med formen (k, m, n). Då faktoriseras
+alla k på en gång och b har formen (k, m) eller (k, m, r).
+
+Dåligt konditionerade system (kondition över KONDITIONSGRANS) ger en
+KonditionsVarning: lösningen kan då ha förlorat de flesta siffrorna.
+"""
+import warnings
+
+import numpy as np
+
+KONDITIONSGRANS = 1e10
+RCOND = None  # relativ gräns för singulärvärden som räknas som noll (None: eps * max(m, n))
+
+
+class KonditionsVarning(UserWarning):
+    pass
+
+
+class Losning:
+    def __init__(self, x: np.ndarray, residual: np.ndarray, rang, kondition):
+        self.x = x                  # (n,) eller (n, r), med stapeldimensionen först om A var en stapel
+        self.residual = residual    # ||Ax - b|| per högerled
+        self.rang = rang
+        self.kondition = kondition
+
+    def __repr__(self):
+        return f"Losning(x={self.x!r}, residual={self.residual!r}, rang={self.rang!r}, kondition={self.kondition!r})"
+
+
+class Faktorisering:
+    """SVD av A (eller en stapel A) som återanvänds för varje högerled."""
+
+    def __init__(self, A, rcond: float | None = RCOND, varna: bool = True):
+        A = np.asarray(A, dtype=np.float64)
+        if A.ndim not in (2, 3):
+            raise ValueError(f"A ska ha formen (m, n) eller (k, m, n), inte {A.shape}")
+        m, n = A.shape[-2:]
+        if m < n:
+            raise ValueError(f"Underbestämt system ({m} ekvationer, {n} obekanta)")
+        self.A = A
+        self.stapel = A.ndim == 3
+        U, s, Vh = np.linalg.svd(A, full_matrices=False)
+        rcond = np.finfo(np.float64).eps * max(m, n) if rcond is None else rcond
+        storst = s[..., :1]
+        behall = s > rcond * storst
+        self.rang = behall.sum(axis=-1)
+        with np.errstate(divide="ignore"):
+            self.kondition = np.where(s[..., -1] > 0, s[..., 0] / s[..., -1], np.inf)
+        if not self.stapel:
+            self.rang, self.kondition = int(self.rang), float(self.kondition)
+        # A⁺ = V diag(1/s) Uᵀ, där små singulärvärden räknas som noll
+        inv_s = np.where(behall, 1 / np.where(behall, s, 1), 0)
+        self._Ut = np.swapaxes(U, -1, -2)
+        self._V_inv_s = np.swapaxes(Vh, -1, -2) * inv_s[..., np.newaxis, :]
+        if varna:
+            self._varna()
+
+    def _varna(self):
+        daliga = np.atleast_1d(self.kondition > KONDITIONSGRANS)
+        if daliga.any():
+            vilka = (f"{int(daliga.sum())} av {daliga.size} system är dåligt konditionerade" if self.stapel
+                     else "Systemet är dåligt konditionerat")
+            warnings.warn(f"{vilka} (kondition > {KONDITIONSGRANS:g}); lösningen kan vara mycket osäker",
+                          KonditionsVarning, stacklevel=3)
+
+    def los(self, b) -> Losning:
+        """Löser för högerledet b: (m,) eller (m, r), med stapeldimensionen först om A är en stapel."""
+        b = np.asarray(b, dtype=np.float64)
+        en_kolumn = b.ndim == self.A.ndim - 1
+        B = b[..., np.newaxis] if en_kolumn else b
+        if B.shape[-2] != self.A.shape[-2] or (self.stapel and B.shape[0] != self.A.shape[0]):
+            raise ValueError(f"Högerledet har formen {b.shape}, A har formen {self.A.shape}")
+        X = self._V_inv_s @ (self._Ut @ B)
+        residual = np.linalg.norm(self.A @ X - B, axis=-2)
+        if en_kolumn:
+            X, residual = X[..., 0], residual[..., 0]
+            if not self.stapel:
+                residual = float(residual)
+        return Losning(X, residual, self.rang, self.kondition)
+
+
+def los(A, b, rcond: float | None = RCOND) -> Losning:
+    """Löser Ax = b (eller en stapel system) i ett anrop. Se Faktorisering för flera högerled."""
+    faktorisering = Faktorisering(A, rcond, varna=False)
+    faktorisering._varna()  # varningen ska peka på den som anropade los()
+    return faktorisering.los(b)
@@ -0,0 +1,175 @@
+"""
+Frequent-claim counters for lindhe_returns_app.
+
+Returns are counted per Serial Number, per Customer and per
+(Customer, Issue) in daily buckets, in a table next to the returns in the
+same SQLite database. ReturnsStore bumps the buckets in the same
+transaction as every insert, so the counters never drift from the data.
+When it opens a database whose counters do not add up to the number of
+stored returns (e.g. one created before the counters existed), it
+rebuilds them first.
+
+A sliding-window count (e.g. the last 90 or 365 days) is the sum of at most
+one bucket per day for that key, read through the primary key. Checking a
+new return never has to scan the returns history.
+
+    python lindhe_claim_counters.py rebuild   # recount from the returns table
+    python lindhe_claim_counters.py check     # compare with a brute-force recount
+"""
+import sqlite3
+import sys
+from collections import Counter
+from datetime import date, timedelta
+
+WINDOWS = (90, 365)
+
+SERIAL, CUSTOMER, CUSTOMER_ISSUE = "serial", "customer", "customer_issue"
+KINDS = (SERIAL, CUSTOMER, CUSTOMER_ISSUE)
+
+# A return is suggested as a frequent claim when any rule matches:
+# (kind, window in days, earlier returns needed)
+FREQUENT_RULES = (
+    (SERIAL, 365, 1),
+    (CUSTOMER_ISSUE, 90, 3),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS claim_counts (
+    kind  TEXT    NOT NULL,
+    key   TEXT    NOT NULL,
+    day   TEXT    NOT NULL,
+    n     INTEGER NOT NULL,
+    PRIMARY KEY (kind, key, day)
+) WITHOUT ROWID;
+"""
+
+_BUMP = """
+INSERT INTO claim_counts(kind, key, day, n) VALUES (?, ?, ?, ?)
+ON CONFLICT(kind, key, day) DO UPDATE SET n = n + excluded.n
+"""
+
+_SEP = "\x1f"  # between customer and issue in a CUSTOMER_ISSUE key
+
+# kind -> SQL for its key in the returns table
+_KEY_SQL = {SERIAL: "serial_number", CUSTOMER: "customer",
+            CUSTOMER_ISSUE: f"customer || char({ord(_SEP)}) || issue"}
+_AGGREGATE = {kind: f"INSERT INTO claim_counts(kind, key, day, n) SELECT ?, {key_sql}, date, count(*)"
+                    f" FROM returns WHERE {{where}} GROUP BY {key_sql}, date"
+              for kind, key_sql in _KEY_SQL.items()}
+
+
+def keys_for(serial: str, customer: str, issue: str) -> dict[str, str]:
+    return {SERIAL: serial, CUSTOMER: customer, CUSTOMER_ISSUE: customer + _SEP + issue}
+
+
+def bump(con: sqlite3.Connection, returns):
+    """
+    Adds returns given as (day, serial, customer, issue) to the counters.
+    Call inside the transaction that inserts the returns. For many returns
+    already in the table, bump_ids is much faster.
+    """
+    buckets = Counter()
+    for day, serial, customer, issue in returns:
+        for kind, key in keys_for(serial, customer, issue).items():
+            buckets[kind, key, day] += 1
+    con.executemany(_BUMP, ((k, key, day, n) for (k, key, day), n in buckets.items()))
+
+
+def counts(con: sqlite3.Connection, serial: str, customer: str, issue: str,
+           today: date | None = None, windows=WINDOWS) -> dict[tuple[str, int], int]:
+    """
+    {(kind, window): returns in the last `window` days up to and including
+    today} for the serial, the customer and the (customer, issue) pair.
+    """
+    today = today or date.today()
+    widest = max(windows)
+    result = {}
+    for kind, key in keys_for(serial, customer, issue).items():
+        if not key or key == _SEP:
+            result.update({(kind, w): 0 for w in windows})
+            continue
+        buckets = con.execute(
+            "SELECT day, n FROM claim_counts WHERE kind = ? AND key = ? AND day > ? AND day <= ?",
+            (kind, key, (today - timedelta(days=widest)).isoformat(), today.isoformat()),
+        ).fetchall()
+        for w in windows:
+            start = (today - timedelta(days=w)).isoformat()
+            result[kind, w] = sum(n for day, n in buckets if day > start)
+    return result
+
+
+def is_frequent(found: dict[tuple[str, int], int], rules=FREQUENT_RULES) -> bool:
+    return any(found.get((kind, window), 0) >= needed for kind, window, needed in rules)
+
+
+def total(con: sqlite3.Connection) -> int:
+    """Returns counted in the serial buckets; equals the number of stored returns when up to date."""
+    return con.execute("SELECT coalesce(sum(n), 0) FROM claim_counts WHERE kind = ?",
+                       (SERIAL,)).fetchone()[0]
+
+
+def bump_ids(con: sqlite3.Connection, first_id: int, last_id: int):
+    """
+    Adds the returns with first_id <= id <= last_id, counted by SQLite in
+    one statement per kind. Call inside the transaction that inserted them.
+    """
+    for kind in KINDS:
+        con.execute(_AGGREGATE[kind].format(where="id BETWEEN ? AND ?")
+                    + " ON CONFLICT(kind, key, day) DO UPDATE SET n = n + excluded.n",
+                    (kind, first_id, last_id))
+
+
+def rebuild(con: sqlite3.Connection) -> int:
+    """Recounts every bucket from the returns table. Returns the number of buckets."""
+    with con:
+        con.execute("DELETE FROM claim_counts")
+        for kind in KINDS:
+            con.execute(_AGGREGATE[kind].format(where="1"), (kind,))
+    return con.execute("SELECT count(*) FROM claim_counts").fetchone()[0]
+
+
+def brute_force(con: sqlite3.Connection, today: date, windows=WINDOWS) -> dict[tuple[str, str, int], int]:
+    """{(kind, key, window): n} by reading every return, for checking the counters."""
+    result = Counter()
+    starts = {w: (today - timedelta(days=w)).isoformat() for w in windows}
+    end = today.isoformat()
+    for day, serial, customer, issue in con.execute(
+            "SELECT date, serial_number, customer, issue FROM returns"):
+        if day > end:
+            continue
+        for kind, key in keys_for(serial, customer, issue).items():
+            for w, start in starts.items():
+                if day > start:
+                    result[kind, key, w] += 1
+    return result
+
+
+def check(con: sqlite3.Connection, today: date | None = None, windows=WINDOWS) -> list[str]:
+    """Compares the windowed counters for every key with brute_force. Returns the differences."""
+    today = today or date.today()
+    facit = brute_force(con, today, windows)
+    stored = Counter()
+    starts = {w: (today - timedelta(days=w)).isoformat() for w in windows}
+    for kind, key, day, n in con.execute(
+            "SELECT kind, key, day, n FROM claim_counts WHERE day <= ?", (today.isoformat(),)):
+        for w, start in starts.items():
+            if day > start:
+                stored[kind, key, w] += n
+    return [f"{k}: counters {stored[k]}, recount {facit[k]}"
+            for k in sorted(facit.keys() | stored.keys()) if stored[k] != facit[k]]
+
+
+if __name__ == "__main__":
+    from lindhe_returns_store import ReturnsStore
+    store = ReturnsStore()
+    if sys.argv[1:2] == ["rebuild"]:
+        print(f"Rebuilt {rebuild(store.connection())} counter buckets.")
+    elif sys.argv[1:2] == ["check"]:
+        differences = check(store.connection())
+        for d in differences:
+            print(d)
+        print("OK" if not differences else f"{len(differences)} differences.")
+        sys.exit(1 if differences else 0)
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -1,13 +1,32 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date
-import uuid
+import os
+import sqlite3
+
+from lindhe_returns_options import (
+    activity_levels, compensation, customer_options, gen_options, investigation_results,
+    issue_options, size_options, sports, status_options, vigilance_options, water_use,
+)
+from lindhe_claim_counters import is_frequent
+from lindhe_returns_export import FORMATS as EXPORT_FORMATS, export as export_returns
+from lindhe_returns_import import import_batch, read_batch
+from lindhe_returns_store import ReturnsStore
+from lindhe_serials import SerialCatalog
+
+RECENT_ROWS = 10        # "Recent Registrations" and the sidebar preview
+FINAL_VIEW_ROWS = 1000  # rows shown in the final table
+SERIAL_SUGGESTIONS = 20 # completions offered for a typed serial prefix
+
+
+@st.cache_resource
+def get_store() -> ReturnsStore:
+    return ReturnsStore()
+
+
+store = get_store()
 
 # Initialize session state variables
-if 'database' not in st.session_state:
-    st.session_state.database = []
-if 'registered_serials' not in st.session_state:
-    st.session_state.registered_serials = []
 if 'form_submitted' not in st.session_state:
     st.session_state.form_submitted = False
 if 'show_final_table' not in st.session_state:
@@ -22,17 +41,16 @@ products_db = {
     "SN005": "Product E"
 }
 
-issue_options = ["Mechanical failure", "Software issue", "User error", "Manufacturing defect", "Normal wear"]
-customer_options = ["Customer A", "Customer B", "Customer C", "Customer D", "Customer E"]
-gen_options = ["Gen 1", "Gen 2", "Gen 3", "Gen 4"]
-size_options = ["Small", "Medium", "Large", "X-Large"]
-status_options = ["Open", "In Progress", "Closed", "Pending"]
-vigilance_options = ["Low", "Medium", "High", "Critical"]
-activity_levels = ["Low", "Moderate", "High", "Very High"]
-sports = ["Running", "Swimming", "Cycling", "Walking", "Other"]
-water_use = ["No", "Fresh water", "Salt water", "Chlorinated water"]
-compensation = ["None", "Replacement", "Refund", "Credit"]
-investigation_results = ["User error", "Product defect", "Normal wear", "Inconclusive"]
+@st.cache_resource
+def get_catalog() -> SerialCatalog:
+    # Memory-mapped catalogue if one has been built (python lindhe_serials.py build ...),
+    # otherwise the demo serials above
+    if SerialCatalog.exists():
+        return SerialCatalog.load()
+    return SerialCatalog.from_dict(products_db)
+
+
+catalog = get_catalog()
 
 def reset_form():
     """Reset all form fields to default values"""
@@ -56,9 +74,10 @@ if not st.session_state.show_final_table:
     
     with col2:
         st.subheader("Recent Registrations")
-        if st.session_state.registered_serials:
-            for serial in st.session_state.registered_serials:
-                st.write(f"• {serial}")
+        recent = store.latest(RECENT_ROWS, columns=["Serial Number"])
+        if recent:
+            for row in recent:
+                st.write(f"• {row['Serial Number']}")
         else:
             st.write("No registrations yet")
         
@@ -80,32 +99,52 @@ if not st.session_state.show_final_table:
                     st.write("Continue registering returns...")
     
     with col1:
+        # Serial search lives outside the form so suggestions update while typing
+        serial_prefix = st.text_input("Search serial number", key="form_serial_search",
+                                      placeholder="Type the start of a serial")
+        matches = catalog.complete(serial_prefix.strip(), SERIAL_SUGGESTIONS) if serial_prefix.strip() else []
+        if serial_prefix.strip() and not matches:
+            st.caption("No matching serial numbers.")
+        elif len(matches) == SERIAL_SUGGESTIONS:
+            st.caption(f"Showing the first {SERIAL_SUGGESTIONS} of "
+                       f"{catalog.count(serial_prefix.strip())} matches. Type more to narrow down.")
+
+        # Required fields (marked with *). They sit outside the form, like the search,
+        # so the product and the frequent-claim counts update as soon as they change.
+        st.subheader("Required Fields *")
+        
+        # Serial Number (required) - auto-populates Product
+        serial_number = st.selectbox("Serial Number *", 
+                                   options=[""] + [s for s, _ in matches],
+                                   key="form_serial")
+        
+        # Auto-populate product based on serial number
+        if serial_number:
+            product = catalog.product(serial_number) or "Unknown Product"
+            st.text_input("Product (Auto-populated)", value=product, disabled=True)
+        else:
+            st.text_input("Product (Auto-populated)", value="", disabled=True)
+        
+        # Issue (required)
+        issue = st.selectbox("Issue *", options=[""] + issue_options, key="form_issue")
+        
+        # Customer (required)
+        customer = st.selectbox("Customer *", options=[""] + customer_options, key="form_customer")
+
+        # Frequent-claim counters for the serial/customer/issue chosen above.
+        # The suggestion is applied once per new combination so staff can still override it.
+        claim_key = (serial_number, customer, issue)
+        claims = store.claim_counts(*claim_key) if all(claim_key) else None
+        if st.session_state.get("claims_for") != claim_key:
+            st.session_state.claims_for = claim_key
+            if claims is not None:
+                st.session_state.form_frequent = is_frequent(claims)
+
         # Main form
         with st.form("returns_form"):
             # Date picker (defaults to today)
             selected_date = st.date_input("Date", value=date.today())
             
-            # Required fields (marked with *)
-            st.subheader("Required Fields *")
-            
-            # Serial Number (required) - auto-populates Product
-            serial_number = st.selectbox("Serial Number *", 
-                                       options=[""] + list(products_db.keys()),
-                                       key="form_serial")
-            
-            # Auto-populate product based on serial number
-            if serial_number:
-                product = products_db.get(serial_number, "Unknown Product")
-                st.text_input("Product (Auto-populated)", value=product, disabled=True)
-            else:
-                st.text_input("Product (Auto-populated)", value="", disabled=True)
-            
-            # Issue (required)
-            issue = st.selectbox("Issue *", options=[""] + issue_options, key="form_issue")
-            
-            # Customer (required)
-            customer = st.selectbox("Customer *", options=[""] + customer_options, key="form_customer")
-            
             st.subheader("Optional Fields")
             
             # Optional fields
@@ -121,6 +160,13 @@ if not st.session_state.show_final_table:
             sport = st.selectbox("Sport", options=[""] + sports, key="form_sport")
             water_use_field = st.selectbox("Use in water", options=[""] + water_use, key="form_water")
             frequent_claim = st.checkbox("Frequent claim", key="form_frequent")
+            if claims is not None:
+                st.caption(
+                    "Earlier returns (90 / 365 days) — "
+                    f"serial: {claims['serial', 90]} / {claims['serial', 365]}, "
+                    f"customer: {claims['customer', 90]} / {claims['customer', 365]}, "
+                    f"customer + issue: {claims['customer_issue', 90]} / {claims['customer_issue', 365]}"
+                )
             compensation_field = st.selectbox("Compensation", options=[""] + compensation, key="form_compensation")
             comp_reason = st.text_area("Reason for comp decision", key="form_comp_reason")
             investigation = st.selectbox("Investigation result", options=[""] + investigation_results, key="form_investigation")
@@ -139,15 +185,16 @@ if not st.session_state.show_final_table:
                     st.error("❌ Please fill in all required fields (marked with *)")
                     st.session_state.form_submitted = False
         
-        # Register Return button (only active after form validation)
-        if st.session_state.form_submitted:
+        # Register Return button (only active after form validation; the required
+        # fields sit outside the form, so check they are still filled in)
+        if st.session_state.form_submitted and validate_required_fields(serial_number, issue, customer):
             if st.button("Register return", type="primary"):
                 # Prepare data for database
                 return_data = {
-                    "ID": str(uuid.uuid4())[:8],
+                    "ID": None,  # set below, just before the insert
                     "Date": selected_date,
                     "Serial Number": serial_number,
-                    "Product": products_db.get(serial_number, "Unknown"),
+                    "Product": catalog.product(serial_number) or "Unknown",
                     "Issue": issue,
                     "Customer": customer,
                     "Gen 3": gen3 or "N/A",
@@ -169,9 +216,17 @@ if not st.session_state.show_final_table:
                     "Archived where": archived_where or "N/A"
                 }
                 
-                # Add to database
-                st.session_state.database.append(return_data)
-                st.session_state.registered_serials.append(serial_number)
+                # Add to database; another session may take the same ID in between, so retry
+                for attempt in range(3):
+                    return_data["ID"] = store.new_ids(1)[0]
+                    try:
+                        store.add(return_data)
+                        break
+                    except sqlite3.IntegrityError:
+                        continue
+                else:
+                    st.error("❌ Could not register the return, please try again.")
+                    st.stop()
                 
                 st.success(f"✅ Return registered successfully! Serial: {serial_number}")
                 
@@ -181,22 +236,61 @@ if not st.session_state.show_final_table:
         else:
             st.button("Register return", disabled=True, help="Complete required fields first")
 
+        # Bulk import of a batch file from the service desk
+        with st.expander("Bulk import (CSV/Excel)"):
+            upload = st.file_uploader("Returns file", type=["csv", "xlsx"], key="bulk_file")
+            if upload is not None and st.button("Import returns"):
+                result = import_batch(read_batch(upload, upload.name), store, catalog)
+                st.success(f"✅ Imported {result.imported} returns "
+                           f"({result.repeats} with a previously returned serial).")
+                if len(result.rejects):
+                    st.warning(f"{len(result.rejects)} rows were rejected.")
+                    st.dataframe(result.rejects.head(100), use_container_width=True)
+                    st.download_button("Download reject report", data=result.rejects_csv(),
+                                       file_name=f"rejects_{upload.name}.csv", mime="text/csv")
+
 else:
     # Show final table with all registrations
     st.title("All Registered Returns")
     
-    if st.session_state.database:
-        df = pd.DataFrame(st.session_state.database)
+    total = store.count()
+    if total:
+        df = pd.DataFrame(store.latest(FINAL_VIEW_ROWS))
+        if total > FINAL_VIEW_ROWS:
+            st.caption(f"Showing the latest {FINAL_VIEW_ROWS} of {total} returns.")
         st.dataframe(df, use_container_width=True)
         
-        # Option to download data
-        csv = df.to_csv(index=False)
-        st.download_button(
-            label="Download data as CSV",
-            data=csv,
-            file_name=f"returns_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+        # Export: built only on request, streamed from the database and reused
+        # while the data and the filters are unchanged
+        with st.expander("Export"):
+            col1, col2 = st.columns(2)
+            with col1:
+                export_format = st.selectbox("Format", list(EXPORT_FORMATS))
+                export_dates = st.date_input("Date range", value=(), key="export_dates")
+            with col2:
+                export_customers = st.multiselect("Customers", customer_options)
+                export_statuses = st.multiselect("Status", status_options)
+            if st.button("Prepare export"):
+                date_from, date_to = (list(export_dates) + [None, None])[:2]
+                if date_from is not None and date_to is None:
+                    date_to = date_from
+                try:
+                    path, cached = export_returns(store, export_format, date_from=date_from, date_to=date_to,
+                                                  customers=export_customers, statuses=export_statuses)
+                except RuntimeError as e:
+                    st.error(str(e))
+                else:
+                    st.session_state.export_file = (path, export_format)
+                    st.caption("Unchanged since the last export, reusing the file." if cached else "Export ready.")
+            if 'export_file' in st.session_state and os.path.exists(st.session_state.export_file[0]):
+                path, export_format = st.session_state.export_file
+                with open(path, "rb") as f:
+                    st.download_button(
+                        label=f"Download {export_format}",
+                        data=f,
+                        file_name=f"returns_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{EXPORT_FORMATS[export_format][1]}",
+                        mime=EXPORT_FORMATS[export_format][0]
+                    )
     else:
         st.write("No returns registered yet.")
     
@@ -210,9 +304,10 @@ else:
 # Display current database state in sidebar (for demo purposes)
 with st.sidebar:
     st.subheader("Database Status")
-    st.write(f"Total registered returns: {len(st.session_state.database)}")
+    st.write(f"Total registered returns: {store.count()}")
     
-    if st.session_state.database:
+    preview = store.latest(RECENT_ROWS, columns=['Serial Number', 'Product', 'Customer', 'Issue'])
+    if preview:
         st.subheader("Database Preview")
-        df_preview = pd.DataFrame(st.session_state.database)[['Serial Number', 'Product', 'Customer', 'Issue']]
+        df_preview = pd.DataFrame(preview)
         st.dataframe(df_preview, use_container_width=True)
@@ -0,0 +1,259 @@
+"""
+Analytics cube for lindhe_returns_app.
+
+Returns are aggregated by Product, Issue, Customer, Gen, month and
+Investigation result in tables next to the returns, in the same SQLite
+database. Each cell holds the number of returns and, for returns with both
+an Issue Date and a Closure Date, the count, sum, min and max of the days
+between them.
+
+The full cross product ("detail") can have nearly as many cells as there
+are returns, so smaller cuboids (the same figures for fewer dimensions)
+are materialized too, and summary() reads the smallest one that covers
+the dimensions it groups and filters by. ReturnsStore updates one cell
+per cuboid in the same transaction as every insert, so registering a
+return never regroups the table; a bulk insert is grouped by SQLite over
+just the new rows (bump_ids).
+
+    summary(con, ["Product", "Month"], customer=["Customer A"], month_from="2025-01")
+
+    python lindhe_returns_cube.py rebuild   # recompute the cube from the returns table
+    python lindhe_returns_cube.py check     # compare with a pandas groupby of every return
+"""
+import sqlite3
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+MISSING = "N/A"  # label for empty dimensions, as lindhe_returns_store.MISSING
+
+# Dimension (display name) -> cube column
+DIMENSIONS = {
+    "Product": "product",
+    "Issue": "issue",
+    "Customer": "customer",
+    "Gen 3": "gen",
+    "Month": "month",
+    "Investigation result": "investigation",
+}
+_DIMS = list(DIMENSIONS.values())
+
+# Materialized cuboids, smallest first: name -> cube columns. summary() reads
+# the first one that holds every dimension it groups or filters by.
+CUBOIDS = {
+    "product_month": ("product", "month"),
+    "investigation_month": ("investigation", "month"),
+    "issue_customer_gen_month": ("issue", "customer", "gen", "month"),
+    "investigation_product_issue_customer": ("investigation", "product", "issue", "customer"),
+    "detail": ("product", "issue", "customer", "gen", "month", "investigation"),
+}
+
+_FIGURES = "n, closed, days_sum, days_min, days_max"
+
+
+def _table(cuboid: str) -> str:
+    return f"cube_{cuboid}"
+
+
+SCHEMA = "".join(f"""
+CREATE TABLE IF NOT EXISTS {_table(name)} (
+    {", ".join(f"{d} TEXT NOT NULL" for d in dims)},
+    n         INTEGER NOT NULL,
+    closed    INTEGER NOT NULL,
+    days_sum  INTEGER NOT NULL,
+    days_min  INTEGER,
+    days_max  INTEGER,
+    PRIMARY KEY ({", ".join(dims)})
+) WITHOUT ROWID;
+""" for name, dims in CUBOIDS.items())
+
+_UPSERT = {name: f"""
+ON CONFLICT({", ".join(dims)}) DO UPDATE SET
+    n        = n + excluded.n,
+    closed   = closed + excluded.closed,
+    days_sum = days_sum + excluded.days_sum,
+    days_min = coalesce(min(days_min, excluded.days_min), days_min, excluded.days_min),
+    days_max = coalesce(max(days_max, excluded.days_max), days_max, excluded.days_max)
+""" for name, dims in CUBOIDS.items()}
+
+_BUMP = {name: f"INSERT INTO {_table(name)}({', '.join(dims)}, {_FIGURES})"
+               f" VALUES ({', '.join('?' * (len(dims) + 5))}) {_UPSERT[name]}"
+         for name, dims in CUBOIDS.items()}
+
+# The same figures computed by SQLite from the returns table, per cuboid
+_DAYS_SQL = "CAST(julianday(closure_date) - julianday(issue_date) AS INTEGER)"
+_SOURCE_SQL = {d: f"coalesce({d}, '{MISSING}')" for d in _DIMS} | {"month": "substr(date, 1, 7)"}
+_AGGREGATE = {name: (f"INSERT INTO {_table(name)}({', '.join(dims)}, {_FIGURES})"
+                     f" SELECT {', '.join(_SOURCE_SQL[d] for d in dims)}, count(*), count({_DAYS_SQL}),"
+                     f" coalesce(sum({_DAYS_SQL}), 0), min({_DAYS_SQL}), max({_DAYS_SQL})"
+                     f" FROM returns WHERE {{where}}"
+                     f" GROUP BY {', '.join(str(i + 1) for i in range(len(dims)))}")
+              for name, dims in CUBOIDS.items()}
+
+_POSITION = {name: [_DIMS.index(d) for d in dims] for name, dims in CUBOIDS.items()}
+
+# Columns of the returns table that bump() needs, in this order
+SOURCE_COLUMNS = ("product", "issue", "customer", "gen", "date", "investigation", "issue_date", "closure_date")
+
+
+def _days(issue_date, closure_date) -> int | None:
+    if not issue_date or not closure_date:
+        return None
+    return (date.fromisoformat(closure_date) - date.fromisoformat(issue_date)).days
+
+
+def _merge(a: tuple, b: tuple) -> tuple:
+    lo = b[3] if a[3] is None else a[3] if b[3] is None else min(a[3], b[3])
+    hi = b[4] if a[4] is None else a[4] if b[4] is None else max(a[4], b[4])
+    return a[0] + b[0], a[1] + b[1], a[2] + b[2], lo, hi
+
+
+def bump(con: sqlite3.Connection, returns):
+    """
+    Adds returns given as tuples of SOURCE_COLUMNS to their cell in every
+    cuboid. Call inside the transaction that inserts the returns. For many
+    returns already in the table, bump_ids is much faster.
+    """
+    cells = {}
+    for product, issue, customer, gen, day, investigation, issue_date, closure_date in returns:
+        cell = tuple(MISSING if v is None else v for v in (product, issue, customer, gen, day[:7], investigation))
+        days = _days(issue_date, closure_date)
+        figures = (1, 0, 0, None, None) if days is None else (1, 1, days, days, days)
+        cells[cell] = _merge(cells[cell], figures) if cell in cells else figures
+    for name, positions in _POSITION.items():
+        projected = {}
+        for cell, figures in cells.items():
+            key = tuple(cell[i] for i in positions)
+            projected[key] = _merge(projected[key], figures) if key in projected else figures
+        con.executemany(_BUMP[name], (key + figures for key, figures in projected.items()))
+
+
+def bump_ids(con: sqlite3.Connection, first_id: int, last_id: int):
+    """
+    Adds the returns with first_id <= id <= last_id, grouped by SQLite in
+    one statement per cuboid. Call inside the transaction that inserted them.
+    """
+    for name in CUBOIDS:
+        con.execute(_AGGREGATE[name].format(where="id BETWEEN ? AND ?") + _UPSERT[name],
+                    (first_id, last_id))
+
+
+def rebuild(con: sqlite3.Connection) -> int:
+    """Recomputes every cuboid from the returns table. Returns the number of detail cells."""
+    with con:
+        for name in CUBOIDS:
+            con.execute(f"DELETE FROM {_table(name)}")
+            con.execute(_AGGREGATE[name].format(where="1"))
+    return cells(con)
+
+
+def cells(con: sqlite3.Connection, cuboid: str = "detail") -> int:
+    return con.execute(f"SELECT count(*) FROM {_table(cuboid)}").fetchone()[0]
+
+
+def total(con: sqlite3.Connection) -> int:
+    """Returns counted in the cube; equals the number of stored returns when it is up to date."""
+    return con.execute(f"SELECT coalesce(sum(n), 0) FROM {_table('product_month')}").fetchone()[0]
+
+
+def cuboid_for(columns) -> str:
+    """The smallest cuboid holding all the given cube columns."""
+    needed = set(columns)
+    return next(name for name, dims in CUBOIDS.items() if needed <= set(dims))
+
+
+def summary(con: sqlite3.Connection, by: list[str], **filters) -> pd.DataFrame:
+    """
+    Rolls the cube up to the dimensions in `by` (display names). Filters are
+    lists of allowed values keyed by cube column (customer=[...]), plus
+    inclusive "YYYY-MM" bounds month_from and month_to. Columns: the
+    dimensions, Returns, Closed, Mean days, Min days, Max days.
+    """
+    cols = [DIMENSIONS[d] for d in by]
+    conditions, args = [], []
+    for dim, allowed in filters.items():
+        if dim == "month_from" and allowed:
+            conditions.append("month >= ?")
+            args.append(allowed)
+        elif dim == "month_to" and allowed:
+            conditions.append("month <= ?")
+            args.append(allowed)
+        elif dim in _DIMS and allowed:
+            conditions.append(f"{dim} IN ({', '.join('?' * len(allowed))})")
+            args += list(allowed)
+        elif dim not in _DIMS and dim not in ("month_from", "month_to"):
+            raise ValueError(f"Unknown dimension: {dim}")
+    used = set(cols) | {d for d, allowed in filters.items() if d in _DIMS and allowed}
+    if filters.get("month_from") or filters.get("month_to"):
+        used.add("month")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    group = f"GROUP BY {', '.join(cols)} ORDER BY {', '.join(cols)}" if cols else ""
+    rows = con.execute(
+        f"SELECT {''.join(c + ', ' for c in cols)}sum(n), sum(closed), sum(days_sum), min(days_min), max(days_max)"
+        f" FROM {_table(cuboid_for(used))} {where} {group}", args
+    ).fetchall()
+    df = pd.DataFrame(rows, columns=by + ["Returns", "Closed", "_days", "Min days", "Max days"])
+    df["Returns"] = df["Returns"].fillna(0).astype(int)
+    df["Closed"] = df["Closed"].fillna(0).astype(int)
+    df.insert(len(by) + 2, "Mean days", (df.pop("_days") / df["Closed"].where(df["Closed"] > 0)).round(1))
+    return df
+
+
+def brute_force(con: sqlite3.Connection, by: list[str]) -> pd.DataFrame:
+    """The same figures as summary() by a pandas groupby of every return, for checks and benchmarks."""
+    return groupby(pd.read_sql_query(f"SELECT {', '.join(SOURCE_COLUMNS)} FROM returns", con), by)
+
+
+def groupby(df: pd.DataFrame, by: list[str]) -> pd.DataFrame:
+    """summary() computed from a frame of raw returns (columns as in the returns table)."""
+    df = df.assign(month=df["date"].str[:7],
+                   days=(pd.to_datetime(df["closure_date"]) - pd.to_datetime(df["issue_date"])).dt.days)
+    df[_DIMS] = df[_DIMS].fillna(MISSING)
+    cols = [DIMENSIONS[d] for d in by]
+    out = df.groupby(cols).agg(Returns=("date", "size"), Closed=("days", "count"), _days=("days", "sum"),
+                               **{"Min days": ("days", "min"), "Max days": ("days", "max")}).reset_index()
+    out.columns = by + list(out.columns[len(by):])
+    out.insert(len(by) + 2, "Mean days", (out.pop("_days") / out["Closed"].where(out["Closed"] > 0)).round(1))
+    return out
+
+
+def check(con: sqlite3.Connection) -> list[str]:
+    """Compares every cuboid with a pandas groupby of every return. Returns the differences."""
+    frame = pd.read_sql_query(f"SELECT {', '.join(SOURCE_COLUMNS)} FROM returns", con)
+    figures = ["Returns", "Closed", "Mean days", "Min days", "Max days"]
+    differences = []
+    for name, dims in CUBOIDS.items():
+        by = [d for d, col in DIMENSIONS.items() if col in dims]
+        cube = pd.read_sql_query(f"SELECT * FROM {_table(name)}", con)
+        cube.columns = [next(d for d, col in DIMENSIONS.items() if col == c) if c in _DIMS else c
+                        for c in cube.columns]
+        cube = cube.rename(columns={"n": "Returns", "closed": "Closed", "days_min": "Min days",
+                                    "days_max": "Max days"})
+        cube.insert(len(by), "Mean days", (cube.pop("days_sum") / cube["Closed"].where(cube["Closed"] > 0)).round(1))
+        both = cube.merge(groupby(frame, by), on=by, how="outer", suffixes=("", " recount"))
+        equal = np.ones(len(both), dtype=bool)
+        for f in figures:
+            a, b = both[f].astype(float), both[f + " recount"].astype(float)
+            equal &= (np.isclose(a, b) | (a.isna() & b.isna())).to_numpy()
+        for _, row in both[~equal].iterrows():
+            differences.append(f"{name} {tuple(row[by])}: cube {[row[f] for f in figures]}, "
+                               f"recount {[row[f + ' recount'] for f in figures]}")
+    return differences
+
+
+if __name__ == "__main__":
+    from lindhe_returns_store import ReturnsStore
+    store = ReturnsStore()
+    if sys.argv[1:2] == ["rebuild"]:
+        print(f"Rebuilt the cube ({rebuild(store.connection())} detail cells).")
+    elif sys.argv[1:2] == ["check"]:
+        differences = check(store.connection())
+        for d in differences[:50]:
+            print(d)
+        print("OK" if not differences else f"{len(differences)} differences.")
+        sys.exit(1 if differences else 0)
+    else:
+        print(__doc__)
+        sys.exit(1)
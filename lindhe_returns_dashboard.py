@@ -0,0 +1,87 @@
+"""
+Returns dashboard for quality engineering.
+
+Reads only the analytics cube (lindhe_returns_cube), which ReturnsStore
+keeps up to date on every registration, so a rerun costs a few small
+GROUP BYs regardless of how many returns are stored.
+
+    streamlit run lindhe_returns_dashboard.py
+"""
+import streamlit as st
+
+import lindhe_returns_cube as cube
+from lindhe_returns_options import customer_options, gen_options, issue_options
+from lindhe_returns_store import ReturnsStore
+
+
+@st.cache_resource
+def get_store() -> ReturnsStore:
+    return ReturnsStore()
+
+
+store = get_store()
+con = store.connection()
+
+st.title("Lindhe Returns – Dashboard")
+
+# A database filled before the cube existed has to be counted once
+if cube.total(con) != store.count():
+    st.warning(f"The analytics cube covers {cube.total(con)} of {store.count()} returns.")
+    if st.button("Rebuild cube"):
+        cube.rebuild(con)
+        st.rerun()
+
+# Filters
+with st.sidebar:
+    st.subheader("Filters")
+    months = [m for (m,) in con.execute("SELECT DISTINCT month FROM cube_product_month ORDER BY month")]
+    month_from = month_to = None
+    if len(months) > 1:
+        month_from, month_to = st.select_slider("Months", options=months, value=(months[0], months[-1]))
+        # The full range is no filter, so views without a month can use the small cuboids
+        month_from = None if month_from == months[0] else month_from
+        month_to = None if month_to == months[-1] else month_to
+    filters = {
+        "month_from": month_from,
+        "month_to": month_to,
+        "issue": st.multiselect("Issue", issue_options),
+        "customer": st.multiselect("Customer", customer_options),
+        "gen": st.multiselect("Gen", gen_options),
+    }
+
+overall = cube.summary(con, [], **filters)
+col1, col2, col3 = st.columns(3)
+col1.metric("Returns", int(overall["Returns"].iloc[0]))
+col2.metric("Closed (with dates)", int(overall["Closed"].iloc[0]))
+mean_days = overall["Mean days"].iloc[0]
+col3.metric("Mean days issue → closure", "–" if mean_days != mean_days else f"{mean_days:.1f}")
+
+# Returns per month, split by one dimension
+st.subheader("Returns per month")
+split = st.selectbox("Split by", ["Product", "Issue", "Customer", "Gen 3"])
+per_month = cube.summary(con, ["Month", split], **filters)
+if len(per_month):
+    st.bar_chart(per_month.pivot(index="Month", columns=split, values="Returns").fillna(0))
+
+# Time from Issue Date to Closure Date
+st.subheader("Days from Issue Date to Closure Date")
+lead_by = st.selectbox("Per", ["Product", "Issue", "Customer", "Gen 3"], key="lead_by")
+lead = cube.summary(con, [lead_by], **filters)
+st.dataframe(lead[lead["Closed"] > 0].drop(columns=["Returns"]), use_container_width=True, hide_index=True)
+
+# Investigation results
+st.subheader("Investigation results")
+investigation_by = st.selectbox("Per", ["Product", "Issue", "Customer"], key="investigation_by")
+# The investigation cuboid has no month or Gen: filtering on those reads the detail cuboid
+investigation = cube.summary(con, [investigation_by, "Investigation result"], **filters)
+if len(investigation):
+    st.dataframe(
+        investigation.pivot(index=investigation_by, columns="Investigation result", values="Returns")
+        .fillna(0).astype(int),
+        use_container_width=True,
+    )
+
+# Drill-down over every dimension
+if st.checkbox("Show full breakdown (Product × Issue × Customer × Gen × month)"):
+    st.dataframe(cube.summary(con, ["Product", "Issue", "Customer", "Gen 3", "Month"], **filters),
+                 use_container_width=True, hide_index=True)
@@ -0,0 +1,208 @@
+"""
+Streaming export of the returns database.
+
+Rows are read from ReturnsStore in chunks (keyset pagination on the primary
+key) and written straight to the output file, so memory use depends on the
+chunk size, not on the size of the database. Formats:
+
+    csv       plain CSV
+    csv.gz    gzip-compressed CSV
+    parquet   Parquet via pyarrow (one row group per chunk)
+    xlsx      Excel via openpyxl in write-only mode
+
+Filters: date range (inclusive, on "Date"), customers and statuses.
+
+Finished files are kept in EXPORT_DIR under a name derived from the store's
+content version, the format and the filters. Asking again for the same
+export of an unchanged database returns the existing file without reading
+the database.
+
+    python lindhe_returns_export.py csv.gz --from 2025-01-01 --customer "Customer A"
+"""
+import argparse
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import sqlite3
+
+from lindhe_returns_store import COLUMNS, DISPLAY_NAMES, FIELDS, ReturnsStore, to_record
+
+EXPORT_DIR = "lindhe_exports"
+CHUNK_ROWS = 50_000
+KEEP_FILES = 20
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+
+def _where(date_from=None, date_to=None, customers=None, statuses=None) -> tuple[list[str], list]:
+    conditions, args = [], []
+    if date_from is not None:
+        conditions.append("date >= ?")
+        args.append(str(date_from))
+    if date_to is not None:
+        conditions.append("date <= ?")
+        args.append(str(date_to))
+    if customers:
+        conditions.append(f"customer IN ({', '.join('?' * len(customers))})")
+        args += list(customers)
+    if statuses:
+        conditions.append(f"status IN ({', '.join('?' * len(statuses))})")
+        args += list(statuses)
+    return conditions, args
+
+
+def iter_chunks(con: sqlite3.Connection, chunk_rows: int = CHUNK_ROWS, **filters):
+    """Yields lists of row tuples (COLUMNS order) matching the filters, oldest first."""
+    conditions, args = _where(**filters)
+    last = 0
+    while True:
+        where = " AND ".join(["id > ?"] + conditions)
+        rows = con.execute(
+            f"SELECT id, {', '.join(COLUMNS)} FROM returns WHERE {where} ORDER BY id LIMIT ?",
+            [last] + args + [chunk_rows],
+        ).fetchall()
+        if not rows:
+            return
+        last = rows[-1][0]
+        yield [r[1:] for r in rows]
+        if len(rows) < chunk_rows:
+            return
+
+
+def _display(rows):
+    """Rows as the app shows them: NULL as "N/A", Frequent claim as True/False."""
+    return (list(to_record(r).values()) for r in rows)
+
+
+# ---------- Writers ----------
+def _write_csv(chunks, f):
+    text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(DISPLAY_NAMES)
+    n = 0
+    for rows in chunks:
+        writer.writerows(_display(rows))
+        n += len(rows)
+    text.flush()
+    text.detach()
+    return n
+
+
+def _write_csv_gz(chunks, f):
+    with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6) as gz:
+        return _write_csv(chunks, gz)
+
+
+def _write_parquet(chunks, f):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow).") from None
+    # Typed columns from the table definition; NULL stays null
+    types = {"INTEGER": pa.int64(), "REAL": pa.float64()}
+    schema = pa.schema([(name, pa.bool_() if col == "frequent_claim" else types.get(sql.split()[0], pa.string()))
+                        for name, col, sql in FIELDS])
+    frequent = COLUMNS.index("frequent_claim")
+    n = 0
+    with pq.ParquetWriter(f, schema) as writer:
+        for rows in chunks:
+            columns = [list(c) for c in zip(*rows)]
+            columns[frequent] = [bool(v) for v in columns[frequent]]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            n += len(rows)
+    return n
+
+
+def _write_xlsx(chunks, f):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("Excel export needs openpyxl (pip install openpyxl).") from None
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Returns")
+    ws.append(DISPLAY_NAMES)
+    n = 0
+    for rows in chunks:
+        for r in _display(rows):
+            ws.append(r)
+        n += len(rows)
+    wb.save(f)
+    return n
+
+
+WRITERS = {"csv": _write_csv, "csv.gz": _write_csv_gz, "parquet": _write_parquet, "xlsx": _write_xlsx}
+
+
+# ---------- Cached export ----------
+def export_key(version: int, fmt: str, **filters) -> str:
+    normalized = {k: (sorted(v) if isinstance(v, (list, tuple, set)) else (str(v) if v is not None else None))
+                  for k, v in sorted(filters.items())}
+    blob = json.dumps([version, fmt, normalized], sort_keys=True)
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+
+def _prune(directory: str, keep: int):
+    files = sorted((os.path.join(directory, n) for n in os.listdir(directory) if n.startswith("returns_")),
+                   key=os.path.getmtime, reverse=True)
+    for path in files[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def export(store: ReturnsStore, fmt: str = "csv", directory: str = EXPORT_DIR,
+           chunk_rows: int = CHUNK_ROWS, **filters) -> tuple[str, bool]:
+    """
+    Writes (or reuses) an export file. Returns (path, cached) where cached
+    is True when an identical export of the same content version existed.
+    Filters: date_from, date_to, customers, statuses.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown format: {fmt}")
+    os.makedirs(directory, exist_ok=True)
+    # Version and rows are read in one transaction, so the file always matches its name
+    con = sqlite3.connect(store.path, timeout=30)
+    try:
+        con.execute("BEGIN")
+        version = con.execute("SELECT version FROM stats WHERE id = 0").fetchone()[0]
+        path = os.path.join(directory, f"returns_{export_key(version, fmt, **filters)}.{FORMATS[fmt][1]}")
+        if os.path.exists(path):
+            os.utime(path)  # most recently used, for pruning
+            return path, True
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                WRITERS[fmt](iter_chunks(con, chunk_rows, **filters), f)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+    finally:
+        con.close()
+    os.replace(tmp, path)
+    _prune(directory, KEEP_FILES)
+    return path, False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export of registered returns.")
+    parser.add_argument("format", choices=list(FORMATS))
+    parser.add_argument("--from", dest="date_from", default=None, help="first date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", default=None, help="last date (YYYY-MM-DD)")
+    parser.add_argument("--customer", action="append", dest="customers", help="may be repeated")
+    parser.add_argument("--status", action="append", dest="statuses", help="may be repeated")
+    args = parser.parse_args()
+
+    path, cached = export(ReturnsStore(), args.format, date_from=args.date_from, date_to=args.date_to,
+                          customers=args.customers, statuses=args.statuses)
+    print(f"{'Unchanged, reusing' if cached else 'Wrote'} '{path}'.")
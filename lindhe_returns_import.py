@@ -0,0 +1,220 @@
+"""
+Bulk import of returns from CSV or Excel batches (e.g. from the service desk).
+
+The batch is validated column by column with pandas/NumPy instead of row
+by row:
+
+    * required fields (Serial Number, Issue, Customer) must be filled
+    * enum columns must hold one of the values in lindhe_returns_options
+    * dates must match one of DATE_FORMATS (ISO or day first, as written
+      in Sweden), numbers must be non-negative
+    * serials are looked up in the catalogue in one vectorized search
+
+Duplicates are found with a hash index of (Serial Number, Date, Issue,
+Customer): within the batch, and against the stored returns for the
+serials in the batch (fetched through the serial index). Those rows are
+rejected. Serials that have been returned before, in the database or
+earlier in the batch, are accepted but marked as repeats in the report.
+
+All valid rows are inserted in one transaction. Rejected rows go to a
+report with their line number in the file and the reasons.
+
+    python lindhe_returns_import.py batch.csv [--rejects rejects.csv]
+"""
+import argparse
+import io
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from lindhe_returns_options import ENUM_FIELDS, REQUIRED_FIELDS
+from lindhe_returns_store import COLUMN_OF, DISPLAY_NAMES, MISSING, ReturnsStore
+from lindhe_serials import SerialCatalog
+
+DATE_FIELDS = ["Date", "Issue Date", "Closure Date"]
+# Accepted date spellings. Day comes before month, so 01/04/2025 is 1 April;
+# a value matching two formats with different dates is rejected as ambiguous.
+DATE_FORMATS = ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d",
+                "%d/%m/%Y", "%d.%m.%Y", "%d-%m-%Y", "%d/%m/%y", "%d.%m.%y"]
+INT_FIELDS = ["Time on patient (months)"]
+FLOAT_FIELDS = ["User weight"]
+DUPLICATE_KEY = ["Serial Number", "Date", "Issue", "Customer"]
+TRUE_VALUES = {"true", "yes", "1", "y", "x", "ja"}
+
+_SQL_BATCH = 900  # stays below SQLite's limit on bound parameters
+
+
+class ImportResult:
+    def __init__(self, imported: int, rejects: pd.DataFrame, repeats: int):
+        self.imported = imported
+        self.rejects = rejects
+        self.repeats = repeats
+
+    def rejects_csv(self) -> bytes:
+        return self.rejects.to_csv(index=False).encode("utf-8")
+
+
+def read_batch(data, filename: str) -> pd.DataFrame:
+    """Reads a CSV or Excel file (path or file-like) with every column as text."""
+    if filename.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(data, dtype=str)
+    else:
+        df = pd.read_csv(data, dtype=str, keep_default_na=False)
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+
+def _blank(col: pd.Series) -> pd.Series:
+    return col.isna() | col.isin(["", MISSING])
+
+
+def _parse_dates(col: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """(dates, ambiguous): each value tried against every DATE_FORMATS entry, never guessed."""
+    parsed = pd.Series(pd.NaT, index=col.index, dtype="datetime64[ns]")
+    ambiguous = pd.Series(False, index=col.index)
+    for fmt in DATE_FORMATS:
+        attempt = pd.to_datetime(col, errors="coerce", format=fmt)
+        ambiguous |= parsed.notna() & attempt.notna() & (parsed != attempt)
+        parsed = parsed.fillna(attempt)
+    return parsed.where(~ambiguous), ambiguous
+
+
+def validate(df: pd.DataFrame, catalog: SerialCatalog) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Normalizes the batch and returns (df, reasons) where reasons is a Series
+    of "; "-joined problems per row ("" for valid rows).
+    """
+    df = df.copy()
+    n = len(df)
+    for name in DISPLAY_NAMES:
+        if name not in df.columns:
+            df[name] = None
+    df = df[DISPLAY_NAMES]
+    text_cols = [c for c in DISPLAY_NAMES if c not in ("Frequent claim",)]
+    df[text_cols] = df[text_cols].apply(lambda c: c.astype("string").str.strip())
+
+    problems = []  # list of (mask, message)
+
+    for name in REQUIRED_FIELDS:
+        problems.append((_blank(df[name]), f"missing {name}"))
+
+    for name, allowed in ENUM_FIELDS.items():
+        col = df[name]
+        problems.append((~_blank(col) & ~col.isin(allowed), f"invalid {name}"))
+
+    # Date defaults to today, like the form
+    df.loc[_blank(df["Date"]), "Date"] = date.today().isoformat()
+    for name in DATE_FIELDS:
+        blank = _blank(df[name])
+        parsed, ambiguous = _parse_dates(df[name].where(~blank))
+        problems.append((~blank & parsed.isna() & ~ambiguous, f"invalid {name}"))
+        problems.append((ambiguous, f"ambiguous {name}"))
+        df[name] = parsed.dt.strftime("%Y-%m-%d").where(~blank & parsed.notna())
+
+    for name, kind in [(c, "int") for c in INT_FIELDS] + [(c, "float") for c in FLOAT_FIELDS]:
+        blank = _blank(df[name])
+        parsed = pd.to_numeric(df[name].where(~blank), errors="coerce")
+        bad = ~blank & (parsed.isna() | (parsed < 0))
+        if kind == "int":
+            bad |= ~blank & parsed.notna() & (parsed != np.floor(parsed))
+        problems.append((bad, f"invalid {name}"))
+        df[name] = parsed.where(~bad & ~blank)
+        if kind == "int":
+            df[name] = df[name].astype("Int64")
+
+    df["Frequent claim"] = df["Frequent claim"].fillna("").astype(str).str.strip().str.lower().isin(TRUE_VALUES)
+
+    serial_ok = ~_blank(df["Serial Number"])
+    products = catalog.products_for(df["Serial Number"].fillna("").to_numpy())
+    unknown = serial_ok & pd.Series(products == None, index=df.index)  # noqa: E711 (elementwise)
+    problems.append((unknown, "unknown Serial Number"))
+    df["Product"] = products
+
+    reasons = pd.Series([""] * n, index=df.index, dtype=object)
+    for mask, message in problems:
+        if mask.any():
+            reasons[mask] = reasons[mask] + message + "; "
+    return df, reasons.str.rstrip("; ")
+
+
+def _rows(df: pd.DataFrame):
+    """Validated frame -> tuples in COLUMNS order (NULL for missing), column-wise."""
+    columns = []
+    for name in DISPLAY_NAMES:
+        col = df[name]
+        if name == "Frequent claim":
+            values = col.astype(int).to_numpy(dtype=object)
+        else:
+            values = col.astype(object).to_numpy(copy=True)
+            values[col.isna().to_numpy()] = None
+        columns.append(values.tolist())
+    return zip(*columns)
+
+
+def stored_keys(store: ReturnsStore, serials) -> tuple[set, set]:
+    """(duplicate keys, serials) already stored for the given serials, via the serial index."""
+    keys, seen = set(), set()
+    serials = list(serials)
+    cols = ", ".join(COLUMN_OF[c] for c in DUPLICATE_KEY)
+    con = store.connection()
+    for i in range(0, len(serials), _SQL_BATCH):
+        part = serials[i:i + _SQL_BATCH]
+        for row in con.execute(
+            f"SELECT {cols} FROM returns WHERE serial_number IN ({', '.join('?' * len(part))})", part
+        ):
+            keys.add(row)
+            seen.add(row[0])
+    return keys, seen
+
+
+def import_batch(df: pd.DataFrame, store: ReturnsStore, catalog: SerialCatalog) -> ImportResult:
+    df, reasons = validate(df, catalog)
+    valid = reasons == ""
+
+    # Hash index of duplicate keys: stored returns + earlier rows in the batch
+    key_frame = df[DUPLICATE_KEY].fillna("")
+    batch_keys = list(zip(*(key_frame[c] for c in DUPLICATE_KEY)))
+    existing, seen_serials = stored_keys(store, df.loc[valid, "Serial Number"].unique())
+    duplicate = np.zeros(len(df), dtype=bool)
+    repeat = np.zeros(len(df), dtype=bool)
+    for i, (key, ok) in enumerate(zip(batch_keys, valid.to_numpy())):
+        if not ok:
+            continue
+        if key in existing:
+            duplicate[i] = True
+            continue
+        existing.add(key)
+        repeat[i] = key[0] in seen_serials
+        seen_serials.add(key[0])
+    duplicate = pd.Series(duplicate, index=df.index)
+    reasons[duplicate] = "duplicate of an existing return"
+    valid &= ~duplicate
+
+    accepted = df[valid].copy()
+    accepted["ID"] = store.new_ids(len(accepted))
+    imported = store.add_rows(_rows(accepted)) if len(accepted) else 0
+
+    rejects = df[~valid].copy()
+    rejects.insert(0, "Reasons", reasons[~valid])
+    rejects.insert(0, "Row", rejects.index + 2)  # line number in the file (header is line 1)
+    return ImportResult(imported, rejects.drop(columns=["ID", "Product"]), int(repeat[valid.to_numpy()].sum()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import of returns.")
+    parser.add_argument("file")
+    parser.add_argument("--rejects", default=None, help="CSV file for rejected rows")
+    args = parser.parse_args()
+
+    catalog = SerialCatalog.load() if SerialCatalog.exists() else None
+    if catalog is None:
+        raise SystemExit("No serial catalogue; build one with 'python lindhe_serials.py build ...'.")
+    with open(args.file, "rb") as f:
+        batch = read_batch(io.BytesIO(f.read()), args.file)
+    result = import_batch(batch, ReturnsStore(), catalog)
+    print(f"Imported {result.imported} returns ({result.repeats} repeat serials), "
+          f"rejected {len(result.rejects)}.")
+    if args.rejects and len(result.rejects):
+        result.rejects.to_csv(args.rejects, index=False)
+        print(f"Rejects written to '{args.rejects}'.")
@@ -0,0 +1,33 @@
+"""
+Allowed values for the enum fields of a return, shared by the form in
+lindhe_returns_app and the bulk import in lindhe_returns_import.
+"""
+
+issue_options = ["Mechanical failure", "Software issue", "User error", "Manufacturing defect", "Normal wear"]
+customer_options = ["Customer A", "Customer B", "Customer C", "Customer D", "Customer E"]
+gen_options = ["Gen 1", "Gen 2", "Gen 3", "Gen 4"]
+size_options = ["Small", "Medium", "Large", "X-Large"]
+status_options = ["Open", "In Progress", "Closed", "Pending"]
+vigilance_options = ["Low", "Medium", "High", "Critical"]
+activity_levels = ["Low", "Moderate", "High", "Very High"]
+sports = ["Running", "Swimming", "Cycling", "Walking", "Other"]
+water_use = ["No", "Fresh water", "Salt water", "Chlorinated water"]
+compensation = ["None", "Replacement", "Refund", "Credit"]
+investigation_results = ["User error", "Product defect", "Normal wear", "Inconclusive"]
+
+REQUIRED_FIELDS = ["Serial Number", "Issue", "Customer"]
+
+# Column (display name) -> allowed values
+ENUM_FIELDS = {
+    "Issue": issue_options,
+    "Customer": customer_options,
+    "Gen 3": gen_options,
+    "Size": size_options,
+    "Status": status_options,
+    "Vigilance": vigilance_options,
+    "Patient activity level": activity_levels,
+    "Sport": sports,
+    "Use in water": water_use,
+    "Compensation": compensation,
+    "Investigation result": investigation_results,
+}
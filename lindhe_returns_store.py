@@ -0,0 +1,227 @@
+"""
+Persistent storage for lindhe_returns_app.
+
+Returns live in an SQLite database in WAL mode, so the Streamlit app can
+read while another session writes. Serial Number, Customer, Issue, Status
+and Date are indexed. Every write also updates the row count and a content
+version in a one-row `stats` table (in the same transaction), so the app
+can show totals without scanning the table and later features can cache
+on the version. The same transaction bumps the frequent-claim counters
+(lindhe_claim_counters) and the analytics cube (lindhe_returns_cube).
+
+Each thread gets its own connection (Streamlit runs every session in its
+own thread); the ReturnsStore object itself can be shared through
+st.cache_resource.
+"""
+import sqlite3
+import threading
+import uuid
+from datetime import date
+
+import lindhe_claim_counters
+import lindhe_returns_cube
+
+DB_FILE = "lindhe_returns.db"
+
+# (display name used by the app, column, SQL type)
+FIELDS = [
+    ("ID", "return_id", "TEXT NOT NULL UNIQUE"),
+    ("Date", "date", "TEXT NOT NULL"),
+    ("Serial Number", "serial_number", "TEXT NOT NULL"),
+    ("Product", "product", "TEXT"),
+    ("Issue", "issue", "TEXT NOT NULL"),
+    ("Customer", "customer", "TEXT NOT NULL"),
+    ("Gen 3", "gen", "TEXT"),
+    ("Size", "size", "TEXT"),
+    ("Issue Date", "issue_date", "TEXT"),
+    ("Status", "status", "TEXT"),
+    ("Vigilance", "vigilance", "TEXT"),
+    ("Closure Date", "closure_date", "TEXT"),
+    ("Time on patient (months)", "time_on_patient", "INTEGER"),
+    ("User weight", "user_weight", "REAL"),
+    ("Patient activity level", "activity_level", "TEXT"),
+    ("Sport", "sport", "TEXT"),
+    ("Use in water", "use_in_water", "TEXT"),
+    ("Frequent claim", "frequent_claim", "INTEGER NOT NULL DEFAULT 0"),
+    ("Compensation", "compensation", "TEXT"),
+    ("Reason for comp decision", "comp_reason", "TEXT"),
+    ("Investigation result", "investigation", "TEXT"),
+    ("Comment", "comment", "TEXT"),
+    ("Archived where", "archived_where", "TEXT"),
+]
+DISPLAY_NAMES = [f[0] for f in FIELDS]
+COLUMNS = [f[1] for f in FIELDS]
+COLUMN_OF = {f[0]: f[1] for f in FIELDS}
+
+MISSING = "N/A"
+_FREQUENT = COLUMNS.index("frequent_claim")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS returns (
+    id INTEGER PRIMARY KEY,
+    {", ".join(f"{col} {typ}" for _, col, typ in FIELDS)}
+);
+CREATE INDEX IF NOT EXISTS ix_returns_serial   ON returns(serial_number);
+CREATE INDEX IF NOT EXISTS ix_returns_customer ON returns(customer);
+CREATE INDEX IF NOT EXISTS ix_returns_issue    ON returns(issue);
+CREATE INDEX IF NOT EXISTS ix_returns_status   ON returns(status);
+CREATE INDEX IF NOT EXISTS ix_returns_date     ON returns(date);
+
+CREATE TABLE IF NOT EXISTS stats (
+    id       INTEGER PRIMARY KEY CHECK (id = 0),
+    n        INTEGER NOT NULL,
+    version  INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats(id, n, version) VALUES (0, 0, 0);
+"""
+
+_BUMP = "UPDATE stats SET n = n + ?, version = version + 1 WHERE id = 0"
+
+_INSERT = (f"INSERT INTO returns({', '.join(COLUMNS)}) "
+           f"VALUES ({', '.join('?' * len(COLUMNS))})")
+
+
+def _to_db(value):
+    """App values -> SQLite values. "N/A" and empty strings are stored as NULL."""
+    if value is None or value == MISSING or value == "":
+        return None
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def to_row(record: dict) -> tuple:
+    """A return as the app builds it (display names) -> tuple in COLUMNS order."""
+    row = [_to_db(record.get(name)) for name in DISPLAY_NAMES]
+    row[_FREQUENT] = row[_FREQUENT] or 0
+    return tuple(row)
+
+
+_CLAIM_KEY = [COLUMNS.index(c) for c in ("date", "serial_number", "customer", "issue")]
+_CUBE_KEY = [COLUMNS.index(c) for c in lindhe_returns_cube.SOURCE_COLUMNS]
+
+
+def _claim_key(row: tuple) -> tuple:
+    return tuple(row[i] for i in _CLAIM_KEY)
+
+
+def _cube_key(row: tuple) -> tuple:
+    return tuple(row[i] for i in _CUBE_KEY)
+
+
+def to_record(row) -> dict:
+    """Tuple in COLUMNS order -> dict with display names, NULL shown as "N/A"."""
+    record = {name: (MISSING if v is None else v) for name, v in zip(DISPLAY_NAMES, row)}
+    record["Frequent claim"] = bool(row[_FREQUENT])
+    return record
+
+
+class ReturnsStore:
+    def __init__(self, path: str = DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        con = self.connection()  # creates the schema
+        # A database from before the counters or the cube existed has returns but no cells
+        if lindhe_claim_counters.total(con) != self.count():
+            lindhe_claim_counters.rebuild(con)
+        if lindhe_returns_cube.total(con) != self.count():
+            lindhe_returns_cube.rebuild(con)
+
+    def connection(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.executescript(SCHEMA)
+            con.executescript(lindhe_claim_counters.SCHEMA)
+            con.executescript(lindhe_returns_cube.SCHEMA)
+            self._local.con = con
+        return con
+
+    def close(self):
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            con.close()
+            self._local.con = None
+
+    # --------- Writing ----------
+    def add(self, record: dict) -> int:
+        """Registers one return: a single indexed insert. Returns the row id."""
+        con = self.connection()
+        row = to_row(record)
+        with con:
+            cur = con.execute(_INSERT, row)
+            con.execute(_BUMP, (1,))
+            lindhe_claim_counters.bump(con, [_claim_key(row)])
+            lindhe_returns_cube.bump(con, [_cube_key(row)])
+        return cur.lastrowid
+
+    def add_many(self, records) -> int:
+        return self.add_rows(to_row(r) for r in records)
+
+    def add_rows(self, rows) -> int:
+        """
+        Inserts tuples already in COLUMNS order (see to_row) in one
+        transaction. The counters and the cube are then updated by SQLite
+        from the new rows, which hold consecutive ids because the
+        transaction has the write lock.
+        """
+        con = self.connection()
+        rows = list(rows)
+        if not rows:
+            return 0
+        with con:
+            cur = con.executemany(_INSERT, rows)
+            con.execute(_BUMP, (cur.rowcount,))
+            last = con.execute("SELECT max(id) FROM returns").fetchone()[0]
+            first = last - cur.rowcount + 1
+            lindhe_claim_counters.bump_ids(con, first, last)
+            lindhe_returns_cube.bump_ids(con, first, last)
+        return cur.rowcount
+
+    def new_ids(self, n: int) -> list[str]:
+        """n short return IDs (8 hex digits, as in the form) not used by any stored return."""
+        con = self.connection()
+        ids = set()
+        while len(ids) < n:
+            fresh = {uuid.uuid4().hex[:8] for _ in range(n - len(ids))} - ids
+            taken = set()
+            fresh_list = list(fresh)
+            for i in range(0, len(fresh_list), 900):
+                part = fresh_list[i:i + 900]
+                taken.update(r[0] for r in con.execute(
+                    f"SELECT return_id FROM returns WHERE return_id IN ({', '.join('?' * len(part))})", part))
+            ids |= fresh - taken
+        return list(ids)
+
+    # --------- Reading ----------
+    def claim_counts(self, serial: str, customer: str, issue: str, today: date | None = None) -> dict:
+        """Earlier returns per window for the serial, customer and (customer, issue)."""
+        return lindhe_claim_counters.counts(self.connection(), serial, customer, issue, today)
+
+    def count(self) -> int:
+        return self.connection().execute("SELECT n FROM stats WHERE id = 0").fetchone()[0]
+
+    def version(self) -> int:
+        """Changes whenever returns are added through the store."""
+        return self.connection().execute("SELECT version FROM stats WHERE id = 0").fetchone()[0]
+
+    def latest(self, n: int = 10, columns: list[str] | None = None) -> list[dict]:
+        """The n most recent returns, newest first. Reads n rows via the primary key."""
+        if columns is None:
+            rows = self.connection().execute(
+                f"SELECT {', '.join(COLUMNS)} FROM returns ORDER BY id DESC LIMIT ?", (n,)
+            )
+            return [to_record(r) for r in rows]
+        cols = [COLUMN_OF[c] for c in columns]
+        rows = self.connection().execute(
+            f"SELECT {', '.join(cols)} FROM returns ORDER BY id DESC LIMIT ?", (n,)
+        )
+        return [{c: (MISSING if v is None else v) for c, v in zip(columns, r)} for r in rows]
+
+    def all(self) -> list[dict]:
+        rows = self.connection().execute(f"SELECT {', '.join(COLUMNS)} FROM returns ORDER BY id")
+        return [to_record(r) for r in rows]
@@ -0,0 +1,143 @@
+"""
+Serial-number catalogue for lindhe_returns_app with prefix autocomplete.
+
+The catalogue is stored as a sorted, fixed-width byte array of serials
+(NumPy .npy) next to a parallel array of product codes and a small JSON
+list of product names. Both arrays are memory-mapped on load, so opening
+a catalogue with millions of serials costs a few page faults, and a
+lookup is a binary search (np.searchsorted) that touches ~log2(N) pages.
+
+    catalog = SerialCatalog.load()              # or SerialCatalog.from_dict(...)
+    catalog.product("SN001")                    # -> "Product A" or None
+    catalog.complete("SN00", k=10)              # -> [("SN001", "Product A"), ...]
+
+Build the files from a CSV with the columns "Serial Number" and "Product":
+    python lindhe_serials.py build products.csv
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+INDEX_BASE = "lindhe_serials"
+
+
+def _paths(base: str) -> tuple[str, str, str]:
+    return base + ".npy", base + "_products.npy", base + "_products.json"
+
+
+class SerialCatalog:
+    def __init__(self, serials: np.ndarray, codes: np.ndarray, products: list[str]):
+        # serials: sorted, dtype S<width>; codes[i] indexes products for serials[i]
+        self.serials = serials
+        self.codes = codes
+        self.products = products
+        self.width = serials.dtype.itemsize
+
+    def __len__(self):
+        return len(self.serials)
+
+    # --------- Construction ----------
+    @classmethod
+    def from_arrays(cls, serials, products) -> "SerialCatalog":
+        """Builds an in-memory catalogue from parallel sequences of serials and product names."""
+        serials = np.asarray(serials, dtype=object).astype(str)
+        encoded = np.char.encode(serials, "utf-8")
+        names, codes = np.unique(np.asarray(products, dtype=str), return_inverse=True)
+        order = np.argsort(encoded, kind="stable")
+        return cls(encoded[order], codes[order].astype(np.uint32), names.tolist())
+
+    @classmethod
+    def from_dict(cls, products_db: dict) -> "SerialCatalog":
+        return cls.from_arrays(list(products_db.keys()), list(products_db.values()))
+
+    def save(self, base: str = INDEX_BASE):
+        serials_path, codes_path, names_path = _paths(base)
+        np.save(serials_path, self.serials)
+        np.save(codes_path, self.codes)
+        with open(names_path, "w", encoding="utf-8") as f:
+            json.dump(self.products, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, base: str = INDEX_BASE) -> "SerialCatalog":
+        serials_path, codes_path, names_path = _paths(base)
+        with open(names_path, encoding="utf-8") as f:
+            products = json.load(f)
+        return cls(np.load(serials_path, mmap_mode="r"), np.load(codes_path, mmap_mode="r"), products)
+
+    @staticmethod
+    def exists(base: str = INDEX_BASE) -> bool:
+        return all(os.path.exists(p) for p in _paths(base))
+
+    # --------- Lookup ----------
+    def _key(self, serial: str) -> bytes | None:
+        key = serial.encode("utf-8")
+        return key if len(key) <= self.width else None
+
+    def product(self, serial: str) -> str | None:
+        """Product name for an exact serial, or None."""
+        key = self._key(serial)
+        if key is None or not len(self.serials):
+            return None
+        i = int(np.searchsorted(self.serials, key))
+        if i < len(self.serials) and self.serials[i] == key:
+            return self.products[int(self.codes[i])]
+        return None
+
+    def products_for(self, serials) -> np.ndarray:
+        """Product names for many exact serials at once (object array, None if unknown)."""
+        keys = np.char.encode(np.asarray(serials, dtype=str), "utf-8")
+        out = np.full(len(keys), None, dtype=object)
+        if not len(self.serials) or not len(keys):
+            return out
+        i = np.searchsorted(self.serials, keys)
+        inside = i < len(self.serials)
+        found = np.zeros(len(keys), dtype=bool)
+        found[inside] = self.serials[i[inside]] == keys[inside]
+        # Keys longer than the catalogue width would be truncated in the comparison
+        found &= np.char.str_len(keys) <= self.width
+        names = np.asarray(self.products, dtype=object)
+        out[found] = names[np.asarray(self.codes)[i[found]]]
+        return out
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        key = self._key(prefix)
+        if key is None:
+            return 0, 0
+        lo = int(np.searchsorted(self.serials, key, side="left"))
+        if len(key) == self.width:
+            return lo, int(np.searchsorted(self.serials, key, side="right"))
+        # Everything starting with the prefix sorts below prefix + 0xff
+        hi = int(np.searchsorted(self.serials, key + b"\xff", side="left"))
+        return lo, hi
+
+    def count(self, prefix: str) -> int:
+        lo, hi = self._range(prefix)
+        return hi - lo
+
+    def complete(self, prefix: str, k: int = 10) -> list[tuple[str, str]]:
+        """The first k serials (in sort order) starting with prefix, with product names."""
+        lo, hi = self._range(prefix)
+        hi = min(hi, lo + k)
+        return [(s.decode("utf-8"), self.products[int(c)])
+                for s, c in zip(self.serials[lo:hi], self.codes[lo:hi])]
+
+
+def build(csv_path: str, base: str = INDEX_BASE) -> SerialCatalog:
+    import pandas as pd
+    df = pd.read_csv(csv_path, usecols=["Serial Number", "Product"], dtype=str)
+    df = df.dropna(subset=["Serial Number"]).drop_duplicates("Serial Number", keep="last")
+    catalog = SerialCatalog.from_arrays(df["Serial Number"].to_numpy(),
+                                        df["Product"].fillna("Unknown Product").to_numpy())
+    catalog.save(base)
+    return catalog
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["build"] and len(sys.argv) == 3:
+        catalog = build(sys.argv[2])
+        print(f"Indexed {len(catalog)} serials ({len(catalog.products)} products) in '{INDEX_BASE}.npy'.")
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,160 @@
+"""
+Provkörning av utkorgen mot en lokal SMTP-server i samma process.
+
+Servern är en minimal SMTP-ersättare (EHLO, MAIL, RCPT, DATA, RSET, NOOP,
+QUIT) i stil med aiosmtpd:s debugging-server. Den kan svara 421 och koppla
+ner på de första --fel-MAIL-kommandona, och svarar 550 för mottagare på
+domänen studsa.invalid. Kontrollerar att:
+
+    * alla vanliga meddelanden levereras exakt en gång
+    * tillfälliga fel ger nya försök (med kort backoff här)
+    * permanent fel hamnar som "död"
+    * en förbindelse återanvänds för flera meddelanden
+
+Kör:
+    python prov_utkorg.py
+    python prov_utkorg.py --antal 500 --fel 3
+"""
+import argparse
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from email.message import EmailMessage
+
+import aktivitetslogg_utkorg as utkorg_mod
+from aktivitetslogg_utkorg import DOD, SKICKAD, Utkorg, Utskickare
+
+
+class ProvServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, fel: int):
+        super().__init__(("127.0.0.1", 0), _Hanterare)
+        self.lock = threading.Lock()
+        self.fel_kvar = fel
+        self.mottagna = []     # (till, data)
+        self.forbindelser = 0
+
+
+class _Hanterare(socketserver.StreamRequestHandler):
+    def _svara(self, text: str):
+        self.wfile.write(text.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.forbindelser += 1
+        self._svara("220 localhost prov-smtp")
+        till = []
+        while True:
+            rad = self.rfile.readline()
+            if not rad:
+                return
+            kommando = rad.decode().strip()
+            verb = kommando[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self._svara("250 localhost")
+            elif verb == "MAIL":
+                with server.lock:
+                    fela = server.fel_kvar > 0
+                    server.fel_kvar -= fela
+                if fela:
+                    self._svara("421 tillfälligt fel, försök senare")
+                    return
+                till = []
+                self._svara("250 OK")
+            elif verb == "RCPT":
+                adress = kommando.split(":", 1)[1].strip("<> ")
+                if adress.endswith("@studsa.invalid"):
+                    self._svara("550 okänd mottagare")
+                else:
+                    till.append(adress)
+                    self._svara("250 OK")
+            elif verb == "DATA":
+                self._svara("354 skicka")
+                data = []
+                while (rad := self.rfile.readline()) not in (b".\r\n", b".\n", b""):
+                    data.append(rad)
+                with server.lock:
+                    server.mottagna.append((tuple(till), b"".join(data)))
+                self._svara("250 OK")
+            elif verb in ("RSET", "NOOP"):
+                self._svara("250 OK")
+            elif verb == "QUIT":
+                self._svara("221 hej då")
+                return
+            else:
+                self._svara("502 okänt kommando")
+
+
+def _meddelande(till: str, i: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = f"Aktivitetslogg prov {i}"
+    msg["From"] = "avsandare@example.com"
+    msg["To"] = till
+    msg.set_content(f"Meddelande {i}")
+    msg.add_attachment(b"Datum,Tid\r\n", maintype="text", subtype="csv", filename="a.csv")
+    return msg
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provkörning av utkorgen.")
+    parser.add_argument("--antal", type=int, default=100)
+    parser.add_argument("--fel", type=int, default=2, help="antal 421-svar innan servern fungerar")
+    args = parser.parse_args()
+
+    utkorg_mod.BACKOFF_BAS = 0.05
+    utkorg_mod.VANTA_S = 0.05
+
+    server = ProvServer(args.fel)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cfg = {"host": "127.0.0.1", "port": server.server_address[1], "starttls": False}
+
+    with tempfile.TemporaryDirectory() as katalog:
+        fil = os.path.join(katalog, "utkorg.db")
+        utskickare = Utskickare(cfg, fil)
+        utskickare.start()
+
+        with Utkorg(fil) as utkorg:
+            t0 = time.perf_counter()
+            ids = [utkorg.koa(_meddelande(f"skytt{i}@example.com", i)) for i in range(args.antal)]
+            studs = utkorg.koa(_meddelande("ingen@studsa.invalid", -1))
+            utskickare.vack()
+            t_koa = time.perf_counter() - t0
+
+            while True:
+                oversikt = utkorg.oversikt()
+                if oversikt[SKICKAD] + oversikt[DOD] == args.antal + 1:
+                    break
+                time.sleep(0.02)
+            t_klar = time.perf_counter() - t0
+
+            utskickare.stoppa()
+            utskickare.join()
+
+            fel = []
+            if utkorg.status(studs)["status"] != DOD:
+                fel.append(f"studsande meddelande har status {utkorg.status(studs)}")
+            for mid in ids:
+                if utkorg.status(mid)["status"] != SKICKAD:
+                    fel.append(f"#{mid}: {utkorg.status(mid)}")
+            levererade = sorted(t[0] for t, _ in server.mottagna)
+            vantade = sorted(f"skytt{i}@example.com" for i in range(args.antal))
+            if levererade != vantade:
+                fel.append(f"{len(levererade)} levererade, väntade {len(vantade)} unika")
+
+    server.shutdown()
+    print(f"Köade {args.antal + 1} meddelanden på {t_koa * 1000:.1f} ms "
+          f"({t_koa / (args.antal + 1) * 1e6:.0f} µs/st), klart efter {t_klar:.2f} s")
+    print(f"{len(server.mottagna)} levererade över {server.forbindelser} förbindelser")
+    for f in fel:
+        print("FEL:", f)
+    print("OK" if not fel else f"{len(fel)} fel.")
+    raise SystemExit(1 if fel else 0)
+
+
+if __name__ == "__main__":
+    main()
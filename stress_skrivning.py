@@ -0,0 +1,116 @@
+"""
+Stresstest: många processer sparar sessioner samtidigt i samma loggfiler.
+
+Kör:
+    python stress_skrivning.py                  # 8 processer x 200 sessioner
+    python stress_skrivning.py 16 500           # valfritt antal
+    python stress_skrivning.py 8 200 --krasch   # var 10:e sparning "kraschar"
+
+Efteråt kontrolleras att båda filerna har exakt en rubrikrad, att alla
+sessioner finns med en gång och att varje sessionsrads Serier stämmer med
+serieraderna i masterfilen. Med --krasch avbryts en del skrivare direkt
+efter att journalen skrivits (i en egen process som avslutas); nästa
+skrivare ska då spela upp den.
+"""
+import csv
+import os
+import sys
+import tempfile
+from collections import defaultdict
+from multiprocessing import Process
+
+import aktivitetslogg_journal
+from aktivitetslogg_lagring import aterstall_journal, csv_text, spara_session
+from aktivitetslogg_poang import (
+    FALT_MASTER, FALT_SESSION, berakna_guldkrav, build_master_rows, build_session_row,
+)
+
+
+def krascha_efter_journal(meta, serier, master: str, session: str):
+    """Skriver journalen och avslutar processen innan loggfilerna rörs."""
+    with aktivitetslogg_journal.Journal(master) as j:
+        # Efter __enter__, som kan behöva spela upp en annan skrivares journal
+        aktivitetslogg_journal._applicera = lambda *_: os._exit(0)
+        j.skriv([
+            (master, csv_text(FALT_MASTER, [], rubrik=True),
+             csv_text(FALT_MASTER, build_master_rows(*meta, serier))),
+            (session, csv_text(FALT_SESSION, [], rubrik=True),
+             csv_text(FALT_SESSION, [build_session_row(*meta, serier)])),
+        ])
+
+
+def skrivare(nr: int, antal: int, master: str, session: str, krasch: bool):
+    db_fil = os.path.join(os.path.dirname(master), "saknas.db")
+    for i in range(antal):
+        vk = "A" if i % 2 else "C"
+        meta = ("2025-08-27", f"{nr:02d}:{i // 60 % 60:02d}:{i % 60:02d}", f"Skytt {nr}-{i}",
+                40 + nr, "Singeshult", "Johan", vk, berakna_guldkrav(vk, 40 + nr))
+        serier = [(nr * 7 + i * 3 + k) % 50 + 1 for k in range(1 + i % 10)]
+
+        if krasch and i % 10 == 9:
+            p = Process(target=krascha_efter_journal, args=(meta, serier, master, session))
+            p.start()
+            p.join()
+            continue
+        spara_session(*meta, serier, master_fil=master, session_fil=session, db_fil=db_fil)
+
+
+def kontrollera(master: str, session: str, forvantat: int) -> list[str]:
+    fel = []
+    for fil, falt in ((master, FALT_MASTER), (session, FALT_SESSION)):
+        with open(fil, encoding="utf-8") as f:
+            rubriker = sum(1 for rad in f if rad.startswith("Datum,"))
+        if rubriker != 1:
+            fel.append(f"{fil}: {rubriker} rubrikrader")
+
+    serier = defaultdict(list)
+    with open(master, newline="", encoding="utf-8") as f:
+        for rad in csv.DictReader(f):
+            serier[(rad["Tid"], rad["Namn"])].append(rad["Poäng"])
+
+    sedda = set()
+    with open(session, newline="", encoding="utf-8") as f:
+        for rad in csv.DictReader(f):
+            nyckel = (rad["Tid"], rad["Namn"])
+            if nyckel in sedda:
+                fel.append(f"Dubblett: {nyckel}")
+            sedda.add(nyckel)
+            if "|".join(serier.get(nyckel, [])) != rad["Serier"]:
+                fel.append(f"Serier stämmer inte för {nyckel}")
+
+    if len(sedda) != forvantat:
+        fel.append(f"{len(sedda)} sessioner, väntade {forvantat}")
+    if set(serier) != sedda:
+        fel.append(f"{len(set(serier) - sedda)} sessioner finns bara i masterfilen")
+    return fel
+
+
+def main():
+    argument = [a for a in sys.argv[1:] if not a.startswith("--")]
+    processer = int(argument[0]) if argument else 8
+    antal = int(argument[1]) if len(argument) > 1 else 200
+    krasch = "--krasch" in sys.argv
+
+    with tempfile.TemporaryDirectory() as katalog:
+        master = os.path.join(katalog, "aktivitetslogg.csv")
+        session = os.path.join(katalog, "aktivitetslogg_sessioner.csv")
+
+        jobb = [Process(target=skrivare, args=(nr, antal, master, session, krasch))
+                for nr in range(processer)]
+        for p in jobb:
+            p.start()
+        for p in jobb:
+            p.join()
+
+        # En krasch i sista sparningen har ingen efterföljare som spelar upp den
+        aterstall_journal(master)
+        fel = kontrollera(master, session, processer * antal)
+
+    for f in fel[:20]:
+        print(f)
+    print("OK" if not fel else f"{len(fel)} fel.")
+    sys.exit(1 if fel else 0)
+
+
+if __name__ == "__main__":
+    main()